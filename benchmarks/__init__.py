@@ -0,0 +1,3 @@
+"""
+Benchmarks and a generator of synthetic HEC-RAS files, see run.py and generate.py
+"""
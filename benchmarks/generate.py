@@ -0,0 +1,220 @@
+"""
+Deterministic generator of synthetic HEC-RAS geometry (.g??), steady flow (.f??) and unsteady flow (.u??) files
+
+    python -m benchmarks.generate out_dir --reaches 4 --cross-sections 500 --points 60
+"""
+import argparse
+import os
+import random
+
+
+def format_number(value, decimals=2):
+    """
+    Returns value the way RAS writes it: no trailing zeros and no leading zero before the decimal point
+    """
+    s = ('%.*f' % (decimals, value)).rstrip('0').rstrip('.')
+    if s.startswith('0.'):
+        s = s[1:]
+    elif s.startswith('-0.'):
+        s = '-' + s[2:]
+    return s or '0'
+
+
+def format_block(values, num_columns, width=8):
+    """
+    Returns values right aligned in columns of width, num_columns per line
+    """
+    lines = []
+    for i in range(0, len(values), num_columns):
+        lines.append(''.join(value.rjust(width) for value in values[i:i + num_columns]))
+    return '\n'.join(lines) + '\n'
+
+
+def river_name(i):
+    return 'River %d' % i
+
+
+def stations(num_cross_sections):
+    """
+    Returns the station of every cross section on a reach, upstream to downstream
+    """
+    return [format_number(20000 - k * 100 + (k * 7919 % 50) / 10.0, 1) for k in range(num_cross_sections)]
+
+
+def culvert(station, rnd):
+    """
+    Returns text of a culvert node at station
+    """
+    deck_sta = ['0', '10', '20', '40']
+    deck_elev = [format_number(104 + rnd.random(), 1) for _ in deck_sta]
+    deck = format_block(deck_sta, 10) + format_block(deck_elev, 10) + ' ' * 32 + '\n'
+    return ('Type RM Length L Ch R = 2 ,%-8s,,,\n' % station +
+            'BEGIN DESCRIPTION:\nculvert\nEND DESCRIPTION:\n'
+            'Node Last Edited Time=Jan/01/2020 00:00:00\n'
+            'Deck Dist Width WeirC Skew NumUp NumDn MinLoCord MaxHiCord MaxSubmerge Is_Ogee\n'
+            '5,30,2.6,0, 4, 4,0,0,.95,0,0,0,0,\n' + deck + deck +
+            'Culvert=2,4,4,50,0.013,0.5,1,1,1,100,15,99.5,15,Culvert #1, 0 ,0\n'
+            '      15      15\n'
+            'BC Culvert Barrel=1,Barrel #1,0\n'
+            'Culvert Bottom n=0.013\n'
+            'Culvert Bottom Depth=0\n'
+            'BC Design=0\n\n')
+
+
+def cross_section(station, k, num_points, rnd):
+    """
+    Returns text of a cross section node at station with about num_points station/elevation points
+    """
+    s = 'Type RM Length L Ch R = 1 ,%-8s,100.5,101.5,102.5\n' % station
+    if k % 3 == 0:
+        s += 'BEGIN DESCRIPTION:\nxs %d\nEND DESCRIPTION:\n' % k
+    s += 'XS GIS Cut Line=3\n%16s%16s%16s%16s\n%16s%16s\n' % ('1000.5', '2000.25', '1500', '2500', '1700', '2700')
+    s += 'Node Last Edited Time=Jan/01/2020 00:00:00\n'
+    n = num_points + rnd.randint(0, 5)
+    values = []
+    for i in range(n):
+        channel = 5 if n // 3 < i < 2 * n // 3 else 0
+        values += [format_number(i * 5.5), format_number(100 + rnd.random() * 20 - channel)]
+    s += '#Sta/Elev= %d \n' % n + format_block(values, 10)
+    left_bank = format_number((n // 3 + 1) * 5.5)
+    right_bank = format_number((2 * n // 3) * 5.5)
+    mannings = ['0', '.06', '0', left_bank, '.035', '0', right_bank, '.06', '0']
+    if k % 4 == 0:
+        mannings = ['0', '.06', '0', '3', '.05', '0', left_bank, '.035', '0', right_bank, '.06', '0']
+    s += '#Mann= %d , 0 , 0 \n' % (len(mannings) // 3) + format_block(mannings, 9)
+    if k % 5 == 0:
+        s += '#XS Ineff= 2 , 0 \n' + format_block(['0', '10', '105', right_bank, '', '106'], 9)
+        s += 'Permanent Ineff=\n       F       T\n'
+    if k % 7 == 0:
+        s += '#Block Obstruct= 1 , 0 \n' + format_block(['1', '5', '110'], 9)
+    s += 'Bank Sta=%s,%s\n' % (left_bank, right_bank)
+    if k % 6 == 0:
+        s += 'Levee=-1,10,105,,,\nSkew Angle= 15 \n'
+    s += 'XS Rating Curve= 0 ,0\nXS HTab Starting El and Incr=98,0.1, 100 \nExp/Cntr=0.3,0.1\n\n'
+    return s
+
+
+def geometry(reaches=2, cross_sections=50, points=40, culvert_every=31, seed=1):
+    """
+    Returns text of a geometry file
+
+    :param reaches: number of river/reaches
+    :param cross_sections: number of cross sections per reach
+    :param points: about this many station/elevation points per cross section
+    :param culvert_every: a culvert is added every culvert_every cross sections, 0 for none
+    :param seed: random seed, the same arguments always return the same text
+    """
+    rnd = random.Random(seed)
+    parts = ['Geom Title=Synthetic\nProgram Version=5.07\nViewing Rectangle= 0 , 1000 , 1000 , 0 \n\n']
+    for r in range(reaches):
+        parts.append('River Reach=%-16s,%-16s\n' % (river_name(r), 'Reach'))
+        parts.append('Reach XY= 3 \n%16s%16s%16s%16s\n%16s%16s\n' % ('1000.5', '2000.25', '1500', '2500', '1700',
+                                                                      '2700'))
+        parts.append('Rch Text X Y=1250,2250\nReverse River Text= 0 \n\n')
+        for k, station in enumerate(stations(cross_sections)):
+            if k % 17 == 5:
+                parts.append('Type RM Length L Ch R = 3 ,%-8s,,,\nBEGIN DESCRIPTION:\nbridge\nEND DESCRIPTION:\n'
+                             'Node Last Edited Time=Jan/01/2020 00:00:00\nBR U Dist Width WeirC=1,2,3\n\n'
+                             % (station + '1'))
+            if k % 23 == 7:
+                parts.append('Type RM Length L Ch R = 5 ,%-8s,,,\nNode Last Edited Time=Jan/01/2020 00:00:00\n'
+                             'IW Dist,WD,Coef=1,2,3\n\n' % (station + '2'))
+            if k % 29 == 3:
+                parts.append('Type RM Length L Ch R = 6 ,%-8s,,,\nBEGIN DESCRIPTION:\nlateral\n\nEND DESCRIPTION:\n'
+                             'Lateral Weir Pos= 0 \n\n' % (station + '3'))
+            if culvert_every and k % culvert_every == 11 % culvert_every:
+                parts.append(culvert(station + '4', rnd))
+            parts.append(cross_section(station, k, points, rnd))
+        parts.append('Junct Name=J%-12d\nJunct Desc=, 0 \nJunct X Y & Text X Y=1,2,3,4\n\n' % r)
+    parts.append('Use User Specified Reach Order=0\nLOB Slices= 0 \n')
+    return ''.join(parts)
+
+
+def steady_flow(reaches=2, profiles=3, seed=1):
+    """
+    Returns text of a steady flow file with a flow change location at the top of every reach
+    """
+    rnd = random.Random(seed)
+    names = ['PF %d' % (i + 1) for i in range(profiles)]
+    s = 'Flow Title=Synthetic\nProgram Version=5.07\n'
+    s += 'Number of Profiles= %d \nProfile Names=%s\n' % (profiles, ','.join(names))
+    for r in range(reaches):
+        top = stations(1)[0]
+        s += 'River Rch & RM=%s,%s,%s\n' % (river_name(r), 'Reach'.ljust(16), top)
+        flows = [format_number(100 * (i + 1) + rnd.random() * 10, 1) for i in range(profiles)]
+        s += format_block(flows, 10)
+    for r in range(reaches):
+        for p in range(profiles):
+            s += 'Boundary for River Rch & Prof#=%s,%s, %d \n' % (river_name(r), 'Reach'.ljust(16), p + 1)
+            s += 'Up Type= 0 \nDn Type= 3 \nDn Slope=0.001\n'
+    s += 'DSS Import StartDate=\nDSS Import StartTime=\nDSS Import EndDate=\nDSS Import EndTime=\n'
+    return s
+
+
+def unsteady_flow(reaches=2, hydrograph_length=100, seed=1):
+    """
+    Returns text of an unsteady flow file with a flow hydrograph at the top and a stage hydrograph at the bottom of
+    every reach
+    """
+    rnd = random.Random(seed)
+    top = stations(1)[0]
+    s = 'Flow Title=Synthetic\nProgram Version=5.07\nUse Restart= 0 \nInitial Flow Loc=\n'
+    for r in range(reaches):
+        for station, kind in ((top, 'Flow'), ('100', 'Stage')):
+            s += 'Boundary Location=%-16s,%-16s,%-8s,%-6s,%-16s,%-16s,%-16s,%-16s\n' % (
+                river_name(r), 'Reach', station, '', '', '', '', '')
+            s += 'Interval=1HOUR\n'
+            base = 100.0 if kind == 'Flow' else 10.0
+            values = [format_number(base + 50 * rnd.random(), 2) for _ in range(hydrograph_length)]
+            s += '%s Hydrograph= %d \n' % (kind, hydrograph_length) + format_block(values, 10)
+            s += 'DSS Path=\nUse DSS=False\nUse Fixed Start Time=False\nFixed Start Date/Time=,\n'
+            s += 'Is Critical Boundary=False\nCritical Boundary Flow=\n'
+    return s
+
+
+def write(text, filename):
+    """
+    Writes text to filename with the Windows line endings RAS uses
+    """
+    with open(filename, 'wt', newline='\r\n') as outfile:
+        outfile.write(text)
+
+
+def generate(out_dir, name='synthetic', reaches=2, cross_sections=50, points=40, culvert_every=31, profiles=3,
+             hydrograph_length=100, seed=1):
+    """
+    Writes name.g01, name.f01 and name.u01 to out_dir. See geometry(), steady_flow() and unsteady_flow()
+
+    :return: dict of file names keyed by 'geometry', 'steady' and 'unsteady'
+    """
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+    files = {'geometry': os.path.join(out_dir, name + '.g01'),
+             'steady': os.path.join(out_dir, name + '.f01'),
+             'unsteady': os.path.join(out_dir, name + '.u01')}
+    write(geometry(reaches, cross_sections, points, culvert_every, seed), files['geometry'])
+    write(steady_flow(reaches, profiles, seed), files['steady'])
+    write(unsteady_flow(reaches, hydrograph_length, seed), files['unsteady'])
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Writes synthetic HEC-RAS geometry and flow files')
+    parser.add_argument('out_dir')
+    parser.add_argument('--name', default='synthetic')
+    parser.add_argument('--reaches', type=int, default=2)
+    parser.add_argument('--cross-sections', type=int, default=50, help='cross sections per reach')
+    parser.add_argument('--points', type=int, default=40, help='station/elevation points per cross section')
+    parser.add_argument('--culvert-every', type=int, default=31, help='cross sections per culvert, 0 for none')
+    parser.add_argument('--profiles', type=int, default=3, help='steady flow profiles')
+    parser.add_argument('--hydrograph-length', type=int, default=100, help='values per unsteady hydrograph')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    files = generate(args.out_dir, args.name, args.reaches, args.cross_sections, args.points, args.culvert_every,
+                     args.profiles, args.hydrograph_length, args.seed)
+    for filename in files.values():
+        print(filename)
+
+
+if __name__ == '__main__':
+    main()
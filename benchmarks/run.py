@@ -0,0 +1,187 @@
+"""
+Times parsing, querying, changing and writing synthetic HEC-RAS files and saves the results as JSON
+
+    python -m benchmarks.run --out results.json
+    python -m benchmarks.run --out new.json --compare old.json
+
+Every benchmark is run --repeat times and the fastest time is kept. Peak memory is measured with tracemalloc while
+the geometry is imported, separately from the timed runs because tracemalloc slows Python down.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from parserasgeo import ParseRASGeo, SteadyFlow, UnsteadyFlow
+
+from . import generate
+
+# Slower by more than this ratio is reported as a regression by --compare
+REGRESSION_RATIO = 1.1
+
+QUERIES = 1000
+
+
+def best_time(fn, repeat):
+    """
+    Returns the fastest of repeat calls to fn, in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def peak_memory(fn):
+    """
+    Returns peak memory allocated while calling fn, in bytes
+    """
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def scale_mannings_n(geo, factor):
+    for xs in geo.get_cross_sections():
+        xs.mannings_n.values = [(sta, n * factor, other) for sta, n, other in xs.mannings_n.values]
+
+
+def git_commit():
+    """
+    Returns the commit the benchmarks are run on, or None if it can't be found
+    """
+    try:
+        output = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode('ascii').strip()
+
+
+def run(files, repeat):
+    """
+    Runs all benchmarks on the files written by generate.generate()
+
+    :return: dict of results keyed by benchmark name, times are in seconds and memory in bytes
+    """
+    geo_filename = files['geometry']
+    out_dir = os.path.dirname(geo_filename)
+    megabytes = os.path.getsize(geo_filename) / 1024.0 ** 2
+    results = {}
+
+    def record(name, fn, size=None):
+        seconds = best_time(fn, repeat)
+        results[name] = {'seconds': seconds}
+        if size is not None:
+            results[name]['mb_per_second'] = size / seconds
+        print('%-28s %10.4f s' % (name, seconds))
+
+    record('parse', lambda: ParseRASGeo(geo_filename), megabytes)
+    record('parse_compact', lambda: ParseRASGeo(geo_filename, compact=True), megabytes)
+    record('parse_lazy', lambda: ParseRASGeo(geo_filename, lazy=True), megabytes)
+
+    for name, kwargs in (('memory_parse', {}), ('memory_parse_compact', {'compact': True}),
+                         ('memory_parse_lazy', {'lazy': True})):
+        results[name] = {'peak_bytes': peak_memory(lambda: ParseRASGeo(geo_filename, **kwargs))}
+        print('%-28s %10.1f MB' % (name, results[name]['peak_bytes'] / 1024.0 ** 2))
+
+    geo = ParseRASGeo(geo_filename)
+    cross_sections = geo.get_cross_sections()
+    middle = cross_sections[len(cross_sections) // 2]
+    river, reach, station = middle.river, middle.reach, middle.header.station.value
+    station_id = middle.header.station.id
+    # Queries are fast, so each is timed QUERIES times
+    record('query_exact', lambda: [geo.get_cross_sections(station_value=station, river=river, reach=reach)
+                                   for _ in range(QUERIES)])
+    record('query_range', lambda: [geo.get_cross_sections(station_value=(station - 1000, station + 1000))
+                                   for _ in range(QUERIES)])
+    record('query_station_id', lambda: [geo.get_cross_sections(station_id=station_id, river=river, reach=reach)
+                                        for _ in range(QUERIES)])
+    record('mutate_mannings_n', lambda: scale_mannings_n(geo, 1.0))
+
+    out_filename = os.path.join(out_dir, 'out.g01')
+    record('write_clean', lambda: ParseRASGeo(geo_filename).write(out_filename), megabytes)
+    record('write_changed', lambda: geo.write(out_filename), megabytes)
+
+    steady_filename = files['steady']
+    steady = SteadyFlow(steady_filename)
+    record('steady_parse', lambda: SteadyFlow(steady_filename))
+    record('steady_write', lambda: steady.export(os.path.join(out_dir, 'out.f01')))
+
+    unsteady_filename = files['unsteady']
+    unsteady = UnsteadyFlow(unsteady_filename)
+    record('unsteady_parse', lambda: UnsteadyFlow(unsteady_filename))
+    record('unsteady_parse_lazy', lambda: UnsteadyFlow(unsteady_filename, lazy=True))
+    record('unsteady_write', lambda: unsteady.export(os.path.join(out_dir, 'out.u01')))
+    return results
+
+
+def compare(results, old_results):
+    """
+    Prints the ratio of every result to the same result in old_results, higher is slower or larger
+    """
+    for name, values in sorted(results.items()):
+        old_values = old_results.get(name)
+        if old_values is None:
+            continue
+        for key in ('seconds', 'peak_bytes'):
+            if key in values and old_values.get(key):
+                ratio = values[key] / old_values[key]
+                flag = '  REGRESSION' if ratio > REGRESSION_RATIO else ''
+                print('%-28s %-10s %6.2fx%s' % (name, key, ratio, flag))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks parserasgeo on synthetic HEC-RAS files')
+    parser.add_argument('--out', help='write results to this JSON file')
+    parser.add_argument('--compare', help='JSON file from an earlier run to compare results with')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--reaches', type=int, default=4)
+    parser.add_argument('--cross-sections', type=int, default=250, help='cross sections per reach')
+    parser.add_argument('--points', type=int, default=60, help='station/elevation points per cross section')
+    parser.add_argument('--culvert-every', type=int, default=31, help='cross sections per culvert, 0 for none')
+    parser.add_argument('--profiles', type=int, default=3, help='steady flow profiles')
+    parser.add_argument('--hydrograph-length', type=int, default=1000, help='values per unsteady hydrograph')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    parameters = {'reaches': args.reaches, 'cross_sections': args.cross_sections, 'points': args.points,
+                  'culvert_every': args.culvert_every, 'profiles': args.profiles,
+                  'hydrograph_length': args.hydrograph_length, 'seed': args.seed, 'repeat': args.repeat}
+    out_dir = tempfile.mkdtemp(prefix='prg_benchmark_')
+    try:
+        files = generate.generate(out_dir, reaches=args.reaches, cross_sections=args.cross_sections,
+                                  points=args.points, culvert_every=args.culvert_every, profiles=args.profiles,
+                                  hydrograph_length=args.hydrograph_length, seed=args.seed)
+        results = run(files, args.repeat)
+    finally:
+        shutil.rmtree(out_dir)
+
+    meta = {'python': sys.version.split()[0], 'platform': platform.platform(), 'commit': git_commit(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'parameters': parameters}
+    if args.out is not None:
+        with open(args.out, 'wt') as outfile:
+            json.dump({'meta': meta, 'results': results}, outfile, indent=2, sort_keys=True)
+    if args.compare is not None:
+        with open(args.compare, 'rt') as infile:
+            old = json.load(infile)
+        if old['meta']['parameters'] != parameters:
+            print('Warning: %s was run with different parameters' % args.compare)
+        compare(results, old['results'])
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,8 @@
-from .prg import ParseRASGeo, CrossSectionNotFound
+from .prg import ParseRASGeo, CrossSectionNotFound, iter_features, transform
+from .cache import GeometryCache
+from .batch import load_many
+from .template import GeometryTemplate
+from .columnar import CrossSectionColumns
 from .prplan import ParseRASPlan
 from .prprj import ParseRASProject
 from .prflow import UnsteadyFlow, SteadyFlow
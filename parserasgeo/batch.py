@@ -0,0 +1,63 @@
+"""
+Imports many geometry files with a pool of worker processes
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .prg import ParseRASGeo
+
+
+def load_geometry(path, kwargs):
+    """
+    Imports one geometry file in a worker process
+    """
+    return ParseRASGeo(path, **kwargs)
+
+
+def load_many(paths, workers=None, progress=None, **kwargs):
+    """
+    Generator that imports the geometry files in paths with a pool of worker processes. Yields (path, result) in the
+    order the files finish, where result is a ParseRASGeo instance, or the exception raised while importing the file.
+    Scripts that use load_many() must guard their entry point with if __name__ == '__main__': on Windows.
+
+    :param paths: iterable of geometry file names
+    :param workers: number of worker processes, defaults to the number of CPUs. Files are imported in this process
+                    if workers is 1.
+    :param progress: optional callable that is passed (number of files done, number of files, path) after every file
+    :param kwargs: passed to ParseRASGeo, e.g. compact=True or cache='cache dir'
+    """
+    paths = list(paths)
+    total = len(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        for done, path in enumerate(paths, start=1):
+            try:
+                result = load_geometry(path, kwargs)
+            except Exception as error:
+                result = error
+            if progress is not None:
+                progress(done, total, path)
+            yield path, result
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    futures = {}
+    try:
+        for path in paths:
+            futures[executor.submit(load_geometry, path, kwargs)] = path
+        for done, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as error:
+                result = error
+            if progress is not None:
+                progress(done, total, path)
+            yield path, result
+    finally:
+        # Files that haven't started are not imported if the caller stops early
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,148 @@
+"""
+On-disk cache of imported geometry files, see ParseRASGeo(cache=...)
+
+Every cache file holds a small pickled header, which is used to validate the entry, followed by the pickled geo_list.
+Entries are validated by file size, modification time and a hash of the file contents, so a cached geometry is only
+used if the geometry file has not changed since it was imported.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+
+# Bump when the pickled layout of the features changes so entries written by an older version are ignored
+CACHE_VERSION = 3
+
+CACHE_SUFFIX = '.prgcache'
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.parserasgeo', 'cache')
+
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+
+def file_digest(filename):
+    """
+    Returns hex digest of the contents of filename
+    """
+    digest = hashlib.blake2b()
+    with open(filename, 'rb') as infile:
+        for chunk in iter(lambda: infile.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class GeometryCache(object):
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        :param cache_dir: directory for cache files, created if it doesn't exist. Defaults to ~/.parserasgeo/cache
+        :param max_bytes: total size of cache files, least recently used files are removed when it is exceeded
+        """
+        if cache_dir is None:
+            cache_dir = DEFAULT_CACHE_DIR
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _cache_filename(self, geo_filename, options):
+        key = repr((os.path.abspath(geo_filename), sorted(options.items()))).encode('utf-8')
+        return os.path.join(self.cache_dir, hashlib.blake2b(key, digest_size=16).hexdigest() + CACHE_SUFFIX)
+
+    @staticmethod
+    def file_header(geo_filename, options):
+        """
+        Returns the header that identifies geo_filename in its current state imported with options. Call this before
+        importing the geometry so changes made to the file while it is imported invalidate the entry.
+
+        :param geo_filename: name of geometry file
+        :param options: dict of the ParseRASGeo options the geometry is imported with
+        :return: dict
+        """
+        stat = os.stat(geo_filename)
+        return {'version': CACHE_VERSION, 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                'digest': file_digest(geo_filename), 'options': sorted(options.items())}
+
+    def load(self, geo_filename, options, header=None):
+        """
+        Returns the cached geo_list for geo_filename imported with options, or None if there is no valid entry
+
+        :param geo_filename: name of geometry file
+        :param options: dict of the ParseRASGeo options the geometry was imported with
+        :param header: result of file_header(), computed if None
+        :return: list or None
+        """
+        cache_filename = self._cache_filename(geo_filename, options)
+        if not os.path.isfile(cache_filename):
+            return None
+        if header is None:
+            header = self.file_header(geo_filename, options)
+        try:
+            with open(cache_filename, 'rb') as infile:
+                if pickle.load(infile) != header:
+                    return None
+                geo_list = pickle.load(infile)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, TypeError):
+            # Partial or out of date cache file
+            return None
+        # Mark as recently used for eviction
+        os.utime(cache_filename)
+        return geo_list
+
+    def store(self, geo_filename, options, geo_list, header=None):
+        """
+        Writes geo_list for geo_filename imported with options to the cache and removes least recently used entries
+        if the cache is larger than max_bytes.
+
+        :param geo_filename: name of geometry file
+        :param options: dict of the ParseRASGeo options the geometry was imported with
+        :param geo_list: list of features and unknown lines
+        :param header: result of file_header() from before the geometry was imported, computed if None
+        """
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        if header is None:
+            header = self.file_header(geo_filename, options)
+        cache_filename = self._cache_filename(geo_filename, options)
+        # Write to a temporary file first so a partial entry is never read
+        handle, temp_filename = tempfile.mkstemp(suffix='.tmp', dir=self.cache_dir)
+        try:
+            with os.fdopen(handle, 'wb') as outfile:
+                pickle.dump(header, outfile, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(geo_list, outfile, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_filename, cache_filename)
+        except BaseException:
+            os.remove(temp_filename)
+            raise
+        self.evict()
+
+    def evict(self):
+        """
+        Removes least recently used cache files until the cache is no larger than max_bytes
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        """
+        Removes all cache files
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(CACHE_SUFFIX):
+                os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,222 @@
+"""
+Model-wide arrays of cross section geometry, see ParseRASGeo.to_columnar()
+
+    columns = geo.to_columnar()
+    print(columns.elevations.min(), np.diff(columns.sta_elev_offsets).max())
+    columns.mann_n *= 1.1
+    columns.elevations[columns.value_rows(columns.sta_elev_offsets) == 10] -= 0.5
+    columns.write_back()
+
+Values of ragged data, e.g. the station/elevation points of every cross section, are stored in flat arrays, one after
+the other in the order of the cross sections, with an offsets array that holds the start of every cross section plus
+the end of the last one, the same way as CSR sparse matrices. The points of cross section i are
+stations[sta_elev_offsets[i]:sta_elev_offsets[i + 1]].
+"""
+from array import array
+from itertools import chain
+
+from .features.cross_section import StationElevationArray
+from .features.tools import fl_int, fl_int_list
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, to_columnar() requires it
+    np = None
+
+# Arrays with one value per cross section that are written back
+ROW_COLUMNS = ('lob_length', 'channel_length', 'rob_length', 'left_bank', 'right_bank')
+# Ragged arrays that are written back, and the offsets of each
+RAGGED_COLUMNS = (('sta_elev_offsets', ('stations', 'elevations')), ('mann_offsets', ('mann_stations', 'mann_n')))
+
+
+def _float(value):
+    return np.nan if value is None else value
+
+
+def _same(values, old_values):
+    """
+    Returns array of True where values equal old_values, NaN equals NaN
+    """
+    return (values == old_values) | (np.isnan(values) & np.isnan(old_values))
+
+
+class CrossSectionColumns(object):
+    """
+    Arrays of the geometry of many cross sections, row i is cross_sections[i]
+
+    Per cross section: river, reach and station_id (lists of str), station, lob_length, channel_length, rob_length,
+    left_bank and right_bank (float arrays, NaN if missing). Ragged: stations and elevations of the station/elevation
+    points with sta_elev_offsets, and mann_stations and mann_n of the Manning's n values with mann_offsets.
+
+    river, reach, station_id and station are not written back. Arrays may be changed in place or replaced, ragged
+    arrays may be replaced with a different number of values per cross section along with new offsets.
+    """
+    def __init__(self, cross_sections):
+        """
+        :param cross_sections: list of CrossSection
+        """
+        if np is None:
+            raise ImportError('CrossSectionColumns requires NumPy')
+        self.cross_sections = list(cross_sections)
+        self.river = [xs.river for xs in self.cross_sections]
+        self.reach = [xs.reach for xs in self.cross_sections]
+        self.station_id = [xs.header.station.id for xs in self.cross_sections]
+        self.station = np.array([_float(xs.header.station.value) for xs in self.cross_sections], dtype=float)
+
+        headers = [xs.header for xs in self.cross_sections]
+        self.lob_length = np.array([_float(header.lob_length) for header in headers], dtype=float)
+        self.channel_length = np.array([_float(header.channel_length) for header in headers], dtype=float)
+        self.rob_length = np.array([_float(header.rob_length) for header in headers], dtype=float)
+        banks = [xs.bank_sta for xs in self.cross_sections]
+        self.left_bank = np.array([_float(bank.left) for bank in banks], dtype=float)
+        self.right_bank = np.array([_float(bank.right) for bank in banks], dtype=float)
+
+        parts = [xs.sta_elev for xs in self.cross_sections]
+        counts = [len(part.stations) if isinstance(part, StationElevationArray) else len(part.points) for part in parts]
+        self.sta_elev_offsets = self._offsets(counts)
+        if parts and all(isinstance(part, StationElevationArray) for part in parts):
+            self.stations = np.concatenate([np.frombuffer(part.stations, dtype=float) for part in parts])
+            self.elevations = np.concatenate([np.frombuffer(part.elevations, dtype=float) for part in parts])
+        else:
+            points = np.fromiter(chain.from_iterable(chain.from_iterable(part.points for part in parts)), dtype=float,
+                                 count=2 * sum(counts)).reshape(-1, 2)
+            self.stations = points[:, 0].copy()
+            self.elevations = points[:, 1].copy()
+
+        mann = [value for xs in self.cross_sections for value in xs.mannings_n.values]
+        self.mann_offsets = self._offsets([len(xs.mannings_n.values) for xs in self.cross_sections])
+        mann = np.array(mann, dtype=float).reshape(-1, 3)
+        self.mann_stations = mann[:, 0].copy()
+        self.mann_n = mann[:, 1].copy()
+        self._mann_other = mann[:, 2].copy()  # third value of every n value, written back as it was
+        self._save()
+
+    @staticmethod
+    def _offsets(counts):
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return offsets
+
+    def _save(self):
+        """
+        Saves copies of the arrays that write_back() compares with
+        """
+        names = ROW_COLUMNS + tuple(name for offsets, columns in RAGGED_COLUMNS for name in (offsets,) + columns)
+        self._saved = {name: np.array(getattr(self, name), dtype=float) for name in names}
+
+    def __len__(self):
+        return len(self.cross_sections)
+
+    def value_rows(self, offsets):
+        """
+        Returns array of the row of every value of a ragged array, e.g. value_rows(sta_elev_offsets) for stations,
+        for grouping values by cross section, e.g. np.bincount(value_rows(offsets), values)
+
+        :param offsets: sta_elev_offsets or mann_offsets
+        """
+        offsets = np.asarray(offsets)
+        return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+    def _changed_ragged(self, offsets_name, names):
+        """
+        Returns set of rows whose values in the ragged arrays names differ from the saved values
+        """
+        offsets = np.asarray(getattr(self, offsets_name))
+        columns = [np.asarray(getattr(self, name), dtype=float) for name in names]
+        if len(offsets) != len(self) + 1:
+            raise ValueError('{} has {} values for {} cross sections'.format(offsets_name, len(offsets), len(self)))
+        for name, column in zip(names, columns):
+            if len(column) != offsets[-1]:
+                raise ValueError('{} has {} values, {} ends at {}'.format(name, len(column), offsets_name,
+                                                                         offsets[-1]))
+        old_offsets = self._saved[offsets_name]
+        if np.array_equal(offsets, old_offsets):
+            changed = np.zeros(len(columns[0]), dtype=bool)
+            for name, column in zip(names, columns):
+                changed |= ~_same(column, self._saved[name])
+            return set((np.searchsorted(offsets, np.flatnonzero(changed), side='right') - 1).tolist())
+        rows = set()
+        for row in range(len(self)):
+            start, end = offsets[row], offsets[row + 1]
+            old_start, old_end = int(old_offsets[row]), int(old_offsets[row + 1])
+            for name, column in zip(names, columns):
+                if end - start != old_end - old_start or not _same(column[start:end],
+                                                                   self._saved[name][old_start:old_end]).all():
+                    rows.add(row)
+                    break
+        return rows
+
+    def _changed_rows(self, name):
+        """
+        Returns list of rows whose value in array name differs from the saved value
+        """
+        column = np.asarray(getattr(self, name), dtype=float)
+        if len(column) != len(self):
+            raise ValueError('{} has {} values for {} cross sections'.format(name, len(column), len(self)))
+        return np.flatnonzero(~_same(column, self._saved[name])).tolist()
+
+    def changed(self):
+        """
+        Returns sorted list of rows that differ from the cross sections, i.e. that write_back() writes
+        """
+        rows = set()
+        for name in ROW_COLUMNS:
+            rows.update(self._changed_rows(name))
+        for offsets_name, names in RAGGED_COLUMNS:
+            rows.update(self._changed_ragged(offsets_name, names))
+        return sorted(rows)
+
+    def write_back(self):
+        """
+        Writes changed values to the cross sections. Only the parts of cross sections whose values changed are set,
+        so unchanged cross sections are still written as they were imported. Whole numbers are written as int, the
+        same as when they are imported. Manning's n values keep their third value unless their number changes.
+
+        :return: list of the changed CrossSection instances
+        """
+        rows = self.changed()
+        for name in ('lob_length', 'channel_length', 'rob_length'):
+            column = np.asarray(getattr(self, name), dtype=float)
+            for row in self._changed_rows(name):
+                setattr(self.cross_sections[row].header, name, column[row].item())
+        for name, attribute in (('left_bank', 'left'), ('right_bank', 'right')):
+            column = np.asarray(getattr(self, name), dtype=float)
+            for row in self._changed_rows(name):
+                value = column[row]
+                setattr(self.cross_sections[row].bank_sta, attribute, None if np.isnan(value) else fl_int(value))
+
+        offsets = np.asarray(self.sta_elev_offsets)
+        stations = np.asarray(self.stations, dtype=float)
+        elevations = np.asarray(self.elevations, dtype=float)
+        for row in sorted(self._changed_ragged('sta_elev_offsets', ('stations', 'elevations'))):
+            sta_elev = self.cross_sections[row].sta_elev
+            start, end = offsets[row], offsets[row + 1]
+            if isinstance(sta_elev, StationElevationArray):
+                sta_elev.stations = array('d', stations[start:end].tobytes())
+                sta_elev.elevations = array('d', elevations[start:end].tobytes())
+            else:
+                sta_elev.points = list(zip(fl_int_list(stations[start:end]), fl_int_list(elevations[start:end])))
+
+        offsets = np.asarray(self.mann_offsets)
+        old_offsets = self._saved['mann_offsets'].astype(np.int64)
+        mann_stations = np.asarray(self.mann_stations, dtype=float)
+        mann_n = np.asarray(self.mann_n, dtype=float)
+        if np.array_equal(offsets, old_offsets):
+            mann_other = self._mann_other
+        else:
+            # Third values are kept for cross sections with the same number of n values
+            mann_other = np.zeros(offsets[-1])
+            for row in range(len(self)):
+                start, end = offsets[row], offsets[row + 1]
+                old_start, old_end = old_offsets[row], old_offsets[row + 1]
+                if end - start == old_end - old_start:
+                    mann_other[start:end] = self._mann_other[old_start:old_end]
+        for row in sorted(self._changed_ragged('mann_offsets', ('mann_stations', 'mann_n'))):
+            start, end = offsets[row], offsets[row + 1]
+            self.cross_sections[row].mannings_n.values = list(zip(
+                fl_int_list(mann_stations[start:end]), fl_int_list(mann_n[start:end]),
+                fl_int_list(mann_other[start:end])))
+
+        self._mann_other = mann_other
+        self._save()
+        return [self.cross_sections[row] for row in rows]
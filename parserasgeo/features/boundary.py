@@ -1,29 +1,47 @@
+from array import array
+
 from .feature import Feature
 from .station import Station
-from .tools import pad_left, print_list_by_group, split_by_n
+from .tracked import key_changed, read_source_lines, read_source_text
+from .tools import decode_block, fl_int, pad_left, print_list_by_group, split_block
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, hydrographs are decoded and scaled one value at a time without it
+    np = None
+
+# Attributes that boundaries are looked up by, setting any of them marks the key owners of the object dirty, see
+# BoundaryIndex and add_key_owners()
+KEY_ATTRIBUTES = frozenset(('river_name', 'reach_name', 'station', 'type', 'header', 'hydrograph'))
+
+
+def _set_key(self, name, value):
+    """
+    __setattr__() of boundaries and parts with attributes in KEY_ATTRIBUTES
+    """
+    object.__setattr__(self, name, value)
+    if name in KEY_ATTRIBUTES:
+        key_changed(self)
 
 
 class Boundary(Feature):
     """
     Boundary condition.
     """
+    __setattr__ = _set_key
 
-    def __init__(self):
+    def __init__(self, source=None):
+        """
+        :param source: SourceFile of the file that is imported, to defer reading hydrograph ordinates, see
+                       Hydrograph
+        """
         # Load all boundary parts
         self.header = Header()
         self.interval = Interval()
-        self.hydrograph = Hydrograph()
+        self.hydrograph = Hydrograph(source)
         self.dss = DSS()
         self.fixed_start = FixedStart()
         self.critical = Critical()
-        self.parts = [
-            self.header,
-            self.interval,
-            self.hydrograph,
-            self.dss,
-            self.fixed_start,
-            self.critical,
-        ]
         self.uflow_list = []  # holds all parts and unknown lines (as strings)
 
     @staticmethod
@@ -31,21 +49,39 @@ class Boundary(Feature):
         return Header.test(line)
 
     def import_geo(self, line, infile):
+        parts = [
+            self.header,
+            self.interval,
+            self.hydrograph,
+            self.dss,
+            self.fixed_start,
+            self.critical,
+        ]
         while True:
-            part = next((p for p in self.parts if p.test(line)), None)
+            part = next((p for p in parts if p.test(line)), None)
             if part is not None:
                 line = part.import_geo(line, infile)
-                self.parts.remove(part)
+                parts.remove(part)
                 self.uflow_list.append(part)
             else:
                 break
         return line
 
+    def source_files(self):
+        return self.hydrograph.source_files()
+
+    def copy_sources(self, source_files):
+        self.hydrograph.copy_sources(source_files)
+
     def __str__(self):
         return "".join((str(l) for l in self.uflow_list))
 
 
 class Header(Feature):
+    __slots__ = ('river_name', 'reach_name', 'station', '_parts', '_key_owners')
+
+    __setattr__ = _set_key
+
     def __init__(self):
         self.river_name = None
         self.reach_name = None
@@ -70,6 +106,8 @@ class Header(Feature):
 
 
 class Interval(Feature):
+    __slots__ = ('interval',)
+
     def __init__(self):
         self.interval = None
 
@@ -86,34 +124,124 @@ class Interval(Feature):
 
 
 class Hydrograph(Feature):
-    def __init__(self):
+    """
+    Hydrograph ordinates are stored in an array of doubles, values may be set to any sequence of numbers, including a
+    NumPy array. Whole numbers are written without a decimal point, the same way as fl_int().
+    """
+    __slots__ = ('type', '_values', '_count', '_source', '_key_owners')
+
+    __setattr__ = _set_key
+
+    def __init__(self, source=None):
+        """
+        :param source: SourceFile of the file that is imported with a LineReader to defer reading the ordinates until
+                       values is first accessed, see UnsteadyFlow(lazy=True)
+        """
         self.type = None
-        self.values = []
+        self._values = array('d')
+        self._count = 0
+        self._source = source
+
+    @property
+    def values(self):
+        if self._values is None:
+            self._values = self._decode(list(read_source_lines(self._source)))
+            assert len(self._values) == self._count
+        return self._values
+
+    @values.setter
+    def values(self, values):
+        if np is not None and isinstance(values, np.ndarray):
+            self._values = array('d', values.astype(np.float64).tobytes())
+        else:
+            self._values = array('d', values)
 
     @staticmethod
     def test(line):
         return line.split("=")[0].endswith("Hydrograph")
 
+    @staticmethod
+    def _decode(lines):
+        if np is not None and lines:
+            return array('d', decode_block(lines, 8).tobytes())
+        return array('d', split_block(lines, 8))
+
     def import_geo(self, line, infile):
         parts = line.split(" Hydrograph=")
         self.type = parts[0]
         num_pts = int(parts[1])
+        if self._source is not None:
+            # Only the location of the ordinates is kept, they are copied as they are until values is accessed
+            start = infile.offset
+            infile.skip_values()
+            self._source = (self._source, start, infile.offset, infile.encoding)
+            self._values = None
+            self._count = num_pts
+            return infile.readline()
+        lines = []
         line = infile.readline()
         while (
             line[:1] == " " or line[:1].isdigit() or line[:1] == "-" or line[:1] == "."
         ):
-            vals = split_by_n(line, 8)
-            self.values.extend(vals)
+            lines.append(line)
             line = infile.readline()
-        assert len(self.values) == num_pts
+        self._values = self._decode(lines)
+        assert len(self._values) == num_pts
         return line
 
+    def source_files(self):
+        """
+        Returns the SourceFiles that ordinates that have not been read yet are in, see load_sources()
+        """
+        return (self._source[0],) if self._values is None and isinstance(self._source, tuple) else ()
+
+    def copy_sources(self, source_files):
+        """
+        Replaces the location of ordinates that have not been read yet with a copy of their text if it is in any of
+        source_files, see load_sources()
+        """
+        if self._values is None and isinstance(self._source, tuple) and self._source[0] in source_files:
+            self._source = read_source_text(self._source)
+
+    def scale(self, factor):
+        """
+        Multiplies every ordinate by factor
+        """
+        if np is not None:
+            np.frombuffer(self.values, dtype=np.float64)[:] *= factor
+        else:
+            self._values = array('d', [value * factor for value in self.values])
+
+    def shift(self, steps):
+        """
+        Shifts the ordinates later in time by steps intervals, or earlier if steps is negative. The number of
+        ordinates stays the same, ordinates shifted in at the start repeat the first ordinate and ordinates shifted in
+        at the end repeat the last ordinate.
+
+        :param steps: int, number of intervals
+        """
+        values = self.values
+        if not values or not steps:
+            return
+        steps = max(-len(values), min(steps, len(values)))
+        if steps > 0:
+            self._values = array('d', [values[0]]) * steps + values[:len(values) - steps]
+        else:
+            self._values = values[-steps:] + array('d', [values[-1]]) * -steps
+
     def __str__(self):
-        s = "Hydrograph=" + print_list_by_group(self.values, 8, 10)
-        return s
+        if self._values is None:
+            return "{} Hydrograph= {} \n".format(self.type, self._count) + read_source_text(self._source)
+        if np is not None:
+            values = np.frombuffer(self._values, dtype=np.float64)
+        else:
+            values = [fl_int(value) for value in self._values]
+        return "{} Hydrograph= {} \n".format(self.type, len(self._values)) + print_list_by_group(values, 8, 10)
 
 
 class DSS(Feature):
+    __slots__ = ('path', 'use_dss')
+
     def __init__(self):
         self.path = None
         self.use_dss = None
@@ -135,6 +263,8 @@ class DSS(Feature):
 
 
 class FixedStart(Feature):
+    __slots__ = ('use_fixed_start', 'datetime')
+
     def __init__(self):
         self.use_fixed_start = None
         self.datetime = None
@@ -158,6 +288,8 @@ class FixedStart(Feature):
 
 
 class Critical(Feature):
+    __slots__ = ('is_critical', 'flow')
+
     def __init__(self):
         self.is_critical = None
         self.flow = None
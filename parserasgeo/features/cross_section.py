@@ -1,11 +1,34 @@
-from .tools import fl_int, split_by_n_str, pad_left, print_list_by_group, split_block_obs, split_by_n
+from .tools import (
+    fl_int, split_by_n_str, pad_left, print_list_by_group, split_block_obs, split_by_n, split_block, decode_block
+)
 from .description import Description
 from .station import Station
+from .tracked import (
+    Tracked, TrackedList, add_key_owners, clone_value, read_source_lines, read_source_text, untracked
+)
+from array import array
+from bisect import bisect_left, bisect_right
+from hashlib import blake2b
 from math import sqrt, cos, radians
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, elevation_at() interpolates one station at a time without it
+    np = None
+
 # Global debug, this is set when initializing CrossSection
 DEBUG = False
 
+# Attributes of a deferred CrossSection that are not created until one of them is accessed
+DEFERRED_PARTS = ('cutline', 'description', 'sta_elev', 'iefa', 'mannings_n', 'obstruct', 'bank_sta', 'skew', 'levee',
+                  'rating_curve', 'geo_list')
+
+# Attributes of a cloned CrossSection that are shared with the original until they are accessed, see clone()
+SHARED_PARTS = ('header',) + DEFERRED_PARTS
+
+# Parts of a CrossSection with numbers that are saved by get_state()
+STATE_PARTS = ('header', 'sta_elev', 'iefa', 'mannings_n', 'obstruct', 'bank_sta', 'skew')
+
 class ChannelNError(Exception):
     """
     An error to raise if the user attempts to change channel n values without first defining the channel
@@ -31,10 +54,12 @@ class Feature(object):
     def __str__(self):
         pass
 
-class Levee(object):
+class Levee(Tracked):
     """
     Levees. This is poorly implemented and only grabs the line past the "=" as a string
     """
+    __slots__ = ('value', '_dirty')
+
     def __init__(self):
         self.value = None
 
@@ -51,11 +76,13 @@ class Levee(object):
     def __str__(self):
         return 'Levee=' + self.value  # + '\n' - not needed since it's just a dumb string (with the \n)
 
-class RatingCurve(object):
+class RatingCurve(Tracked):
     """
     Rating Curves. This is poorly implemented and only grabs the values on the first line and not the
     curve itself.
     """
+    __slots__ = ('value1', 'value2', '_dirty')
+
     def __init__(self):
         self.value1 = None
         self.value2 = None
@@ -76,10 +103,13 @@ class RatingCurve(object):
         return 'XS Rating Curve= ' + str(self.value1) + ' ,' + str(self.value2) + '\n'
 
 
-class Skew(object):
+class Skew(Tracked):
     """
     Cross section skew angle
     """
+    __slots__ = ('angle', '_dirty')
+    STATE_ATTRIBUTES = ('angle',)
+
     def __init__(self):
         self.angle = None
 
@@ -98,7 +128,10 @@ class Skew(object):
 
 
 # TODO: possibly move header into CrossSection
-class Header(object):
+class Header(Tracked):
+    __slots__ = ('station', 'node_type', 'lob_length', 'channel_length', 'rob_length', '_dirty', '_key_owners')
+    STATE_ATTRIBUTES = ('lob_length', 'channel_length', 'rob_length')
+
     def __init__(self):
         self.station = None
         self.node_type = None
@@ -149,7 +182,9 @@ class Header(object):
         return s
 
 
-class CutLine(object):
+class CutLine(Tracked):
+    __slots__ = ('number_pts', 'points', '_dirty')
+
     def __init__(self):
         self.number_pts = None
         self.points = []  # [(x1,y1),(x2,y2),(x3,y3),...] Values are currently stored as strings
@@ -184,11 +219,14 @@ class CutLine(object):
         return s
 
 
-class LastEdit(object):
+class LastEdit(Tracked):
     pass
 
 
-class StationElevation(object):
+class StationElevation(Tracked):
+    __slots__ = ('points', '_dirty')
+    STATE_ATTRIBUTES = ('points',)
+
     def __init__(self):
         self.points = []  # [(sta0, elev0), (sta1, elev1), ... ] Values stored as float/int
 
@@ -205,12 +243,19 @@ class StationElevation(object):
         :param sta: float, station of interest
         :return: double, elevation
         """
-        # TODO - implement more efficient search
+        # See StationElevationArray for a faster search
         for pt in self.points:
             if pt[0] == sta:
                 return pt[1]
         raise AttributeError('No station matching ' + str(sta) + ' in current XS.')
 
+    def elevation_at(self, sta):
+        """
+        Returns elevation at station sta, linearly interpolated between points. See interpolate().
+        :param sta: float, or list/numpy array of floats
+        :return: float, or list/numpy array of floats
+        """
+        return interpolate([pt[0] for pt in self.points], [pt[1] for pt in self.points], sta)
 
     def import_geo(self, line, geo_file):
         """
@@ -220,12 +265,13 @@ class StationElevation(object):
         :return: line in geo_file after sta/elev data
         """
         num_pts = int(line[10:])
+        lines = []
         line = next(geo_file)
         while line[:1] == ' ' or line[:1].isdigit() or line[:1] == '-' or line[:1] == '.':
-            vals = split_by_n(line, 8)
-            for i in range(0, len(vals), 2):
-                self.points.append((vals[i], vals[i + 1]))
+            lines.append(line)
             line = next(geo_file)
+        vals = split_block(lines, 8)
+        self.points = list(zip(vals[0::2], vals[1::2]))
         if DEBUG:
             print('len(self.points)=', len(self.points), 'num_pts=', num_pts)
         assert len(self.points) == num_pts
@@ -241,7 +287,134 @@ class StationElevation(object):
         return s
 
 
-class IEFA(object):
+class StationElevationArray(Tracked):
+    """
+    Compact version of StationElevation, see CrossSection(compact=True). Stations and elevations are stored in two
+    arrays of doubles instead of a list of tuples, and stations are found by bisection, so stations must be in
+    increasing order, as HEC-RAS requires. points is a tuple of tuples built from the arrays, so it can't be changed
+    in place; changes must be made to the arrays or by assigning new points. The arrays may be changed in place, they
+    are compared with a digest of the imported values to find out if they changed.
+    """
+    __slots__ = ('stations', 'elevations', '_dirty', '_source_digest')
+    STATE_ATTRIBUTES = ('stations', 'elevations')
+
+    test = staticmethod(StationElevation.test)
+
+    def __init__(self):
+        self.stations = array('d')
+        self.elevations = array('d')
+
+    @property
+    def points(self):
+        return tuple((fl_int(sta), fl_int(elev)) for sta, elev in zip(self.stations, self.elevations))
+
+    @points.setter
+    def points(self, points):
+        self.stations = array('d', [pt[0] for pt in points])
+        self.elevations = array('d', [pt[1] for pt in points])
+
+    def elevation(self, sta):
+        """
+        Returns elevation of point at station 'station'
+        Raises AttributeError if station is not found
+        :param sta: float, station of interest
+        :return: double, elevation
+        """
+        i = bisect_left(self.stations, sta)
+        if i < len(self.stations) and self.stations[i] == sta:
+            return fl_int(self.elevations[i])
+        raise AttributeError('No station matching ' + str(sta) + ' in current XS.')
+
+    def elevation_at(self, sta):
+        """
+        Returns elevation at station sta, linearly interpolated between points. See interpolate().
+        :param sta: float, or list/numpy array of floats
+        :return: float, or list/numpy array of floats
+        """
+        return interpolate(self.stations, self.elevations, sta)
+
+    def _digest(self):
+        return blake2b(self.stations, digest_size=16).digest(), blake2b(self.elevations, digest_size=16).digest()
+
+    def mark_clean(self, source=None):
+        Tracked.mark_clean(self, source)
+        object.__setattr__(self, '_source_digest', self._digest())
+
+    def is_dirty(self):
+        # Changing the arrays in place doesn't set _dirty
+        return getattr(self, '_dirty', True) or self._digest() != getattr(self, '_source_digest', None)
+
+    def import_geo(self, line, geo_file):
+        """
+        Import XS station/elevation points.
+        :param line: current line of geo_file
+        :param geo_file: geometry file object
+        :return: line in geo_file after sta/elev data
+        """
+        num_pts = int(line[10:])
+        lines = []
+        line = next(geo_file)
+        while line[:1] == ' ' or line[:1].isdigit() or line[:1] == '-' or line[:1] == '.':
+            lines.append(line)
+            line = next(geo_file)
+        if np is not None:
+            vals = decode_block(lines, 8)
+            self.stations = array('d', vals[0::2].tobytes())
+            self.elevations = array('d', vals[1::2].tobytes())
+        else:
+            vals = split_block(lines, 8)
+            self.stations = array('d', vals[0::2])
+            self.elevations = array('d', vals[1::2])
+        if DEBUG:
+            print('len(self.stations)=', len(self.stations), 'num_pts=', num_pts)
+        assert len(self.stations) == len(self.elevations) == num_pts
+        return line
+
+    def __str__(self):
+        s = '#Sta/Elev= ' + str(len(self.stations)) + ' \n'
+        if np is not None:
+            sta_elev = np.empty(2 * len(self.stations))
+            sta_elev[0::2] = self.stations
+            sta_elev[1::2] = self.elevations
+        else:
+            sta_elev = [fl_int(x) for pt in zip(self.stations, self.elevations) for x in pt]
+        # convert to padded columns of 8
+        s += print_list_by_group(sta_elev, 8, 10)
+        return s
+
+
+def interpolate(stations, elevations, sta):
+    """
+    Returns elevation at station sta, linearly interpolated between points. Stations outside of the cross section
+    get the elevation of the nearest end point. Stations must be in increasing order.
+
+    :param stations: sequence of stations
+    :param elevations: sequence of elevations, same length as stations
+    :param sta: float, or list/numpy array of floats
+    :return: float for a single station, numpy array for a numpy array, otherwise list of floats
+    """
+    if not len(stations):
+        raise AttributeError('Cross section has no station/elevation points.')
+    if np is not None and not isinstance(sta, (int, float)):
+        result = np.interp(sta, np.asarray(stations, dtype=float), np.asarray(elevations, dtype=float))
+        return result if isinstance(sta, np.ndarray) else result.tolist()
+    if not isinstance(sta, (int, float)):
+        return [interpolate(stations, elevations, x) for x in sta]
+
+    i = bisect_right(stations, sta)
+    if i == 0:
+        return float(elevations[0])
+    if i == len(stations):
+        return float(elevations[-1])
+    sta0, sta1 = stations[i - 1], stations[i]
+    elev0, elev1 = elevations[i - 1], elevations[i]
+    return float(elev0 + (elev1 - elev0) * (sta - sta0) / (sta1 - sta0))
+
+
+class IEFA(Tracked):
+    __slots__ = ('num_iefa', 'type', 'iefa_list', 'iefa_permanence', '_dirty')
+    STATE_ATTRIBUTES = ('num_iefa', 'type', 'iefa_list', 'iefa_permanence')
+
     def __init__(self):
         self.num_iefa = None
         self.type = None
@@ -300,7 +473,10 @@ class IEFA(object):
         return s
 
 
-class Obstruction(object):
+class Obstruction(Tracked):
+    __slots__ = ('num_blocked', 'blocked_type', 'blocked', '_dirty')
+    STATE_ATTRIBUTES = ('num_blocked', 'blocked_type', 'blocked')
+
     def __init__(self):
         self.num_blocked = None
         self.blocked_type = None
@@ -336,7 +512,65 @@ class Obstruction(object):
         return s
 
 
-class Mannings_n(object):
+def mannings_n_header(num_values, horizontal):
+    """
+    Returns the first line of a '#Mann=' block
+    """
+    return '#Mann= ' + str(num_values) + ' ,{:>2} , 0 \n'.format(horizontal)
+
+
+def format_mannings_n(values, horizontal):
+    """
+    Returns text of a '#Mann=' block, see Mannings_n
+    :param values: list of (station, n, 0) tuples
+    :param horizontal: 0 or -1
+    """
+    s = mannings_n_header(len(values), horizontal)
+    # n-values - unpack tuples
+    n_list = [x for tup in values for x in tup]
+    # convert to padded columns of 8
+    s += print_list_by_group(n_list, 8, 9)
+    return s
+
+
+def insert_breakpoints(values, stations):
+    """
+    Returns Manning's n values with a value at each station in stations. A missing station is inserted in order with
+    the n value to the left of it. Values must be sorted by station.
+    Raises IndexError if a station is left of all values
+    :param values: list of (station, n, 0) tuples
+    :param stations: stations in increasing order, e.g. the bank stations
+    :return: values, or a new list if any station was added
+    """
+    new_values = None
+    for sta in stations:
+        current = values if new_values is None else new_values
+        value_stations = [value[0] for value in current]
+        i = bisect_left(value_stations, sta)
+        if i < len(value_stations) and value_stations[i] == sta:
+            continue
+        if i == 0:
+            raise IndexError('No n value left of station ' + str(sta))
+        new_values = current[:i] + [(sta, current[i - 1][1], 0)] + current[i:]
+    return values if new_values is None else new_values
+
+
+def scale_n_values(values, banks, left, channel, right):
+    """
+    Returns Manning's n values with the n values left of the left bank station multiplied by left, from the left bank
+    station to the right bank station by channel, and from the right bank station on by right
+    :param values: list of (station, n, 0) tuples
+    :param banks: (left bank station, right bank station)
+    """
+    left_bank, right_bank = banks
+    return [(sta, n * (left if sta < left_bank else channel if sta < right_bank else right), other)
+            for sta, n, other in values]
+
+
+class Mannings_n(Tracked):
+    __slots__ = ('values', 'horizontal', '_dirty')
+    STATE_ATTRIBUTES = ('values', 'horizontal')
+
     def __init__(self):
         self.values = []  # [(sta1, n1, 0), (sta2, n2, 0), ...]
         self.horizontal = None  # 0 or -1
@@ -359,24 +593,19 @@ class Mannings_n(object):
         line = next(geo_file)
 
         # Make sure we're still reading n-values
+        lines = []
         while line[:1] == ' ' or line[:1].isdigit() or line[:1] == '-'or line[:1] == '.':
-            values = split_by_n(line, 8)
-            if len(values) % 3 != 0:
-                raise ValueError ('Error processing n-values: ' + line + '\n' + str(values))
-            for i in range(0, len(values), 3):
-                self.values.append((values[i], values[i + 1], values[i + 2]))
+            lines.append(line)
             line = next(geo_file)
+        values = split_block(lines, 8)
+        if len(values) % 3 != 0:
+            raise ValueError ('Error processing n-values: ' + ''.join(lines) + '\n' + str(values))
+        self.values = list(zip(values[0::3], values[1::3], values[2::3]))
         assert test_length == len(self.values)
         return line
 
     def __str__(self):
-        s = '#Mann= ' + str(len(self.values)) + ' ,{:>2} , 0 \n'.format(self.horizontal)
-        # n-values - unpack tuples
-        n_list = [x for tup in self.values for x in tup]
-        # convert to padded columns of 8
-        temp_str = print_list_by_group(n_list, 8, 9)
-        s += temp_str
-        return s
+        return format_mannings_n(self.values, self.horizontal)
 
     def check_for_duplicate_n_values(self):
         """
@@ -418,7 +647,10 @@ class Mannings_n(object):
             return None
 
 
-class BankStation(object):
+class BankStation(Tracked):
+    __slots__ = ('left', 'right', '_dirty')
+    STATE_ATTRIBUTES = ('left', 'right')
+
     def __init__(self):
         self.left = None
         self.right = None
@@ -441,7 +673,9 @@ class BankStation(object):
         return 'Bank Sta=' + str(self.left) + ',' + str(self.right) + '\n'
 
 # TODO: implement contraction/expansion
-class ExpansionContraction(object):
+class ExpansionContraction(Tracked):
+    __slots__ = ('exp_coeff', 'contract_coeff', '_dirty')
+
     def __init__(self):
         self.exp_coeff = None
         self.contract_coeff = None
@@ -459,21 +693,36 @@ class ExpansionContraction(object):
         pass
 
 
-class CrossSection(object):
-    def __init__(self, river, reach, debug=False):
+class CrossSection(Tracked):
+    def __init__(self, river, reach, debug=False, compact=False):
+        """
+        :param river: name of the river the cross section is on
+        :param reach: name of the reach the cross section is on
+        :param debug: prints debugging information if True
+        :param compact: stores station/elevation points in arrays if True, see StationElevationArray
+        """
         # Set global debug
         global DEBUG
         DEBUG = debug
 
         self.river = river
         self.reach = reach
+        self.compact = compact
 
         # Load all cross sections parts
         # TODO: Add "Node Name=" tag, see harvard gulch/dry gulch for example
-        self.cutline = CutLine()
         self.header = Header()
+        self._init_parts()
+
+        # used to define n-values in the channel only (i.e. between the bank stations)
+        # gets defined in define_channel_n
+        self.channel_n = None
+        self.is_interpolated = None
+        
+    def _init_parts(self):
+        self.cutline = CutLine()
         self.description = Description()
-        self.sta_elev = StationElevation()
+        self.sta_elev = StationElevationArray() if self.compact else StationElevation()
         self.iefa = IEFA()
         self.mannings_n = Mannings_n()
         self.obstruct = Obstruction()
@@ -481,23 +730,20 @@ class CrossSection(object):
         self.skew = Skew()
         self.levee = Levee()
         self.rating_curve = RatingCurve()
-        self.parts = [self.header, self.description, self.cutline, self.iefa, self.mannings_n, self.obstruct, self.bank_sta,
-                      self.sta_elev, self.skew, self.levee, self.rating_curve]
 
         self.geo_list = []  # holds all parts and unknown lines (as strings)
-        
-        # used to define n-values in the channel only (i.e. between the bank stations)
-        # gets defined in define_channel_n
-        self.channel_n = None
-        self.is_interpolated = None
-        
+
     def import_geo(self, line, geo_file):
+        # Parts that haven't been found yet, the header is already imported if the cross section was deferred
+        parts = [part for part in (self.header, self.description, self.cutline, self.iefa, self.mannings_n,
+                                   self.obstruct, self.bank_sta, self.sta_elev, self.skew, self.levee, self.rating_curve)
+                 if part not in self.geo_list]
         while line != '\n':
-            for part in self.parts:
+            for part in parts:
                 if part.test(line):
                     # print str(type(part))+' found!'
                     line = part.import_geo(line, geo_file)
-                    self.parts.remove(part)
+                    parts.remove(part)
                     self.geo_list.append(part)
                     break
             else:  # Unknown line, add as text
@@ -505,6 +751,148 @@ class CrossSection(object):
                 line = next(geo_file)
         return line
 
+    def defer_import(self, source):
+        """
+        Defers importing everything but the header. The rest of the cross section is imported from source the first
+        time any other part is accessed. Cross sections that are never accessed are written as a copy of the original
+        text following the header. The geometry file must not change while cross sections are deferred.
+
+        :param source: (SourceFile, start, end, encoding) - byte range of the cross section in the geometry file, or
+                       its text
+        """
+        if '_shared' in self.__dict__ and 'header' in self.__dict__['_shared']:
+            self._unshare('header')
+        for name in DEFERRED_PARTS:
+            self.__dict__.pop(name, None)
+        self.__dict__.pop('_shared', None)
+        self._deferred = source
+
+    def _import_deferred(self):
+        """
+        Imports the parts of a deferred cross section
+        """
+        lines = read_source_lines(self.__dict__.pop('_deferred'))
+        next(lines)  # Header is imported when the cross section is deferred
+        dirty, header_dirty = getattr(self, '_dirty', True), getattr(self.header, '_dirty', True)
+        with untracked():
+            self._init_parts()
+            self.geo_list.append(self.header)
+            self.import_geo(next(lines), lines)
+            # Importing is not a change, keep the flags from before it
+            self.mark_clean()
+        object.__setattr__(self, '_dirty', dirty)
+        object.__setattr__(self.header, '_dirty', header_dirty)
+
+    def clone(self, memo=None):
+        """
+        Returns a copy of the cross section that shares its parts with this cross section. Each part is copied the
+        first time it is accessed on either cross section, so parts that are only written, or not used at all, are
+        never copied.
+        """
+        shared = self.__dict__.get('_shared', {})
+        for name in SHARED_PARTS:
+            if name in self.__dict__:
+                shared[name] = self.__dict__.pop(name)
+        if shared:
+            self.__dict__['_shared'] = shared
+            if type(shared.get('geo_list')) is TrackedList:
+                # Neither cross section owns geo_list now, the first to copy a part copies it too
+                shared['geo_list'].owner = None
+        copy = object.__new__(CrossSection)
+        for name, value in self.__dict__.items():
+            if name == '_shared':
+                copy.__dict__[name] = dict(value)
+            elif name != '_key_owners':
+                copy.__dict__[name] = clone_value(value, copy, {} if memo is None else memo)
+        return copy
+
+    def _unshare(self, name):
+        """
+        Replaces shared part name with a copy, see clone(). geo_list stays shared until all parts have been copied, so
+        accessing geo_list copies all parts.
+        """
+        shared = self.__dict__['_shared']
+        geo_list = shared.get('geo_list')
+        if geo_list is not None and not (type(geo_list) is TrackedList and geo_list.owner is self):
+            geo_list = shared['geo_list'] = TrackedList(geo_list, self)
+        names = [part_name for part_name in shared if part_name != 'geo_list'] if name == 'geo_list' else [name]
+        for part_name in names:
+            part = shared.pop(part_name)
+            copy = part.clone()
+            # Indexes that hold the shared part, e.g. a header, hold the copy too
+            add_key_owners(copy, getattr(part, '_key_owners', ()))
+            self.__dict__[part_name] = copy
+            if geo_list is not None:
+                for i, item in enumerate(geo_list):
+                    if item is part:
+                        list.__setitem__(geo_list, i, copy)
+                        break
+        if geo_list is not None and len(shared) == 1:
+            # All parts are copied
+            self.__dict__['geo_list'] = shared.pop('geo_list')
+        if not shared:
+            del self.__dict__['_shared']
+
+    def get_state(self):
+        """
+        Returns the numbers of the cross section and its parts, see STATE_PARTS and Tracked.get_state(). Parts of a
+        deferred cross section are not imported, and parts shared with a clone are not copied.
+        """
+        deferred = self.__dict__.get('_deferred')
+        names = ('header',) if deferred is not None else STATE_PARTS
+        channel_n = None if self.channel_n is None else tuple(self.channel_n)
+        return (getattr(self, '_dirty', True), deferred, channel_n,
+                tuple((name, self._peek(name).get_state()) for name in names))
+
+    def set_state(self, state):
+        """
+        Resets the cross section to state from get_state(). A cross section that was deferred when the state was
+        saved is deferred again, so its parts are imported from the geometry file the next time they are accessed.
+        """
+        dirty, deferred, channel_n, part_states = state
+        if deferred is not None and self.__dict__.get('_deferred') != deferred:
+            self.defer_import(deferred)
+        for name, part_state in part_states:
+            # Copies a shared part before changing it
+            getattr(self, name).set_state(part_state)
+        object.__setattr__(self, 'channel_n', None if channel_n is None else list(channel_n))
+        object.__setattr__(self, '_dirty', dirty)
+
+    def _peek(self, name):
+        """
+        Returns part name without copying it if it is shared, for reading only
+        """
+        if name in self.__dict__:
+            return self.__dict__[name]
+        return self.__dict__['_shared'][name]
+
+    def _tracked_parts(self):
+        if '_deferred' in self.__dict__:
+            return (self._peek('header'),)
+        return self._peek('geo_list')
+
+    def source_files(self):
+        deferred = self.__dict__.get('_deferred')
+        if isinstance(deferred, tuple):
+            return Tracked.source_files(self) + (deferred[0],)
+        return Tracked.source_files(self)
+
+    def copy_sources(self, source_files):
+        deferred = self.__dict__.get('_deferred')
+        if isinstance(deferred, tuple) and deferred[0] in source_files:
+            self.__dict__['_deferred'] = read_source_text(deferred)
+        Tracked.copy_sources(self, source_files)
+
+    def __getattr__(self, name):
+        # Only called when normal lookup fails, i.e. for the parts of a deferred or cloned cross section
+        if name in self.__dict__.get('_shared', ()):
+            self._unshare(name)
+            return getattr(self, name)
+        if name in DEFERRED_PARTS and '_deferred' in self.__dict__:
+            self._import_deferred()
+            return getattr(self, name)
+        raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+
     def cut_line_ratio(self):
         """
         Returns ratio of xs geometry length to cutline length.
@@ -514,7 +902,7 @@ class CrossSection(object):
         if self.cutline.points == []:
             raise AttributeError('Cross section does not have a defined cutline')
 
-        if self.sta_elev.points == []:
+        if not self.sta_elev.points:
             raise AttributeError('Cross section does not have a geometry')
 
         length = self.sta_elev.points[-1][0] - self.sta_elev.points[0][0]
@@ -538,20 +926,14 @@ class CrossSection(object):
         
         :returns: None
         """
-        manning_stations = [x[0] for x in self.mannings_n.values]
-        
-        for bank in [self.bank_sta.left, self.bank_sta.right]:
-            # if the bank station is not in the list, grab the Manning's n to the left
-            if bank not in manning_stations:
-                leftward_manning_all = [x[1] for x in self.mannings_n.values if x[0] < bank]
-                leftward_index = len(leftward_manning_all)
-                leftward_manning_nearest = leftward_manning_all[-1]
-                manning_insert = (bank, leftward_manning_nearest, 0)
-                self.mannings_n.values.insert(leftward_index, manning_insert)
-        
+        banks = (self.bank_sta.left, self.bank_sta.right)
+        values = insert_breakpoints(self.mannings_n.values, banks)
+        if len(values) != len(self.mannings_n.values):
+            self.mannings_n.values = values
+
         # do not pull the n-value at the right bank because that defines the n-values to the right of the bank
-        self.channel_n = [x for x in self.mannings_n.values if (x[0] >= self.bank_sta.left and x[0] <self.bank_sta.right)]        
-            
+        self.channel_n = [x for x in values if banks[0] <= x[0] < banks[1]]
+
     def alter_channel_n(self, scalar):
         """
         Alters the channel n-values by a scaling factor
@@ -562,19 +944,14 @@ class CrossSection(object):
         """
         
         if self.channel_n is not None:
-            new_channel_n = []
-            for n in self.channel_n:
-                temp_n = n[1]*scalar
-                temp_tuple = (n[0], temp_n, 0)
-                new_channel_n.append(temp_tuple)
-            
-            for ind, old_n in enumerate(self.mannings_n.values):
-                for new_n in new_channel_n:
-                    if old_n[0] == new_n[0]:
-                        self.mannings_n.values.pop(ind)
-                        self.mannings_n.values.insert(ind, new_n)
-                        break
-                
+            new_channel_n = [(n[0], n[1]*scalar, 0) for n in self.channel_n]
+            # The first new value at a station replaces every old value at that station
+            new_by_station = {}
+            for new_n in new_channel_n:
+                new_by_station.setdefault(new_n[0], new_n)
+            values = self.mannings_n.values
+            if any(old_n[0] in new_by_station for old_n in values):
+                self.mannings_n.values = [new_by_station.get(old_n[0], old_n) for old_n in values]
             self.channel_n = new_channel_n
         else:
             raise ChannelNError('The channel is undefined. Run define_channel_n before using alter_channel_n')
@@ -590,20 +967,45 @@ class CrossSection(object):
         if self.channel_n is None:
             raise ChannelNError('The channel is undefined. Run define_channel_n before using alter_overbank_n')
         
-        channel_n_stations = [x[0] for x in self.channel_n]
-        for ind, old_n in enumerate(self.mannings_n.values):
-            if old_n[0] in channel_n_stations:
-                pass
-            else:
-                temp_n = old_n[1]*scalar
-                temp_tuple = (old_n[0], temp_n, 0)
-                self.mannings_n.values.pop(ind)
-                self.mannings_n.values.insert(ind, temp_tuple)
+        channel_n_stations = set(x[0] for x in self.channel_n)
+        values = self.mannings_n.values
+        if any(old_n[0] not in channel_n_stations for old_n in values):
+            self.mannings_n.values = [old_n if old_n[0] in channel_n_stations else (old_n[0], old_n[1]*scalar, 0)
+                                      for old_n in values]
+
+    def scale_mannings_n(self, left=1.0, channel=1.0, right=1.0):
+        """
+        Multiplies the n values of the left overbank, channel and right overbank by left, channel and right. n values
+        are added at the bank stations first if they are missing, see define_channel_n(). The channel is from the left
+        bank station up to, but not including, the right bank station. See ParseRASGeo.scale_mannings_n() to scale
+        many cross sections at once.
+        """
+        self.mannings_n.values = self.scaled_mannings_n(left, channel, right)
+
+    def scaled_mannings_n(self, left=1.0, channel=1.0, right=1.0):
+        """
+        Returns the n values scale_mannings_n() would set, without changing the cross section
+        Raises ChannelNError if there are no bank stations or a bank station is left of the first n value
+        """
+        banks = (self.bank_sta.left, self.bank_sta.right)
+        if banks[0] is None or banks[1] is None:
+            raise ChannelNError('Cross section {} has no bank stations'.format(self.header.station.id))
+        try:
+            values = insert_breakpoints(self.mannings_n.values, banks)
+        except IndexError as error:
+            raise ChannelNError('Cross section {}: {}'.format(self.header.station.id, error))
+        return scale_n_values(values, banks, left, channel, right)
 
     def __str__(self):
-        s = ''
-        for line in self.geo_list:
-            s += str(line)
+        source = self.source_text()
+        if source is not None:
+            return source
+        if '_deferred' in self.__dict__:
+            # Only the header has changed, copy the original text after it
+            lines = read_source_lines(self._deferred)
+            next(lines)
+            return str(self.header) + ''.join(lines)
+        s = ''.join(map(str, self._peek('geo_list')))
         return s + '\n'
 
     @staticmethod
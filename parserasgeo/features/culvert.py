@@ -1,6 +1,7 @@
 from __future__ import print_function
-from .tools import fl_int, split_by_n, print_list_by_group#  , split_by_n_str, pad_left, print_list_by_group, split_block_obs, split_by_n
+from .tools import fl_int, split_by_n, split_block, print_list_by_group#  , split_by_n_str, pad_left, print_list_by_group, split_block_obs, split_by_n
 from .description import Description
+from .tracked import Tracked
 from collections import namedtuple
 from math import ceil
 
@@ -8,6 +9,9 @@ import sys
 
 DEBUG = False
 
+# a named tuple subclass for station distances. Defined at module level so culverts can be pickled
+DistanceTuple = namedtuple('DistanceTuple', ['upstream', 'downstream'])
+
 class Feature(object):
     """
     This is a template for other features.
@@ -29,7 +33,9 @@ class Feature(object):
 
 
 # TODO: possibly move header into Culvert
-class Header(object):
+class Header(Tracked):
+    __slots__ = ('station', 'node_type', 'value1', 'value2', 'value3', '_dirty', '_key_owners')
+
     def __init__(self):
         self.station = None
         self.node_type = None
@@ -69,10 +75,13 @@ class Header(object):
                                                                                                     # header if figured out
         return s
 
-class Deck(object):
+class Deck(Tracked):
     """
     Culvert bridge deck and other coefficients
     """
+    __slots__ = ('deck_dist', 'width', 'weir_coef', 'skew', 'num_up', 'num_dn', 'other_coef', 'us_sta', 'us_elev',
+                 'us_low_chord', 'ds_sta', 'ds_elev', 'ds_low_chord', '_dirty')
+
     def __init__(self):
         """ Variable names are based off headers in geo file """
         self.deck_dist = None
@@ -147,11 +156,8 @@ class Deck(object):
         :param rows: number of rows to read and parse
         :returns: list of float/ints
         """
-        temp = []
-        for _ in range(rows):
-            line = next(geo_file)
-            temp += split_by_n(line, 8)
-        return temp
+        lines = [next(geo_file) for _ in range(rows)]
+        return split_block(lines, 8)
 
     ### TODO: read and store low chords as something useful
     @staticmethod
@@ -189,10 +195,15 @@ class Deck(object):
         return s
 
 
-class CulvertGroup(object):
+class CulvertGroup(Tracked):
     """
     A group of culverts (either single or multiple)
     """
+    __slots__ = ('shape', 'height', 'width', 'length', 'manning_top', 'enter_loss_coef', 'exit_loss_coef', 'chart_num',
+                 'scale_num', 'up_invert_elev', 'down_invert_elev', 'num_identical_barrels', 'culvert_name',
+                 'solution_criteria', 'up_xs_dist', 'station_distances', 'barrel_names', 'manning_bot',
+                 'depth_manning_bot', 'depth_blocked', 'entrance_loss', '_dirty')
+
     def __init__(self):
         self.shape = None
         self.height = None  # or size diameter
@@ -227,9 +238,6 @@ class CulvertGroup(object):
         return False
 
     def import_geo(self, line, geo_file):
-        # a named tuple subclass for station distances
-        DistanceTuple = namedtuple('DistanceTuple', ['upstream', 'downstream'])
-
         equals_ind = line.index('=')
         line = line[equals_ind+1:]
         values = line.split(',')
@@ -422,7 +430,7 @@ class CulvertGroup(object):
 
         return s
 
-class Culvert(object):
+class Culvert(Tracked):
     def __init__(self, river, reach, debug=False):
         global DEBUG
         DEBUG = debug
@@ -434,25 +442,21 @@ class Culvert(object):
         self.description = Description()
         self.deck = Deck()
         self.culvert_groups = list()
-        temp_culvert_group = CulvertGroup()
-
-        self.parts = [self.header, self.description, temp_culvert_group,
-                      self.deck]
-
         self.geo_list = []  # holds all parts and unknown lines (as strings)
 
     def import_geo(self, line, geo_file):
+        parts = [self.header, self.description, CulvertGroup(), self.deck]
         while line != '\n':
-            for part in self.parts:
+            for part in parts:
                 if part.test(line):
                     #print str(type(part))+' found!'
                     line = part.import_geo(line, geo_file)
-                    self.parts.remove(part)
+                    parts.remove(part)
                     self.geo_list.append(part)
 
                     if 'CulvertGroup' in str(type(part)):
                         self.culvert_groups.append(part)
-                        self.parts.append(CulvertGroup())
+                        parts.append(CulvertGroup())
 
                     break
 
@@ -463,9 +467,10 @@ class Culvert(object):
         return line
 
     def __str__(self):
-        s = ''
-        for line in self.geo_list:
-            s += str(line)
+        source = self.source_text()
+        if source is not None:
+            return source
+        s = ''.join(map(str, self.geo_list))
         return s + '\n'
 
     @staticmethod
@@ -1,10 +1,13 @@
 #from tools import fl_int #  , split_by_n_str, pad_left, print_list_by_group, split_block_obs, split_by_n
+from .tracked import Tracked
 
 
-class Description(object):
+class Description(Tracked):
     """
     This is a template for other features.
     """
+    __slots__ = ('text', '_dirty')
+
     def __init__(self):
         self.text = []
         pass
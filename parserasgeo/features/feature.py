@@ -3,6 +3,7 @@ from abc import ABC, abstractmethod
 
 class Feature(ABC):
     """Features implement this class"""
+    __slots__ = ()
 
     @staticmethod
     @abstractmethod
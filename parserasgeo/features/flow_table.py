@@ -0,0 +1,316 @@
+"""
+Flows of every profile at every flow change location of a steady flow file, see SteadyFlow
+"""
+from array import array
+from numbers import Number
+
+from .station import Station
+from .tools import fl_int, print_list_by_group, split_block, split_by_n_str
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, FlowTable.to_array() requires it
+    np = None
+
+
+class FlowLocation(object):
+    """
+    Flow change location, a 'River Rch & RM=' line followed by one flow for every profile
+    """
+    __slots__ = ('river', 'reach', 'station', 'flows', '_header', '_source_key', '_source', '_source_flows')
+
+    def __init__(self):
+        self.river = None
+        self.reach = None
+        self.station = None
+        self.flows = array('d')  # one flow for each profile
+        self._header = None
+        self._source_key = None  # (river, reach, station) as imported
+        self._source = None  # text of the flows as imported
+        self._source_flows = None
+
+    @staticmethod
+    def test(line):
+        return line.startswith("River Rch & RM=")
+
+    def import_geo(self, line, infile):
+        self._header = line
+        fields = line.split("=", 1)[1].split(",")
+        self.river = fields[0].strip()
+        self.reach = fields[1].strip()
+        self.station = Station(fields[2].rstrip("\n")) if len(fields) > 2 else Station("")
+        self._source_key = (self.river, self.reach, self.station)
+        lines = []
+        line = infile.readline()
+        while line[:1] == " " or line[:1].isdigit() or line[:1] == "-" or line[:1] == ".":
+            lines.append(line)
+            line = infile.readline()
+        self.flows = array('d', split_block(lines, 8))
+        self._source = "".join(lines)
+        self._source_flows = self.flows[:]
+        return line
+
+    def header(self):
+        """
+        Returns the 'River Rch & RM=' line, as imported unless river, reach or station changed. Changed names are
+        padded to the width of the imported ones.
+        """
+        if self._header is not None and (self.river, self.reach, self.station) == self._source_key:
+            return self._header
+        fields = self._header.split("=", 1)[1].rstrip("\n").split(",") if self._header is not None else []
+        fields += [""] * (3 - len(fields))
+        values = [self.river, self.reach, "" if self.station is None else str(self.station)]
+        for i, (old, value) in enumerate(zip(fields, values)):
+            fields[i] = value.ljust(len(old)) if old.endswith(" ") else value
+        return "River Rch & RM=" + ",".join(fields) + "\n"
+
+    def __str__(self):
+        if self._source is not None and self.flows == self._source_flows:
+            return self.header() + self._source
+        return self.header() + print_list_by_group(self._flow_fields(), 8, 10)
+
+    def _flow_fields(self):
+        """
+        Returns flows to write, flows that did not change keep the text they were imported with
+        """
+        values = [fl_int(flow) for flow in self.flows]
+        if self._source is None:
+            return values
+        fields = [field.strip() for line in self._source.splitlines(True) for field in split_by_n_str(line, 8)]
+        if len(fields) != len(self._source_flows):
+            return values
+        for i, (flow, source_flow) in enumerate(zip(self.flows, self._source_flows)):
+            if flow == source_flow:
+                values[i] = fields[i]
+        return values
+
+
+class FlowTable(object):
+    """
+    Flows of every profile at every flow change location. Profiles are selected by index or name, locations by index
+    or by (river, reach, station), where station is the station text or a number. Flows of each location are an array
+    of doubles, one per profile, that may also be changed in place. get_flows() returns whole numbers as int, the same
+    as fl_int().
+    """
+    def __init__(self):
+        self.profile_names = []
+        self.locations = []  # FlowLocation in file order
+
+    def __len__(self):
+        return len(self.locations)
+
+    def profile_index(self, profile):
+        """
+        Returns index of profile, an index or a profile name
+        Raises ValueError if the profile is not found
+        """
+        if isinstance(profile, int):
+            if not -len(self.profile_names) <= profile < len(self.profile_names):
+                raise ValueError('No profile ' + str(profile))
+            return profile % len(self.profile_names)
+        try:
+            return self.profile_names.index(profile)
+        except ValueError:
+            raise ValueError('No profile named ' + str(profile))
+
+    def location_index(self, location):
+        """
+        Returns index of location, an index or (river, reach, station)
+        Raises ValueError if the location is not found
+        """
+        if isinstance(location, int):
+            if not -len(self.locations) <= location < len(self.locations):
+                raise ValueError('No flow location ' + str(location))
+            return location % len(self.locations)
+        river, reach, station = location
+        for i, loc in enumerate(self.locations):
+            if loc.river == river and loc.reach == reach and (
+                    loc.station.id == station or (isinstance(station, Number) and loc.station.value == station)):
+                return i
+        raise ValueError('No flow location ' + str(location))
+
+    def get_flows(self, profile=None, location=None):
+        """
+        Returns the flow of profile at location, the flows of every profile at location, the flows of profile at
+        every location, or a list of the flows of every location if neither is given
+
+        :param profile: optional index or name of profile
+        :param location: optional index or (river, reach, station) of location
+        """
+        if location is not None:
+            flows = self.locations[self.location_index(location)].flows
+            return [fl_int(flow) for flow in flows] if profile is None else fl_int(flows[self.profile_index(profile)])
+        if profile is not None:
+            i = self.profile_index(profile)
+            return [fl_int(loc.flows[i]) for loc in self.locations]
+        return [[fl_int(flow) for flow in loc.flows] for loc in self.locations]
+
+    def set_flows(self, values, profile=None, location=None):
+        """
+        Sets flows of profile at location. A number sets every selected flow, otherwise values has one flow for every
+        profile at location, one flow for every location of profile, or if neither is given a row of flows for every
+        location, e.g. a 2D NumPy array.
+
+        :param values: number, sequence or sequence of rows
+        :param profile: optional index or name of profile
+        :param location: optional index or (river, reach, station) of location
+        """
+        locations = self.locations if location is None else [self.locations[self.location_index(location)]]
+        num_profiles = len(self.profile_names)
+        if profile is not None:
+            i = self.profile_index(profile)
+            if isinstance(values, Number):
+                values = [values] * len(locations)
+            values = self._check_length(values, len(locations), 'locations')
+            for loc, value in zip(locations, values):
+                loc.flows[i] = value
+            return
+        if isinstance(values, Number):
+            for loc in locations:
+                loc.flows = array('d', [values]) * num_profiles
+            return
+        rows = [values] if location is not None else self._check_length(values, len(locations), 'locations')
+        rows = [self._check_length(row, num_profiles, 'profiles') for row in rows]
+        for loc, row in zip(locations, rows):
+            loc.flows = array('d', row)
+
+    @staticmethod
+    def _check_length(values, length, name):
+        values = values.tolist() if np is not None and isinstance(values, np.ndarray) else list(values)
+        if len(values) != length:
+            raise ValueError('{} values given for {} {}'.format(len(values), length, name))
+        return values
+
+    def add_profile(self, name, flows):
+        """
+        Adds a profile after the last profile
+
+        :param name: profile name
+        :param flows: number, or sequence of one flow for every location
+        """
+        if isinstance(flows, Number):
+            flows = [flows] * len(self.locations)
+        flows = self._check_length(flows, len(self.locations), 'locations')
+        self.profile_names.append(name)
+        for loc, flow in zip(self.locations, flows):
+            loc.flows.append(flow)
+
+    def set_profiles(self, names, values):
+        """
+        Replaces every profile, e.g. with the profiles of a rating curve sweep
+
+        :param names: profile names
+        :param values: number, or row of one flow for every profile for each location, e.g. a 2D NumPy array
+        """
+        names = list(names)
+        if isinstance(values, Number):
+            rows = [[values] * len(names)] * len(self.locations)
+        else:
+            rows = [self._check_length(row, len(names), 'profiles')
+                    for row in self._check_length(values, len(self.locations), 'locations')]
+        self.profile_names[:] = names
+        for loc, row in zip(self.locations, rows):
+            loc.flows = array('d', row)
+
+    def to_array(self):
+        """
+        Returns 2D NumPy array of flows with a row for every location and a column for every profile. Requires NumPy.
+        """
+        if np is None:
+            raise ImportError('FlowTable.to_array() requires NumPy')
+        flows = np.empty((len(self.locations), len(self.profile_names)))
+        for i, loc in enumerate(self.locations):
+            flows[i] = np.frombuffer(loc.flows, dtype=np.float64)
+        return flows
+
+
+class InternalChanges(object):
+    """
+    'Set Internal Change=' lines of a steady flow file in file order. Consecutive lines are a run, every run is written
+    by an InternalChangeRun in the place it was imported.
+    """
+    __slots__ = ('lines', 'stations', 'runs', 'num_runs')
+
+    def __init__(self):
+        self.lines = []
+        self.stations = []  # station of every line, -1 if it is not a number
+        self.runs = []  # run of every line
+        self.num_runs = 0
+
+    @staticmethod
+    def test(line):
+        return line.startswith("Set Internal Change=")
+
+    @staticmethod
+    def station(line):
+        try:
+            return float(line.strip().split(',')[2])
+        except (ValueError, IndexError):
+            return -1
+
+    def new_run(self):
+        """
+        Returns InternalChangeRun that writes the lines appended after it
+        """
+        self.num_runs += 1
+        return InternalChangeRun(self, self.num_runs - 1)
+
+    def append(self, line):
+        self.lines.append(line)
+        self.stations.append(self.station(line))
+        self.runs.append(self.num_runs - 1)
+
+    def add(self, lines):
+        """
+        Adds lines, each before the first line with a lower station, or after the last line if there is none, the same
+        as adding them one at a time in the order given. A line is added to the run of the line it is before. Lines are
+        merged in one pass if the stations are in decreasing order, as RAS writes them.
+
+        :param lines: 'Set Internal Change=' lines
+        """
+        new = [(self.station(line), line) for line in lines]
+        stations = self.stations
+        runs = self.runs
+        last_run = runs[-1] if runs else max(self.num_runs - 1, 0)
+        if any(stations[i] < stations[i + 1] for i in range(len(stations) - 1)):
+            for station, line in new:
+                i = next((i for i, existing in enumerate(stations) if station > existing), len(stations))
+                self.lines.insert(i, line)
+                stations.insert(i, station)
+                runs.insert(i, runs[i] if i < len(runs) else last_run)
+            return
+        # Sorting is stable, lines at the same station stay in the order given, after existing lines
+        new.sort(key=lambda pair: -pair[0])
+        merged_lines = []
+        merged_stations = []
+        merged_runs = []
+        i = 0
+        for station, line in new:
+            while i < len(stations) and not station > stations[i]:
+                merged_lines.append(self.lines[i])
+                merged_stations.append(stations[i])
+                merged_runs.append(runs[i])
+                i += 1
+            merged_lines.append(line)
+            merged_stations.append(station)
+            merged_runs.append(runs[i] if i < len(runs) else last_run)
+        self.lines = merged_lines + self.lines[i:]
+        self.stations = merged_stations + stations[i:]
+        self.runs = merged_runs + runs[i:]
+
+    def __str__(self):
+        return "".join(self.lines)
+
+
+class InternalChangeRun(object):
+    """
+    Consecutive 'Set Internal Change=' lines of InternalChanges, an item of SteadyFlow.flow_list
+    """
+    __slots__ = ('changes', 'run')
+
+    def __init__(self, changes, run):
+        self.changes = changes
+        self.run = run
+
+    def __str__(self):
+        return "".join([line for line, run in zip(self.changes.lines, self.changes.runs) if run == self.run])
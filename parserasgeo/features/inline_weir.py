@@ -1,9 +1,10 @@
 from .description import Description
 from .feature import Feature
 from .station import Station
+from .tracked import Tracked
 
 
-class Header(Feature):
+class Header(Tracked, Feature):
     def __init__(self):
         self.station = None
         self.node_type = None
@@ -29,21 +30,21 @@ class Header(Feature):
         return s
 
 
-class InlineWeir(Feature):
+class InlineWeir(Tracked, Feature):
     def __init__(self, river, reach):
         self.river = river
         self.reach = reach
         self.header = Header()
         self.description = Description()
-        self._parts = [self.header, self.description]
         self.geo_list = []
 
     def import_geo(self, line, geo_file):
+        parts = [self.header, self.description]
         while line != "\n":
-            for part in self._parts:
+            for part in parts:
                 if part.test(line):
                     line = part.import_geo(line, geo_file)
-                    self._parts.remove(part)
+                    parts.remove(part)
                     self.geo_list.append(part)
                     break
             else:
@@ -52,6 +53,9 @@ class InlineWeir(Feature):
         return line
 
     def __str__(self):
+        source = self.source_text()
+        if source is not None:
+            return source
         s = "".join(map(str, self.geo_list))
         return s + "\n"
 
@@ -1,5 +1,6 @@
 from .tools import fl_int #  , split_by_n_str, pad_left, print_list_by_group, split_block_obs, split_by_n
 from .description import Description
+from .tracked import Tracked
 
 class Feature(object):
     """
@@ -22,7 +23,7 @@ class Feature(object):
 
 
 # TODO: possibly move header into LateralWeir
-class Header(object):
+class Header(Tracked):
     def __init__(self):
         self.name = None
 
@@ -43,22 +44,22 @@ class Header(object):
         s = 'Junct Name=' + self.name + '\n'
         return s
 
-class Junction(object):
+class Junction(Tracked):
     def __init__(self):
 
         # Load all cross sections parts
         self.header = Header()
-        self.parts = [self.header]
 
         self.geo_list = []  # holds all parts and unknown lines (as strings)
 
     def import_geo(self, line, geo_file):
+        parts = [self.header]
         while line != '\n':
-            for part in self.parts:
+            for part in parts:
                 if part.test(line):
                     # print str(type(part))+' found!'
                     line = part.import_geo(line, geo_file)
-                    self.parts.remove(part)
+                    parts.remove(part)
                     self.geo_list.append(part)
                     break
             else:  # Unknown line, add as text
@@ -67,9 +68,10 @@ class Junction(object):
         return line
 
     def __str__(self):
-        s = ''
-        for line in self.geo_list:
-            s += str(line)
+        source = self.source_text()
+        if source is not None:
+            return source
+        s = ''.join(map(str, self.geo_list))
         return s + '\n'
 
     @staticmethod
@@ -1,5 +1,6 @@
 from .tools import fl_int #  , split_by_n_str, pad_left, print_list_by_group, split_block_obs, split_by_n
 from .description import Description
+from .tracked import Tracked
 
 class Feature(object):
     """
@@ -22,7 +23,7 @@ class Feature(object):
 
 
 # TODO: possibly move header into LateralWeir
-class Header(object):
+class Header(Tracked):
     def __init__(self):
 
         self.station = None
@@ -60,7 +61,7 @@ class Header(object):
                                                                                                     # header if figured out
         return s
 
-class LateralWeir(object):
+class LateralWeir(Tracked):
     def __init__(self, river, reach):
         self.river = river
         self.reach = reach
@@ -74,17 +75,16 @@ class LateralWeir(object):
 #        self.mannings_n = Mannings_n()
 #        self.obstruct = Obstruction()
 #        self.bank_sta = BankStation()
-        self.parts = [self.header, self.description]
-
         self.geo_list = []  # holds all parts and unknown lines (as strings)
 
     def import_geo(self, line, geo_file):
+        parts = [self.header, self.description]
         while line != '\n':
-            for part in self.parts:
+            for part in parts:
                 if part.test(line):
                     # print str(type(part))+' found!'
                     line = part.import_geo(line, geo_file)
-                    self.parts.remove(part)
+                    parts.remove(part)
                     self.geo_list.append(part)
                     break
             else:  # Unknown line, add as text
@@ -93,9 +93,10 @@ class LateralWeir(object):
         return line
 
     def __str__(self):
-        s = ''
-        for line in self.geo_list:
-            s += str(line)
+        source = self.source_text()
+        if source is not None:
+            return source
+        s = ''.join(map(str, self.geo_list))
         return s + '\n'
 
     @staticmethod
@@ -1,4 +1,5 @@
 from .tools import  split_by_n_str
+from .tracked import Tracked
 # Global debug, this is set when initializing RiverReach
 DEBUG = False
 
@@ -22,7 +23,7 @@ class Feature(object):
         pass
 
 
-class RiverReach(object):
+class RiverReach(Tracked):
     def __init__(self, debug=False):
         # Set global debug
         global DEBUG
@@ -33,17 +34,16 @@ class RiverReach(object):
         self.geo = Geo()
         self.text = Text()
 
-        self.parts = [self.header, self.geo, self.text]
-
         self.geo_list = []  # holds all parts and unknown lines (as strings)
 
     def import_geo(self, line, geo_file):
+        parts = [self.header, self.geo, self.text]
         while line != '\n':
-            for part in self.parts:
+            for part in parts:
                 if part.test(line):
                     # print str(type(part))+' found!'
                     line = part.import_geo(line, geo_file)
-                    self.parts.remove(part)
+                    parts.remove(part)
                     self.geo_list.append(part)
                     break
             else:  # Unknown line, add as text
@@ -52,9 +52,10 @@ class RiverReach(object):
         return line
 
     def __str__(self):
-        s = ''
-        for line in self.geo_list:
-            s += str(line)
+        source = self.source_text()
+        if source is not None:
+            return source
+        s = ''.join(map(str, self.geo_list))
         return s + '\n'
 
     @staticmethod
@@ -62,7 +63,9 @@ class RiverReach(object):
         return Header.test(line)
 
 
-class Header(object):
+class Header(Tracked):
+    __slots__ = ('river_name', 'reach_name', '_dirty')
+
     def __init__(self):
         self.river_name = None
         self.reach_name = None
@@ -88,7 +91,9 @@ class Header(object):
         return s
 
 
-class Geo(object):
+class Geo(Tracked):
+    __slots__ = ('points', '_dirty')
+
     def __init__(self):
         self.points = []  # [(x1, y1), (x2, y2), ... ] all values are strings so that the exported file is identical
 
@@ -120,7 +125,9 @@ class Geo(object):
         return s
 
 
-class Text(object):
+class Text(Tracked):
+    __slots__ = ('position', 'reverse', '_dirty')
+
     def __init__(self):
         self.position = None  # (x, y) as a string
         self.reverse = None  # int, 0 (normal) or -1 (reversed)
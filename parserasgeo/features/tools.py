@@ -1,3 +1,110 @@
+import locale
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, blocks are decoded one value at a time without it
+    np = None
+
+# Blocks with fewer lines than this decode faster one value at a time than with NumPy
+MIN_VECTOR_LINES = 3
+
+# Lists with fewer values than this format faster one row at a time than with NumPy, the arrays and the string
+# conversions NumPy needs cost more than they save for the short lists in most cross sections
+MIN_VECTOR_VALUES = 256
+
+# First bytes of lines of fixed width values, see LineReader.skip_values()
+VALUE_STARTS = frozenset(b' 0123456789-.'[i:i + 1] for i in range(13))
+
+
+class LineReader(object):
+    """
+    Iterates over the lines of a binary file as text, the same way as a file opened with 'rt', while keeping
+    track of byte offsets so parts of the file can be re-read later without parsing the whole file again.
+    """
+    def __init__(self, binary_file, encoding=None):
+        """
+        :param binary_file: file object opened with 'rb'
+        :param encoding: encoding of the file, defaults to the same encoding open() uses for text files
+        """
+        self._file = binary_file
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.line_start = 0  # byte offset of the start of the last line returned
+        self.offset = 0  # byte offset of the end of the last line returned
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        raw = self._file.readline()
+        if not raw:
+            raise StopIteration
+        self.line_start = self.offset
+        self.offset += len(raw)
+        line = raw.decode(self.encoding)
+        # Match universal newlines of text mode
+        if line[-2:] == '\r\n':
+            line = line[:-2] + '\n'
+        return line
+
+    def readline(self):
+        """
+        Returns the next line, or '' at the end of the file, the same as readline() of a file opened with 'rt'
+        """
+        return next(self, '')
+
+    def skip_values(self):
+        """
+        Skips lines of fixed width values, i.e. lines that start with a space, digit, '-' or '.', without decoding
+        them. offset is left at the end of the last skipped line.
+        """
+        while True:
+            raw = self._file.readline()
+            if raw[:1] not in VALUE_STARTS:
+                break
+            self.offset += len(raw)
+        self._file.seek(self.offset)
+
+
+class LineRecorder(object):
+    """
+    Iterates over the lines of a text file and keeps the lines returned since start() was last called, so the text
+    of a feature is available after it is imported without holding the whole file in memory.
+    """
+    def __init__(self, text_file):
+        self._file = text_file
+        self.lines = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = next(self._file)
+        self.lines.append(line)
+        return line
+
+    def start(self, line):
+        """
+        Starts recording at line, the last line returned
+        """
+        self.lines = [line]
+
+    def text(self):
+        """
+        Returns the lines returned since start() as one string
+        """
+        return ''.join(self.lines)
+
+
+def decode_text(raw, encoding=None):
+    """
+    Returns bytes raw of a text file as text, with the same newlines as a file opened with 'rt'
+    :param raw: bytes of whole lines
+    :param encoding: encoding of the file
+    :return: string
+    """
+    return raw.decode(encoding or locale.getpreferredencoding(False)).replace('\r\n', '\n')
+
+
 def split_by_n(line, n):
     """
 
@@ -16,6 +123,49 @@ def split_by_n(line, n):
     return values
 
 
+def split_block(lines, n):
+    """
+    Decodes a multi-line block of n wide fixed width values. Returns the same list of int/float as calling
+    split_by_n() on every line, but decodes the whole block at once with NumPy when it is installed.
+
+    :param lines: list of lines, each ending with a newline
+    :param n: int - width of each value
+    :return: list of int and float
+    """
+    if np is None or len(lines) < MIN_VECTOR_LINES:
+        return [value for line in lines for value in split_by_n(line, n)]
+    return fl_int_list(decode_block(lines, n))
+
+
+def decode_block(lines, n):
+    """
+    Decodes a multi-line block of n wide fixed width values into a float64 array in one call. Whole numbers can be
+    converted back to int with fl_int_list(), matching fl_int(). Requires NumPy.
+
+    :param lines: list of lines, each ending with a newline
+    :param n: int - width of each value
+    :return: numpy array of float64
+    """
+    # Pad short last values so every value is exactly n characters
+    text = ''.join([line[:-1].ljust(-(-(len(line) - 1) // n) * n) for line in lines])
+    if not text:
+        return np.empty(0)
+    return np.frombuffer(text.encode('ascii'), dtype='S' + str(n)).astype(np.float64)
+
+
+def fl_int_list(values):
+    """
+    Converts an array of float64 to a list, with whole numbers converted to int the same as fl_int()
+    :param values: numpy array of float64
+    :return: list of int and float
+    """
+    result = values.tolist()
+    whole = (values == np.trunc(values)) & np.isfinite(values)
+    for i in np.flatnonzero(whole).tolist():
+        result[i] = int(result[i])
+    return result
+
+
 def split_by_n_str(line, n):
     """
     Splits line in to a list of n length strings. This differs from split_by_n() which returns fl_int()
@@ -75,38 +225,167 @@ def print_list_by_group(values, width, num_columns):
     Returns string of items in list values padded left to width in width, with num_columns of items per line.
     Lines are separated by newlines. Width of items in values are shortened to 'width'.
 
+    Long lists of numbers are formatted all at once with NumPy when it is installed, otherwise rows are formatted in
+    one pass each. values may also be a NumPy array, whole floats in the array are written as int the same as fl_int().
+
     :param values: list of values to convert to string
     :param width: width of white space padded columns
     :param num_columns: number of columns per line
     :return: string broken into multiple lines with \n
     """
-    length = len(values)
-    s = ''
-    for row in range(0, length, num_columns):
-        # Make sure we don't overrun length of values if len(values) % num_columns != 0
-        last_column = length - row
-        if last_column > num_columns:
-            last_column = num_columns
-        # Loop through and add every item in the row
-        for column in range(0, last_column):
-            temp = ('{:>'+str(width)+'}').format(values[row + column])
-
-            # Strip leading 0 from 0.12345 - with or without spaces or '-'
-            if temp[:2] == '0.' and len(temp) > width:
-                temp = temp[1:width+1]
-            elif temp[:2] == '0.':
-                temp = ' ' + temp[1:]
-            elif len(temp) > width:
-                temp = temp[:width]
-            temp = temp.replace(' 0.', '  .')
-            temp = temp.replace('-0.', ' -.')
-
-            s += temp
-        # End of row, add newline
-        s += '\n'
+    if np is not None and len(values) >= MIN_VECTOR_VALUES:
+        if isinstance(values, np.ndarray) and values.dtype.kind in 'fiu':
+            numbers = values.astype(np.float64)
+            is_int = ((numbers == np.trunc(numbers)) & np.isfinite(numbers)) | (values.dtype.kind != 'f')
+            return _format_numbers(numbers, is_int, None, width, num_columns)
+        kinds = set(map(type, values)) if not isinstance(values, np.ndarray) else None
+        if kinds and kinds <= {int, float}:
+            numbers = np.array(values, dtype=np.float64)
+            if len(kinds) == 1:
+                is_int = np.full(len(values), int in kinds)
+            else:
+                is_int = np.array([kind is int for kind in map(type, values)], dtype=bool)
+            return _format_numbers(numbers, is_int, values, width, num_columns)
+
+    if np is not None and isinstance(values, np.ndarray):
+        values = fl_int_list(values) if values.dtype.kind == 'f' else values.tolist()
+    fields = list(map(str, values))
+    if not fields:
+        return ''
+
+    # Rows with a value that fills or overruns the column need the per value rules in format_by_width()
+    exact_rows = set()
+    if max(map(len, fields)) >= width:
+        exact_rows = {i // num_columns for i, field in enumerate(fields) if len(field) >= width}
+
+    template = '%' + str(width) + 's'
+    row_template = template * num_columns
+    lines = []
+    for row, start in enumerate(range(0, len(fields), num_columns)):
+        columns = fields[start:start + num_columns]
+        if row in exact_rows:
+            lines.append(''.join([format_by_width(field, width) for field in columns]))
+            continue
+        if len(columns) < num_columns:
+            row_template = template * len(columns)
+        # Every value in the row is padded with at least one space, so the leading zero replacements can be done
+        # for the whole row without running across two values
+        line = row_template % tuple(columns)
+        lines.append(line.replace(' 0.', '  .').replace('-0.', ' -.'))
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def _format_numbers(numbers, is_int, originals, width, num_columns):
+    """
+    Vectorized version of print_list_by_group() for numbers. The characters of every column are built from the
+    integer digits of the values, so no value is converted to a string in python. Values whose shortest repr can
+    not be rebuilt from a fixed number of decimals (e.g. 1e-05, 0.30000000000000004) or that do not fit in width
+    are formatted with format_by_width().
+
+    :param numbers: numpy array of float64
+    :param is_int: numpy array of bool, True for values that are written as int
+    :param originals: list of the original values, or None to rebuild them from numbers and is_int
+    :param width: width of white space padded columns
+    :param num_columns: number of columns per line
+    :return: string broken into multiple lines with \n
+    """
+    count = len(numbers)
+    limit = 10.0 ** (width - 1)
+    # Python writes floats outside of this range in scientific notation
+    magnitude = np.abs(numbers)
+    usable = np.isfinite(numbers) & (magnitude < limit) & ((magnitude >= 1e-4) | (numbers == 0))
+    # Keep the values that are not usable in range, fmin() also replaces nan, so no step below overflows
+    magnitude = np.fmin(magnitude, limit)
+
+    # Find the fewest decimals that reproduce each float, which is what repr() writes. Floats have at least one,
+    # ints have none. Every place tried without a round trip adds one.
+    missing = usable & ~is_int
+    decimals = missing.astype(np.int64)
+    for places in range(1, width - 1):
+        if not missing.any():
+            break
+        candidate = np.rint(magnitude * 10.0 ** places)
+        # Stay well inside the exact integer range of float64 so only one candidate can round trip
+        missing &= (candidate / 10.0 ** places != magnitude) | (candidate >= 2.0 ** 49)
+        decimals += missing
+    decimals *= ~missing
+
+    # All of the integer math is done in float64, which is exact below 2**53 and much faster than int64 here
+    power = (10.0 ** np.arange(width))[decimals]
+    scaled = np.rint(magnitude * power)
+    whole = np.floor(scaled / power)
+    negative = np.signbit(numbers) & ~(is_int & (numbers == 0))
+    whole_digits = np.ones(count, dtype=np.int64)
+    for places in range(1, width):
+        whole_digits += whole >= 10.0 ** places
+    has_point = decimals > 0
+    # Number of characters right of the whole digits, including the point
+    point_width = decimals + has_point
+    length = negative + whole_digits + point_width
+    # Strip leading 0 from 0.12345 and -0.12345
+    whole_digits -= has_point & (whole == 0)
+
+    simple = usable & ~missing & (length <= width)
+    # Build the columns right to left, one digit per column. A zero digit is inserted where the decimal point goes,
+    # so every column takes the next digit.
+    chars = np.empty((count, width), dtype=np.uint8)
+    digits = scaled + 9.0 * has_point * whole * power
+    point_place = point_width - 1
+    digits_end = point_width + whole_digits
+    sign_place = (digits_end + 1) * negative - 1
+    # Columns are combined with arithmetic on uint8 views of the masks, which is much faster than np.where()
+    for place in range(width):
+        point = point_place == place
+        quotient = np.floor(digits * 0.1)
+        digit = (digits - 10 * quotient).astype(np.uint8)
+        is_digit = (digits_end > place) & ~point
+        column = is_digit.view(np.uint8) * (digit + (ord('0') - ord(' ')))
+        column += point.view(np.uint8) * (ord('.') - ord(' '))
+        column += (sign_place == place).view(np.uint8) * (ord('-') - ord(' '))
+        column += ord(' ')
+        chars[:, width - 1 - place] = column
+        digits = quotient
+
+    for i in np.flatnonzero(~simple).tolist():
+        if originals is not None:
+            value = originals[i]
+        else:
+            value = int(numbers[i]) if is_int[i] else float(numbers[i])
+        chars[i] = np.frombuffer(format_by_width(value, width).encode('ascii'), dtype=np.uint8)
+
+    full_rows = count // num_columns
+    lines = np.full((full_rows, num_columns * width + 1), ord('\n'), dtype=np.uint8)
+    lines[:, :-1] = chars[:full_rows * num_columns].reshape(full_rows, num_columns * width)
+    s = lines.tobytes().decode('ascii')
+    if count % num_columns:
+        s += chars[full_rows * num_columns:].tobytes().decode('ascii') + '\n'
     return s
 
 
+def format_by_width(value, width):
+    """
+    Returns value padded left to width. Leading zeros are stripped from decimals, e.g. 0.035 -> .035, and values
+    that are too wide are truncated to width.
+
+    :param value: value to convert to string
+    :param width: width of white space padded column
+    :return: string
+    """
+    temp = ('{:>' + str(width) + '}').format(value)
+
+    # Strip leading 0 from 0.12345 - with or without spaces or '-'
+    if temp[:2] == '0.' and len(temp) > width:
+        temp = temp[1:width+1]
+    elif temp[:2] == '0.':
+        temp = ' ' + temp[1:]
+    elif len(temp) > width:
+        temp = temp[:width]
+    temp = temp.replace(' 0.', '  .')
+    temp = temp.replace('-0.', ' -.')
+    return temp
+
+
 def pad_left(guts, pad_number):
     """
     pads guts (left) with spaces up to pad_number
@@ -0,0 +1,410 @@
+import io
+import os
+from array import array
+from contextlib import contextmanager
+
+from .tools import LineReader, decode_text
+
+# List methods that change the list in place
+LIST_MUTATORS = ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'extend', 'insert', 'pop', 'remove',
+                 'clear', 'sort', 'reverse')
+
+
+# Attributes that features are looked up by, setting any of them marks the key owners of the object dirty, see
+# add_key_owners()
+KEY_ATTRIBUTES = frozenset(('river', 'reach', 'station', 'header'))
+
+# Types of values that are never changed in place, clone() shares them
+IMMUTABLE_TYPES = frozenset((str, int, float, bool, tuple, type(None)))
+
+# {class: names in __slots__ of the class and its bases}
+_slot_names = {}
+# {class: names in _slot_names[class] that don't start with '_'}
+_public_slot_names = {}
+
+# {SourceFile: contents} of the files of byte range sources while cached_sources() is active, otherwise None
+_cached_files = None
+
+# Tracked.__setattr__() while untracked() is active, otherwise None
+_tracked_setattr = None
+
+
+def add_key_owners(obj, owners):
+    """
+    Makes setting an attribute that obj is looked up by call mark_dirty() of every owner, the same way TrackedList
+    notifies its owner when it changes. Indexes add themselves to the features in their list and to the parts that
+    hold the keys of those features, so changing a key only marks the indexes that hold the feature dirty.
+
+    :param obj: feature or part
+    :param owners: tuple of owners, e.g. (index,), stored as is if obj has no owners yet
+    """
+    if not owners:
+        return
+    current = getattr(obj, '_key_owners', ())
+    if not current:
+        object.__setattr__(obj, '_key_owners', owners)
+    elif current is not owners:
+        new_owners = tuple(owner for owner in owners if owner not in current)
+        if new_owners:
+            object.__setattr__(obj, '_key_owners', current + new_owners)
+
+
+def key_changed(obj):
+    """
+    Calls mark_dirty() of the key owners of obj, called when an attribute that obj is looked up by is set
+    """
+    for owner in getattr(obj, '_key_owners', ()):
+        owner.mark_dirty()
+
+
+class SourceFile(object):
+    """
+    File that byte range sources are in, with the size and modification time it had when it was imported. Text is
+    only read from the file while it is unchanged, so a source never silently reads text that was written over it.
+    """
+    __slots__ = ('filename', 'size', 'mtime')
+
+    def __init__(self, filename, stat=None):
+        """
+        :param filename: name of the file, stored as an absolute path so it still works if the working directory
+                         changes
+        :param stat: os.stat_result of the file when it was opened for importing, read from the file if None
+        """
+        self.filename = os.path.abspath(filename)
+        if stat is None:
+            stat = os.stat(self.filename)
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime_ns
+
+    def read(self, start=0, end=None):
+        """
+        Returns bytes start to end of the file, or to the end of the file if end is None
+        Raises ValueError if the file has changed since it was imported
+        """
+        with open(self.filename, 'rb') as infile:
+            stat = os.fstat(infile.fileno())
+            if stat.st_size != self.size or stat.st_mtime_ns != self.mtime:
+                raise ValueError('File ' + self.filename + ' has changed since it was imported, the text of '
+                                 'features that were imported from it can no longer be read')
+            infile.seek(start)
+            return infile.read() if end is None else infile.read(end - start)
+
+
+@contextmanager
+def cached_sources():
+    """
+    Context manager that reads each file that byte range sources are in once, the first time one of them is needed,
+    instead of once per feature, for writing many features, e.g. in ParseRASGeo.write(). The files are held in memory
+    until the with block ends.
+    """
+    global _cached_files
+    if _cached_files is not None:
+        # Already active in an outer with block
+        yield
+        return
+    _cached_files = {}
+    try:
+        yield
+    finally:
+        _cached_files = None
+
+
+@contextmanager
+def untracked():
+    """
+    Context manager for importing. Attributes of Tracked objects are set without marking the objects dirty or
+    notifying their key owners until the with block ends, as fast as attributes of other objects. Objects imported in
+    the block must be marked clean before they are used, see Tracked.mark_clean(), and objects in indexes must not be
+    changed in it. Attribute hooks are per class, so the block applies to all Tracked objects.
+    """
+    global _tracked_setattr
+    if _tracked_setattr is not None:
+        # Already active in an outer with block
+        yield
+        return
+    _tracked_setattr = Tracked.__dict__['__setattr__']
+    Tracked.__setattr__ = object.__setattr__
+    try:
+        yield
+    finally:
+        Tracked.__setattr__ = _tracked_setattr
+        _tracked_setattr = None
+
+
+def read_source(source_file, start, end):
+    """
+    Returns bytes start to end of source_file, from memory while cached_sources() is active
+    """
+    if _cached_files is None:
+        return source_file.read(start, end)
+    contents = _cached_files.get(source_file)
+    if contents is None:
+        contents = _cached_files[source_file] = source_file.read()
+    return contents[start:end]
+
+
+def read_source_text(source):
+    """
+    Returns the text of source, which is either text or a (SourceFile, start, end, encoding) byte range
+    """
+    if isinstance(source, tuple):
+        source_file, start, end, encoding = source
+        return decode_text(read_source(source_file, start, end), encoding)
+    return source
+
+
+def read_source_lines(source):
+    """
+    Returns an iterator over the lines of source, see read_source_text()
+    """
+    if isinstance(source, tuple):
+        source_file, start, end, encoding = source
+        return LineReader(io.BytesIO(read_source(source_file, start, end)), encoding)
+    return iter(source.splitlines(True))
+
+
+def load_sources(items, filename=None):
+    """
+    Reads the files that the byte range sources of items are in while cached_sources() is active, so items can be
+    written without reading any file. Byte range sources in filename are replaced with copies of their text first,
+    so items may be written to filename and can still be written after it has been overwritten.
+
+    :param items: features and unknown lines (strings). Features have source_files() and copy_sources().
+    :param filename: name of the file items are about to be written to
+    """
+    source_files = {}
+    for item in items:
+        if not isinstance(item, str):
+            for source_file in item.source_files():
+                source_files[source_file] = True
+    overwritten = set()
+    for source_file in source_files:
+        if _cached_files is not None and source_file not in _cached_files:
+            _cached_files[source_file] = source_file.read()
+        if filename is not None and os.path.exists(filename) and os.path.samefile(source_file.filename, filename):
+            overwritten.add(source_file)
+    if overwritten:
+        for item in items:
+            if not isinstance(item, str):
+                item.copy_sources(overwritten)
+
+
+def slot_names(cls):
+    """
+    Returns the attribute names in __slots__ of cls and its bases
+    """
+    names = _slot_names.get(cls)
+    if names is None:
+        names = tuple(name for klass in cls.__mro__ for name in vars(klass).get('__slots__', ()))
+        _slot_names[cls] = names
+    return names
+
+
+def public_slot_names(cls):
+    """
+    Returns the names in slot_names(cls) that don't start with '_'
+    """
+    names = _public_slot_names.get(cls)
+    if names is None:
+        names = _public_slot_names[cls] = tuple(name for name in slot_names(cls) if name[0] != '_')
+    return names
+
+
+class TrackedList(list):
+    """
+    List that marks its owner as dirty when it is changed in place. Values in the list, e.g. tuples, are not tracked,
+    so they must be replaced rather than changed in place.
+    """
+    __slots__ = ('owner',)
+
+    def __init__(self, values=(), owner=None):
+        list.__init__(self, values)
+        self.owner = owner
+
+    def __reduce_ex__(self, protocol):
+        return TrackedList, (list(self), self.owner)
+
+
+def _tracked_mutator(name):
+    method = getattr(list, name)
+
+    def mutator(self, *args):
+        if self.owner is not None:
+            self.owner.mark_dirty()
+        return method(self, *args)
+    mutator.__name__ = name
+    return mutator
+
+
+for _name in LIST_MUTATORS:
+    setattr(TrackedList, _name, _tracked_mutator(_name))
+
+
+def clone_value(value, owner, memo):
+    """
+    Returns a copy of attribute value of owner for Tracked.clone(). Lists, arrays and Tracked objects are copied,
+    everything else, e.g. strings, numbers, tuples and Station, is immutable and shared.
+
+    :param value: value to copy
+    :param owner: copy of the object the value belongs to, owns copied TrackedLists
+    :param memo: {id(original): copy} of Tracked objects copied so far
+    """
+    if type(value) in IMMUTABLE_TYPES:
+        return value
+    if isinstance(value, Tracked):
+        return value.clone(memo)
+    if isinstance(value, list):
+        values = [clone_value(item, owner, memo) for item in value]
+        return TrackedList(values, owner) if type(value) is TrackedList else values
+    if isinstance(value, array):
+        return value[:]
+    return value
+
+
+class Tracked(object):
+    """
+    Mixin for features and their parts that are marked dirty when they are changed after being imported. Setting any
+    public attribute marks the object dirty, and lists in attributes of clean objects are TrackedList so changing them
+    in place does too. Changes that can't be seen, e.g. to an array, must call mark_dirty().
+
+    Parts that are created in large numbers list their attributes and '_dirty' in __slots__ so they don't have a
+    __dict__. Objects whose _dirty is not set, i.e. that were created in an untracked() block and not marked clean,
+    are dirty.
+
+    Features keep the text they were imported from, or the byte range of it in the geometry file, which is written by
+    __str__() as long as the feature and all of its parts in geo_list are clean, so features that are not changed are
+    always written exactly as they were read.
+    """
+    __slots__ = ()
+
+    # Attributes saved by get_state() and reset by set_state(), see ParseRASGeo.snapshot()
+    STATE_ATTRIBUTES = ()
+    # Text the object was imported from, or (SourceFile, start, end, encoding) byte range of it in a geometry file
+    _source = None
+
+    def __setattr__(self, name, value):
+        # Lists are converted by mark_clean(), changing a list of a dirty object in place doesn't matter. Replaced by
+        # object.__setattr__() in untracked() blocks.
+        object.__setattr__(self, name, value)
+        if name[0] != '_':
+            object.__setattr__(self, '_dirty', True)
+            if name in KEY_ATTRIBUTES:
+                key_changed(self)
+
+    def _tracked_parts(self):
+        """
+        Returns the parts that are written when the object is written
+        """
+        return getattr(self, 'geo_list', ())
+
+    def mark_dirty(self):
+        object.__setattr__(self, '_dirty', True)
+
+    def mark_clean(self, source=None):
+        """
+        Marks the object and its parts clean, e.g. after importing them
+
+        :param source: text the object was imported from, or (SourceFile, start, end, encoding) byte range of it
+        """
+        object.__setattr__(self, '_dirty', False)
+        if source is not None:
+            object.__setattr__(self, '_source', source)
+        attributes = getattr(self, '__dict__', None)
+        if attributes is not None:
+            for name, value in attributes.items():
+                if isinstance(value, list) and name[0] != '_' and not (type(value) is TrackedList and
+                                                                       value.owner is self):
+                    attributes[name] = TrackedList(value, self)
+        for name in public_slot_names(type(self)):
+            value = getattr(self, name, None)
+            if isinstance(value, list) and not (type(value) is TrackedList and value.owner is self):
+                object.__setattr__(self, name, TrackedList(value, self))
+        for part in self._tracked_parts():
+            if isinstance(part, Tracked):
+                part.mark_clean()
+
+    def clone(self, memo=None):
+        """
+        Returns an independent copy of the object and its parts, with the same dirty flag and source text. The copy is
+        not in the indexes of the object, see add_key_owners().
+
+        :param memo: {id(original): copy} of objects already copied, so parts referenced twice are copied once
+        """
+        if memo is None:
+            memo = {}
+        copy = memo.get(id(self))
+        if copy is not None:
+            return copy
+        copy = object.__new__(type(self))
+        memo[id(self)] = copy
+        attributes = getattr(self, '__dict__', None)
+        if attributes is not None:
+            copy_attributes = copy.__dict__
+            for name, value in attributes.items():
+                if name != '_key_owners':
+                    copy_attributes[name] = clone_value(value, copy, memo)
+        for name in slot_names(type(self)):
+            if name != '_key_owners' and hasattr(self, name):
+                object.__setattr__(copy, name, clone_value(getattr(self, name), copy, memo))
+        return copy
+
+    def get_state(self):
+        """
+        Returns the dirty flag and the values of STATE_ATTRIBUTES, for set_state(). Lists are saved as tuples and
+        arrays are copied, other values must be immutable.
+        """
+        values = []
+        for name in self.STATE_ATTRIBUTES:
+            value = getattr(self, name)
+            if isinstance(value, list):
+                value = tuple(value)
+            elif isinstance(value, array):
+                value = value[:]
+            values.append(value)
+        return getattr(self, '_dirty', True), tuple(values)
+
+    def set_state(self, state):
+        """
+        Resets the object to state, from get_state(), including the dirty flag. The same state may be set any number
+        of times.
+        """
+        dirty, values = state
+        for name, value in zip(self.STATE_ATTRIBUTES, values):
+            if isinstance(value, tuple):
+                value = TrackedList(value, self)
+            elif isinstance(value, array):
+                value = value[:]
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, '_dirty', dirty)
+
+    def is_dirty(self):
+        """
+        Returns True if the object or any of its parts has been changed since it was imported
+        """
+        if getattr(self, '_dirty', True):
+            return True
+        for part in self._tracked_parts():
+            if isinstance(part, Tracked) and part.is_dirty():
+                return True
+        return False
+
+    def source_text(self):
+        """
+        Returns the text the object was imported from if it has not been changed since, otherwise None
+        """
+        if self._source is None or self.is_dirty():
+            return None
+        return read_source_text(self._source)
+
+    def source_files(self):
+        """
+        Returns the SourceFiles that the text of the object is read from, see load_sources()
+        """
+        return (self._source[0],) if isinstance(self._source, tuple) else ()
+
+    def copy_sources(self, source_files):
+        """
+        Replaces byte range sources in any of source_files with copies of their text, see load_sources()
+        """
+        if isinstance(self._source, tuple) and self._source[0] in source_files:
+            object.__setattr__(self, '_source', read_source_text(self._source))
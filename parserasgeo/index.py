@@ -0,0 +1,180 @@
+"""
+Index of the cross sections and culverts in a geo_list by river, reach and station, see ParseRASGeo, and of the
+boundaries in an uflow_list by river, reach, station and hydrograph type, see UnsteadyFlow
+
+An index is rebuilt the first time it is used after its list is changed in place or replaced, or after the river,
+reach or station of a feature in its list, or the hydrograph type of a boundary in its list, is set. Features and the
+parts that hold their keys notify the indexes that hold them, see add_key_owners(), so changes to other models don't
+rebuild the index.
+"""
+from bisect import bisect_left, bisect_right
+
+from .features import CrossSection, Culvert
+from .features.boundary import Boundary
+from .features.tracked import add_key_owners
+
+
+def node_header(item):
+    """
+    Returns the header of cross section, culvert or boundary item. The header of a cloned cross section is not copied,
+    see CrossSection.clone().
+    """
+    if isinstance(item, CrossSection):
+        return item._peek('header')
+    return item.header
+
+
+def station_value(item):
+    """
+    Returns the station of cross section, culvert or boundary item as a number, or None if it is blank
+    """
+    if isinstance(item, Culvert):
+        return item.header.station
+    return node_header(item).station.value
+
+
+class ReachStations(object):
+    """
+    Nodes of one type on one river/reach, sorted by station
+    """
+    def __init__(self):
+        self.nodes = []  # [(position in geo_list, node), ...] in geo_list order
+        self.stations = []  # sorted station values
+        self.sorted_nodes = []  # [(position, node), ...] sorted by station, same order as self.stations
+
+    def sort(self):
+        keyed = sorted((station_value(node), position, node) for position, node in self.nodes
+                       if station_value(node) is not None)
+        self.stations = [key[0] for key in keyed]
+        self.sorted_nodes = [(key[1], key[2]) for key in keyed]
+
+    def between(self, low, high):
+        """
+        Returns [(position, node), ...] with station between low and high, inclusive. None is unbounded.
+        """
+        start = 0 if low is None else bisect_left(self.stations, low)
+        end = len(self.stations) if high is None else bisect_right(self.stations, high)
+        return self.sorted_nodes[start:end]
+
+
+class GeoIndex(object):
+    def __init__(self):
+        self.geo_list = None
+        self._stale = True
+        self._owners = (self,)  # shared by every feature and header in the index, see add_key_owners()
+        self.reaches = {}  # {(node class, river, reach): ReachStations}
+
+    def mark_dirty(self):
+        """
+        Called by TrackedList when geo_list is changed in place, and when the river, reach or station of a feature
+        in the index is set
+        """
+        self._stale = True
+
+    def update(self, geo_list):
+        """
+        Rebuilds the index if geo_list, or the river, reach or station of any feature, has changed
+        """
+        if not self._stale and geo_list is self.geo_list:
+            return
+        self.geo_list = geo_list
+        self.reaches = {}
+        for position, item in enumerate(geo_list):
+            if isinstance(item, (CrossSection, Culvert)):
+                add_key_owners(item, self._owners)
+                add_key_owners(node_header(item), self._owners)
+                key = (type(item), item.river, item.reach)
+                if key not in self.reaches:
+                    self.reaches[key] = ReachStations()
+                self.reaches[key].nodes.append((position, item))
+        for reach_stations in self.reaches.values():
+            reach_stations.sort()
+        self._stale = False
+
+    def find(self, node_type, river=None, reach=None, low=None, high=None, by_station=False, match=None):
+        """
+        Returns nodes of node_type in geo_list order. river and reach are exact matches or None for all, match is an
+        optional callable that is passed (river, reach) and returns True for reaches to include. If by_station is
+        True only nodes with a station between low and high, inclusive, are returned.
+        """
+        found = []
+        for (key_type, key_river, key_reach), reach_stations in self.reaches.items():
+            if key_type is not node_type:
+                continue
+            if river is not None and key_river != river:
+                continue
+            if reach is not None and key_reach != reach:
+                continue
+            if match is not None and not match(key_river, key_reach):
+                continue
+            if by_station:
+                found.extend(reach_stations.between(low, high))
+            else:
+                found.extend(reach_stations.nodes)
+        found.sort(key=lambda pair: pair[0])
+        return [node for _, node in found]
+
+
+class BoundaryIndex(object):
+    def __init__(self):
+        self.uflow_list = None
+        self._stale = True
+        self._owners = (self,)  # shared by every boundary, header and hydrograph in the index
+        self.reaches = {}  # {(river, reach): ReachStations}
+        self.types = {}  # {hydrograph type: [(position in uflow_list, boundary), ...]}
+
+    def mark_dirty(self):
+        """
+        Called by TrackedList when uflow_list is changed in place, and when the river, reach, station or hydrograph
+        type of a boundary in the index is set
+        """
+        self._stale = True
+
+    def update(self, uflow_list):
+        """
+        Rebuilds the index if uflow_list, or the river, reach, station or hydrograph type of any boundary, has changed
+        """
+        if not self._stale and uflow_list is self.uflow_list:
+            return
+        self.uflow_list = uflow_list
+        self.reaches = {}
+        self.types = {}
+        for position, item in enumerate(uflow_list):
+            if isinstance(item, Boundary):
+                add_key_owners(item, self._owners)
+                add_key_owners(item.header, self._owners)
+                add_key_owners(item.hydrograph, self._owners)
+                key = (item.header.river_name, item.header.reach_name)
+                if key not in self.reaches:
+                    self.reaches[key] = ReachStations()
+                self.reaches[key].nodes.append((position, item))
+                self.types.setdefault(item.hydrograph.type, []).append((position, item))
+        for reach_stations in self.reaches.values():
+            reach_stations.sort()
+        self._stale = False
+
+    def find(self, river=None, reach=None, low=None, high=None, by_station=False, hydrograph_type=None):
+        """
+        Returns boundaries in uflow_list order. river, reach and hydrograph_type are exact matches or None for all. If
+        by_station is True only boundaries with a station between low and high, inclusive, are returned.
+        """
+        if river is None and reach is None and not by_station:
+            if hydrograph_type is None:
+                return [item for item in self.uflow_list if isinstance(item, Boundary)]
+            return [boundary for _, boundary in self.types.get(hydrograph_type, ())]
+        if river is not None and reach is not None:
+            reach_stations = self.reaches.get((river, reach))
+            matches = [] if reach_stations is None else [reach_stations]
+        else:
+            matches = [reach_stations for (key_river, key_reach), reach_stations in self.reaches.items()
+                       if (river is None or key_river == river) and (reach is None or key_reach == reach)]
+        found = []
+        for reach_stations in matches:
+            if by_station:
+                found.extend(reach_stations.between(low, high))
+            else:
+                found.extend(reach_stations.nodes)
+        if hydrograph_type is not None:
+            found = [pair for pair in found if pair[1].hydrograph.type == hydrograph_type]
+        found.sort(key=lambda pair: pair[0])
+        return [boundary for _, boundary in found]
@@ -0,0 +1,256 @@
+"""
+Opt-in timing of importing and writing geometry features
+
+    from parserasgeo import ParseRASGeo, instrument
+
+    with instrument.instrumented() as stats:
+        geo = ParseRASGeo('model.g01')
+        geo.write('out.g01')
+    print(stats.report())
+
+While instrumentation is enabled, import_geo() and __str__() of every geometry feature and part (CrossSection, Culvert,
+Deck, Mannings_n, StationElevation, etc.) are replaced with wrappers that pass (name, phase, seconds, size) to every
+sink, where phase is 'import_geo' or '__str__' and size is the number of characters read or written. Unknown lines
+between features are passed as 'unknown', one call per line while importing and one call per ParseRASGeo.write()
+with the time of write() that is not spent in features. Sinks are callables, see Stats and LogSink. Times of features
+include the time of their parts. Nothing is replaced, and nothing slows down, while instrumentation is disabled.
+
+Only features imported and written in this process are recorded, not those imported by the worker processes of
+load_many().
+"""
+import logging
+from contextlib import contextmanager
+from time import perf_counter
+
+from . import prg
+from .features import bridge, cross_section, culvert, description, inline_weir, junction, lateral_weir, river_reach
+from .features.tracked import Tracked
+
+FEATURE_MODULES = (bridge, cross_section, culvert, description, inline_weir, junction, lateral_weir, river_reach)
+
+UNKNOWN = 'unknown'
+
+_sinks = []
+# {(class, method name): original method} of replaced methods while enabled
+_originals = {}
+# Nesting depth of timed __str__() calls, and total seconds of the outermost ones, see _timed_write()
+_str_depth = 0
+_str_seconds = 0.0
+
+
+class CountingReader(object):
+    """
+    Passes lines through from a geometry file and counts their characters
+    """
+    __slots__ = ('_geo_file', 'count')
+
+    def __init__(self, geo_file):
+        self._geo_file = geo_file
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = next(self._geo_file)
+        self.count += len(line)
+        return line
+
+    def __getattr__(self, name):
+        # e.g. offset of a LineReader
+        return getattr(self._geo_file, name)
+
+
+class Stats(object):
+    """
+    Sink that totals the count, time and size of every feature and phase
+    """
+    def __init__(self):
+        self.totals = {}  # {(name, phase): [count, seconds, size]}
+
+    def __call__(self, name, phase, seconds, size):
+        total = self.totals.get((name, phase))
+        if total is None:
+            self.totals[(name, phase)] = [1, seconds, size]
+        else:
+            total[0] += 1
+            total[1] += seconds
+            total[2] += size
+
+    def clear(self):
+        self.totals = {}
+
+    def as_dict(self):
+        """
+        Returns {phase: {name: {'count': count, 'seconds': seconds, 'bytes': size}}}
+        """
+        result = {}
+        for (name, phase), (count, seconds, size) in self.totals.items():
+            result.setdefault(phase, {})[name] = {'count': count, 'seconds': seconds, 'bytes': size}
+        return result
+
+    def report(self):
+        """
+        Returns a table of the totals, slowest first within each phase
+        """
+        lines = ['%-10s %-30s %10s %12s %12s' % ('phase', 'name', 'count', 'seconds', 'bytes')]
+        for (name, phase), (count, seconds, size) in sorted(self.totals.items(),
+                                                            key=lambda item: (item[0][1], -item[1][1])):
+            lines.append('%-10s %-30s %10d %12.6f %12d' % (phase, name, count, seconds, size))
+        return '\n'.join(lines)
+
+
+class LogSink(object):
+    """
+    Sink that logs every call, for following an import as it happens
+    """
+    def __init__(self, logger=None, level=logging.DEBUG):
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.level = level
+
+    def __call__(self, name, phase, seconds, size):
+        self.logger.log(self.level, '%s %s %.6f s %d bytes', name, phase, seconds, size)
+
+
+def _emit(name, phase, seconds, size):
+    for sink in _sinks:
+        sink(name, phase, seconds, size)
+
+
+def _timed_import_geo(name, method):
+    def import_geo(self, line, geo_file):
+        if type(geo_file) is not CountingReader:
+            geo_file = CountingReader(geo_file)
+        count = geo_file.count
+        start = perf_counter()
+        result = method(self, line, geo_file)
+        seconds = perf_counter() - start
+        size = len(line) + geo_file.count - count
+        if isinstance(result, str):
+            # The next line is returned to the caller, it isn't part of this feature
+            size -= len(result)
+        _emit(name, 'import_geo', seconds, size)
+        return result
+    return import_geo
+
+
+def _timed_str(name, method):
+    def __str__(self):
+        global _str_depth, _str_seconds
+        _str_depth += 1
+        start = perf_counter()
+        try:
+            result = method(self)
+        finally:
+            _str_depth -= 1
+        seconds = perf_counter() - start
+        if not _str_depth:
+            _str_seconds += seconds
+        _emit(name, '__str__', seconds, len(result))
+        return result
+    return __str__
+
+
+def _timed_classify(method):
+    def classify(line):
+        start = perf_counter()
+        result = method(line)
+        if result is None:
+            _emit(UNKNOWN, 'import_geo', perf_counter() - start, len(line))
+        return result
+    return classify
+
+
+def _timed_write(method):
+    def write(self, out_geo_filename):
+        global _str_seconds
+        str_seconds = _str_seconds
+        start = perf_counter()
+        method(self, out_geo_filename)
+        seconds = perf_counter() - start - (_str_seconds - str_seconds)
+        _emit(UNKNOWN, '__str__', seconds, sum(len(line) for line in self.geo_list if isinstance(line, str)))
+    return write
+
+
+def instrumented_classes():
+    """
+    Returns {class: name} of the feature and part classes that are timed. Classes are named by class name, or by
+    module and class name if several modules have a class with the same name, e.g. 'culvert.Header'.
+    """
+    classes = []
+    for module in FEATURE_MODULES:
+        for value in vars(module).values():
+            if (isinstance(value, type) and issubclass(value, Tracked) and value.__module__ == module.__name__ and
+                    ('import_geo' in vars(value) or '__str__' in vars(value))):
+                classes.append(value)
+    class_names = [cls.__name__ for cls in classes]
+    names = {}
+    for cls in classes:
+        if class_names.count(cls.__name__) > 1:
+            names[cls] = cls.__module__.rsplit('.', 1)[-1] + '.' + cls.__name__
+        else:
+            names[cls] = cls.__name__
+    return names
+
+
+def _patch(owner, attribute, replacement):
+    _originals[(owner, attribute)] = vars(owner)[attribute]
+    setattr(owner, attribute, replacement)
+
+
+def enabled():
+    """
+    Returns True if instrumentation is enabled
+    """
+    return bool(_sinks)
+
+
+def enable(*sinks):
+    """
+    Starts passing timings to sinks, in addition to sinks that are already enabled
+
+    :param sinks: callables that are passed (name, phase, seconds, size), e.g. Stats()
+    """
+    if not sinks:
+        raise AttributeError('enable() requires at least one sink')
+    if not _originals:
+        for cls, name in instrumented_classes().items():
+            if 'import_geo' in vars(cls):
+                _patch(cls, 'import_geo', _timed_import_geo(name, vars(cls)['import_geo']))
+            if '__str__' in vars(cls):
+                _patch(cls, '__str__', _timed_str(name, vars(cls)['__str__']))
+        _patch(prg, 'classify', _timed_classify(prg.classify))
+        _patch(prg.ParseRASGeo, 'write', _timed_write(prg.ParseRASGeo.write))
+    _sinks.extend(sinks)
+
+
+def disable(*sinks):
+    """
+    Stops passing timings to sinks, or to all sinks if none are given. The original methods are restored when no sinks
+    are left.
+    """
+    if sinks:
+        for sink in sinks:
+            if sink in _sinks:
+                _sinks.remove(sink)
+    else:
+        del _sinks[:]
+    if not _sinks:
+        for (owner, attribute), method in _originals.items():
+            setattr(owner, attribute, method)
+        _originals.clear()
+
+
+@contextmanager
+def instrumented(*sinks):
+    """
+    Context manager that enables sinks for the duration of the with block. A Stats instance is created if no sinks
+    are given. Yields the first sink.
+    """
+    if not sinks:
+        sinks = (Stats(),)
+    enable(*sinks)
+    try:
+        yield sinks[0]
+    finally:
+        disable(*sinks)
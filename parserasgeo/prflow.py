@@ -1,4 +1,10 @@
+import os
+
 from .features.boundary import Boundary
+from .features.flow_table import FlowLocation, FlowTable, InternalChangeRun, InternalChanges
+from .features.tools import LineReader
+from .features.tracked import SourceFile, TrackedList, cached_sources, load_sources
+from .index import BoundaryIndex
 
 
 def format_float_fixed_width(val, width=8):
@@ -51,134 +57,172 @@ class SteadyFlow:
 
     def __init__(self, filename):
         self.filename = filename
-        self.flow_list = []
+        self.flow_list = []  # lines as strings and FlowLocation instances
+        self.flow_table = FlowTable()
         self.flow_title = ""
         self.program_version = ""
-        self.num_of_prof = 0
         self.river_name = ""
         self.reach_name = ""
-        self.profile_names = []
-        self.flow_values_line_idx = None
         self.profile_names_line_idx = None
         self.num_of_prof_line_idx = None
         self.boundary_end_index = None
+        self.internal_changes = None  # InternalChanges, each run of lines is written where it was imported
+        self._source_profile_names = []
         self._parse()
 
+    @property
+    def num_of_prof(self):
+        return len(self.flow_table.profile_names)
+
+    @num_of_prof.setter
+    def num_of_prof(self, value):
+        # The number of profiles follows profile_names, use add_profile() or flow_table.set_profiles() to change it
+        if value != self.num_of_prof:
+            raise ValueError('num_of_prof is {}, not {}. Profiles are added with add_profile() or '
+                             'flow_table.set_profiles()'.format(self.num_of_prof, value))
+
+    @property
+    def profile_names(self):
+        return self.flow_table.profile_names
+
+    @profile_names.setter
+    def profile_names(self, names):
+        names = list(names)
+        if len(names) != self.num_of_prof:
+            raise ValueError('{} profile names given for {} profiles'.format(len(names), self.num_of_prof))
+        self.flow_table.profile_names[:] = names
+
     def _parse(self):
         """
-        Parses the steady flow file into flow_list.
+        Parses the steady flow file into flow_list and flow_table.
         Identifies key header values and indexes for later updates.
         """
         with open(self.filename, "rt") as infile:
-            for idx, line in enumerate(infile):
-                self.flow_list.append(line)
+            line = infile.readline()
+            while line:
+                if FlowLocation.test(line):
+                    location = FlowLocation()
+                    line = location.import_geo(line, infile)
+                    self.flow_list.append(location)
+                    self.flow_table.locations.append(location)
+                    self.river_name = location.river
+                    self.reach_name = location.reach
+                    continue
+                if InternalChanges.test(line):
+                    if self.internal_changes is None:
+                        self.internal_changes = InternalChanges()
+                    if not self.flow_list or not isinstance(self.flow_list[-1], InternalChangeRun):
+                        self.flow_list.append(self.internal_changes.new_run())
+                    self.internal_changes.append(line)
+                    line = infile.readline()
+                    continue
 
+                idx = len(self.flow_list)
+                self.flow_list.append(line)
                 if line.startswith("Flow Title"):
                     self.flow_title = line.strip().split("=", 1)[-1]
                 elif line.startswith("Program Version"):
                     self.program_version = line.strip().split("=", 1)[-1]
                 elif line.startswith("Number of Profiles"):
-                    self.num_of_prof = int(line.strip().split("=", 1)[-1])
                     self.num_of_prof_line_idx = idx
                 elif line.startswith("Profile Names"):
-                    self.profile_names = [p.strip() for p in line.strip().split("=", 1)[-1].split(',')]
+                    self.flow_table.profile_names = [p.strip() for p in line.strip().split("=", 1)[-1].split(',')]
                     self.profile_names_line_idx = idx
-                elif "River Rch & RM=" in line:
-                    tokens = line.strip().split(',')
-                    if len(tokens) >= 2:
-                        self.river_name = tokens[0].replace("River Rch & RM=", "").strip()
-                        self.reach_name = tokens[1].strip()
-                    self.flow_values_line_idx = idx + 1
+                line = infile.readline()
+        self._source_profile_names = list(self.flow_table.profile_names)
 
         # Locate the start of the boundary block
         for idx, line in enumerate(self.flow_list):
-            if line.strip().startswith("Boundary for River Rch & Prof#"):
+            if isinstance(line, str) and line.strip().startswith("Boundary for River Rch & Prof#"):
                 self.boundary_end_index = idx + 4
                 break
 
-    def edit_profile(self, index, discharge, name=None):
+    def _update_header(self):
+        """
+        Rewrites the 'Number of Profiles=' and 'Profile Names=' lines if profiles were added or renamed
+        """
+        names = self.flow_table.profile_names
+        if names == self._source_profile_names:
+            return
+        if self.num_of_prof_line_idx is not None:
+            self.flow_list[self.num_of_prof_line_idx] = f"Number of Profiles= {len(names)} \n"
+        if self.profile_names_line_idx is not None:
+            self.flow_list[self.profile_names_line_idx] = f"Profile Names={','.join(names)}\n"
+        self._source_profile_names = list(names)
+
+    def edit_profile(self, index, discharge, name=None, location=-1):
         """
         Edits the discharge and optionally the name of an existing profile.
-        Updates Lines 4 and 6 (Profile Names and Discharge).
+        The discharge is set at one flow location, by default the last one in the file, which river_name and
+        reach_name are read from. Use flow_table.set_flows() to set the flows of a profile at every location.
+        :param location: index or (river, reach, station) of the flow location, see FlowTable.location_index()
         """
         if index < 0 or index >= self.num_of_prof:
             raise IndexError("Invalid profile index.")
 
-        # Update discharge
-        flows = self.flow_list[self.flow_values_line_idx].split()
-        flows[index] = str(discharge)
-        self.flow_list[self.flow_values_line_idx] = ''.join([format_float_fixed_width(val, 8) for val in flows]) + '\n'
-
-
-
+        self.flow_table.set_flows(discharge, profile=index, location=location)
         # Update profile name if provided
         if name:
-            self.profile_names[index] = name
-        updated_names = ','.join(self.profile_names)
-        self.flow_list[self.profile_names_line_idx] = f"Profile Names={updated_names}\n"
+            self.flow_table.profile_names[index] = name
 
     def add_profile(self, discharge, name):
         """
         Adds a new profile with specified discharge and name.
-        Updates Lines 3, 4, and 6.
+        discharge is a number that is set at every flow location, or a sequence of one discharge per location.
         """
-        self.num_of_prof += 1
-        self.flow_list[self.num_of_prof_line_idx] = f"Number of Profiles= {self.num_of_prof} \n"
-
-        # Append new name
-        self.profile_names.append(name)
-        updated_names = ','.join(self.profile_names)
-        self.flow_list[self.profile_names_line_idx] = f"Profile Names={updated_names}\n"
-
-        # Add new discharge value
-        flows = self.flow_list[self.flow_values_line_idx].split()
-        flows.append(str(discharge))
-        self.flow_list[self.flow_values_line_idx] = ''.join([format_float_fixed_width(val, 8) for val in flows]) + '\n'
-
+        self.flow_table.add_profile(name, discharge)
 
+    @staticmethod
+    def _format_internal_change(river_name, reach_name, river_station, ws_change):
+        river_name = river_name.ljust(16)
+        reach_name = reach_name.ljust(16)
+        station = f"{river_station}".ljust(8)
+        profile = " 1 "
+        type_code = " 4 "
+        ws_amt = f"{ws_change}".ljust(8)
+        return f"Set Internal Change={river_name},{reach_name},{station},{profile},{type_code},{ws_amt}\n"
 
+    def _first_internal_change_index(self):
+        """
+        Returns the flow_list index the first 'Set Internal Change=' line is added at, after the boundary block, or
+        at the first item that starts at or after line 9 of the file if there is none
+        """
+        if self.boundary_end_index:
+            return self.boundary_end_index + 1
+        num_lines = 0
+        for idx, item in enumerate(self.flow_list):
+            if num_lines >= 9:
+                return idx
+            num_lines += str(item).count("\n")
+        return len(self.flow_list)
 
     def add_internal_change_line(self, river_station: float | int, ws_change: float | int):
         """
         Adds a formatted 'Set Internal Change=' line using flow file metadata.
         Inserts after boundary block if none exists, or sorted by station if it does.
         """
-        river_name = self.river_name.ljust(16)
-        reach_name = self.reach_name.ljust(16)
-        station = f"{river_station}".ljust(8)
-        profile = " 1 "
-        type_code = " 4 "
-        ws_amt = f"{ws_change}".ljust(8)
-        ic_line = f"Set Internal Change={river_name},{reach_name},{station},{profile},{type_code},{ws_amt}\n"
+        self.add_internal_change_lines([(river_station, ws_change)])
 
-        ic_indices = []
-        for idx, line in enumerate(self.flow_list):
-            if isinstance(line, str) and line.startswith("Set Internal Change="):
-                try:
-                    station_val = float(line.strip().split(',')[2])
-                except ValueError:
-                    station_val = -1
-                ic_indices.append((idx, station_val))
-
-        if not ic_indices:
-            insert_index = (self.boundary_end_index + 1) if self.boundary_end_index else 9
-            self.flow_list.insert(insert_index, ic_line)
-        else:
-            new_station_val = float(river_station)
-            inserted = False
-            for i, (idx, existing_station) in enumerate(ic_indices):
-                if new_station_val > existing_station:
-                    self.flow_list.insert(idx, ic_line)
-                    inserted = True
-                    break
-            if not inserted:
-                last_ic_index = ic_indices[-1][0]
-                self.flow_list.insert(last_ic_index + 1, ic_line)
+    def add_internal_change_lines(self, changes):
+        """
+        Adds a 'Set Internal Change=' line for every (river_station, ws_change) in changes, the same as calling
+        add_internal_change_line() for each, but merges them with the existing lines in one pass.
+        """
+        lines = [self._format_internal_change(self.river_name, self.reach_name, river_station, ws_change)
+                 for river_station, ws_change in changes]
+        if not lines:
+            return
+        if self.internal_changes is None:
+            self.internal_changes = InternalChanges()
+        if not self.internal_changes.num_runs:
+            self.flow_list.insert(self._first_internal_change_index(), self.internal_changes.new_run())
+        self.internal_changes.add(lines)
 
     def export(self, outfilename):
         """
         Writes steady flow data to outfilename.
         """
+        self._update_header()
         with open(outfilename, "wt", newline="\r\n") as outfile:
             for item in self.flow_list:
                 outfile.write(str(item))
@@ -188,7 +232,8 @@ class SteadyFlow:
         Returns the full steady flow file content as a string.
         Enables `print(ffile)` to show the file.
         """
-        return ''.join(self.flow_list)
+        self._update_header()
+        return ''.join(str(item) for item in self.flow_list)
 
 
 class UnsteadyFlow:
@@ -196,15 +241,26 @@ class UnsteadyFlow:
     Imports RAS unsteady flow data in filename, i.e. project_name.u??
     """
 
-    def __init__(self, filename):
+    def __init__(self, filename, lazy=False):
+        """
+        :param filename: name of unsteady flow file
+        :param lazy: hydrograph ordinates are only read from the file when they are first accessed if True, and are
+                     otherwise exported as a copy of the original text. The file must not change while hydrographs
+                     have not been read, except by exporting to it.
+        """
         self.filename = filename
-        self.uflow_list = []
-
-        with open(filename, "rt") as infile:
+        self._index = BoundaryIndex()
+        self.uflow_list = TrackedList(owner=self._index)
+
+        with open(filename, "rb" if lazy else "rt") as infile:
+            source = None
+            if lazy:
+                source = SourceFile(filename, os.fstat(infile.fileno()))
+                infile = LineReader(infile)
             line = infile.readline()
             while line:
                 if Boundary.test(line):
-                    boundary = Boundary()
+                    boundary = Boundary(source)
                     line = boundary.import_geo(line, infile)
                     self.uflow_list.append(boundary)
                 else:
@@ -215,9 +271,13 @@ class UnsteadyFlow:
         """
         Writes unsteady flow data to outfilename.
         """
-        with open(outfilename, "wt", newline="\r\n") as outfile:
-            for line in self.uflow_list:
-                outfile.write(str(line))
+        with cached_sources():
+            # Ordinates that haven't been read are copied from the file, read it before outfilename is opened in
+            # case it is the same file
+            load_sources(self.uflow_list, outfilename)
+            with open(outfilename, "wt", newline="\r\n") as outfile:
+                for line in self.uflow_list:
+                    outfile.write(str(line))
 
     def get_boundaries(
         self, river=None, reach=None, station_value=None, hydrograph_type=None
@@ -229,37 +289,73 @@ class UnsteadyFlow:
         :param hydrograph_type: Optional string matching the boundary hydrograph type
         :return: List of matching Boundary instances
         """
-        boundaries = (item for item in self.uflow_list if isinstance(item, Boundary))
-        if river is not None:
-            boundaries = (bnd for bnd in boundaries if bnd.header.river_name == river)
-        if reach is not None:
-            boundaries = (bnd for bnd in boundaries if bnd.header.reach_name == reach)
+        low = high = None
+        by_station = False
         if station_value is not None:
             if isinstance(station_value, tuple):
                 assert len(station_value) == 2
-                if station_value[0] is not None:
-                    boundaries = (
-                        bnd
-                        for bnd in boundaries
-                        if bnd.header.station.value is not None
-                        and bnd.header.station.value >= station_value[0]
-                    )
-                if station_value[1] is not None:
-                    boundaries = (
-                        bnd
-                        for bnd in boundaries
-                        if bnd.header.station.value is not None
-                        and bnd.header.station.value <= station_value[1]
-                    )
+                low, high = station_value
+                by_station = low is not None or high is not None
             else:
-                boundaries = (
-                    bnd
-                    for bnd in boundaries
-                    if bnd.header.station.value == station_value
-                )
-        if hydrograph_type is not None:
-            boundaries = (
-                bnd for bnd in boundaries if bnd.hydrograph.type == hydrograph_type
-            )
-
-        return list(boundaries)
+                low = high = station_value
+                by_station = True
+        return self._boundary_index().find(river, reach, low, high, by_station, hydrograph_type)
+
+    def _boundary_index(self):
+        """
+        Returns the index of boundaries, updated for the current uflow_list
+        """
+        if type(self.uflow_list) is not TrackedList or self.uflow_list.owner is not self._index:
+            # uflow_list was replaced with a list that doesn't report changes
+            self._index.mark_dirty()
+        self._index.update(self.uflow_list)
+        return self._index
+
+    def _hydrograph_boundaries(self, river, reach, station_value, hydrograph_type):
+        """
+        Returns the boundaries matching get_boundaries() that have a hydrograph
+        """
+        return [
+            bnd
+            for bnd in self.get_boundaries(river, reach, station_value, hydrograph_type)
+            if bnd.hydrograph.type is not None
+        ]
+
+    def scale_hydrographs(
+        self, factor, river=None, reach=None, station_value=None, hydrograph_type=None
+    ):
+        """Multiplies the ordinates of every matching boundary hydrograph by factor
+        :param factor: number every ordinate is multiplied by
+        :param river, reach, station_value, hydrograph_type: select boundaries, see get_boundaries()
+        :return: List of changed Boundary instances
+        """
+        boundaries = self._hydrograph_boundaries(river, reach, station_value, hydrograph_type)
+        for bnd in boundaries:
+            bnd.hydrograph.scale(factor)
+        return boundaries
+
+    def shift_hydrographs(
+        self, steps, river=None, reach=None, station_value=None, hydrograph_type=None
+    ):
+        """Shifts every matching boundary hydrograph later in time by steps intervals, see Hydrograph.shift()
+        :param steps: int, number of intervals, negative shifts earlier
+        :param river, reach, station_value, hydrograph_type: select boundaries, see get_boundaries()
+        :return: List of changed Boundary instances
+        """
+        boundaries = self._hydrograph_boundaries(river, reach, station_value, hydrograph_type)
+        for bnd in boundaries:
+            bnd.hydrograph.shift(steps)
+        return boundaries
+
+    def replace_hydrographs(
+        self, values, river=None, reach=None, station_value=None, hydrograph_type=None
+    ):
+        """Replaces the ordinates of every matching boundary hydrograph with values
+        :param values: sequence of numbers or NumPy array, the number of ordinates may change
+        :param river, reach, station_value, hydrograph_type: select boundaries, see get_boundaries()
+        :return: List of changed Boundary instances
+        """
+        boundaries = self._hydrograph_boundaries(river, reach, station_value, hydrograph_type)
+        for bnd in boundaries:
+            bnd.hydrograph.values = values
+        return boundaries
@@ -8,12 +8,22 @@ Mike Bannister 2/24/2016
 mike.bannister@respec.com
 
 """
+import io
+import locale
 import os.path
 import warnings
+from itertools import accumulate
+from operator import length_hint
 
 from .features import (
     Bridge, CrossSection, Culvert, Junction, InlineWeir, LateralWeir, RiverReach
 )
+from .features.cross_section import ChannelNError
+from .features.tools import LineReader, LineRecorder
+from .features.tracked import SourceFile, TrackedList, cached_sources, load_sources, untracked
+from .cache import GeometryCache
+from .columnar import CrossSectionColumns
+from .index import GeoIndex
 
 
 # TODO - create geolist object
@@ -25,20 +35,211 @@ class CrossSectionNotFound(Exception):
 class CulvertNotFound(Exception):
     pass
 
+# Features that start with a 'Type RM Length L Ch R =' line, keyed on the node type digit
+NODE_TYPES = {
+    '1': CrossSection,
+    '2': Culvert,
+    '3': Bridge,
+    '5': InlineWeir,
+    '6': LateralWeir,
+}
+
+# Features identified by the text in front of the first '=' on the line
+NAME_PREFIXES = {
+    'River Reach': RiverReach,
+    'Junct Name': Junction,
+}
+
+NODE_TYPE_PREFIX = 'Type RM Length L Ch R '
+
+
+def classify(line):
+    """
+    Returns the feature class that starts on line, or None if line is not the first line of a known feature.
+    This does a single dictionary lookup instead of testing every feature in turn, most lines in a geometry file
+    are unknown and are rejected without any slicing.
+
+    :param line: line from geometry file
+    :return: feature class or None
+    """
+    prefix, equals, remainder = line.partition('=')
+    if not equals:
+        return None
+    if prefix == NODE_TYPE_PREFIX:
+        feature_class = NODE_TYPES.get(remainder[1:2])
+    else:
+        feature_class = NAME_PREFIXES.get(prefix)
+    # Confirm with the feature's own test in case it is more specific than the lookup
+    if feature_class is not None and feature_class.test(line):
+        return feature_class
+    return None
+
+
+def new_feature(feature_class, river, reach, debug=False, compact=False):
+    """
+    Creates an empty instance of feature_class for the current river and reach
+    """
+    if feature_class is RiverReach:
+        return RiverReach(debug)
+    if feature_class is Junction:
+        return Junction()
+    if feature_class is CrossSection:
+        return CrossSection(river, reach, debug, compact)
+    if feature_class is Culvert:
+        return Culvert(river, reach, debug)
+    return feature_class(river, reach)
+
+
+def skip_node(line, geo_file):
+    """
+    Skips the rest of a node, up to and including the blank line that ends it. Descriptions may contain blank lines
+    and are skipped as a whole.
+
+    :param line: current line of geo_file
+    :param geo_file: geometry file object
+    """
+    while line != '\n':
+        if line == 'BEGIN DESCRIPTION:\n':
+            while line != 'END DESCRIPTION:\n':
+                line = next(geo_file)
+        line = next(geo_file)
+
+
+def iter_features(geo_filename, debug=False, lazy=False, compact=False, track=False):
+    """
+    Generator that imports geometry file geo_filename one feature at a time. Yields RiverReach, CrossSection,
+    Culvert, Bridge, LateralWeir, InlineWeir, and Junction instances, and unknown lines as strings, in the order they
+    appear in the file. Only the current feature is held in memory unless track is True.
+
+    :param geo_filename: name of geometry file to import
+    :param debug: prints debugging information if True
+    :param lazy: defers importing cross sections, see ParseRASGeo
+    :param compact: stores cross section station/elevation points in arrays, see ParseRASGeo
+    :param track: features keep the byte range of the text they were imported from and write it until they are
+                  changed, see Tracked. The whole file is read into memory while it is imported. Features always keep
+                  the location of their text in lazy mode.
+    """
+    # TODO - add 'debug' to all objects
+    with open(geo_filename, 'rb' if lazy or track else 'rt') as geo_file:
+        source_file = SourceFile(geo_filename, os.fstat(geo_file.fileno()))
+        lines = offsets = encoding = None
+        if lazy:
+            # Track byte offsets so deferred cross sections can be imported later
+            geo_file = LineReader(geo_file)
+        elif track:
+            # The position in a list iterator is available without slowing down every line
+            lines, offsets, encoding = read_lines(geo_file)
+            geo_file = iter(lines)
+        for item in _import_features(geo_file, source_file, lines, debug, lazy, compact, offsets, encoding):
+            yield item
+
+
+def read_lines(geo_file):
+    """
+    Reads binary file geo_file, see iter_features()
+
+    :return: (lines, offsets, encoding) - lines decoded the same way as a file opened with 'rt', byte offset of the
+             start of every line followed by the end of the file, or None if they don't match the lines, and encoding
+    """
+    raw = geo_file.read()
+    encoding = locale.getpreferredencoding(False)
+    lines = io.TextIOWrapper(io.BytesIO(raw), encoding).readlines()
+    offsets = [0]
+    offsets.extend(accumulate(map(len, raw.splitlines(True))))
+    if len(offsets) != len(lines) + 1:
+        offsets = None
+    return lines, offsets, encoding
+
+
+def _import_features(geo_file, source_file, lines, debug, lazy, compact, offsets=None, encoding=None):
+    """
+    Generator that does the work of iter_features(). geo_file is a LineReader in lazy mode, an iterator over lines
+    when lines is not None, and otherwise a text file or a LineRecorder. source_file is the SourceFile that byte range
+    sources refer to. Features imported from lines keep the byte range of their lines if offsets of the lines in
+    encoding are given, otherwise a copy of them, and features imported from a LineRecorder keep a copy of their text.
+    """
+    river = reach = None
+    for line in geo_file:
+        feature_class = classify(line)
+        if feature_class is None:
+            # Unknown line encountered. Store it as text.
+            yield line
+            continue
+
+        feature = new_feature(feature_class, river, reach, debug, compact)
+        if lazy:
+            start = geo_file.line_start
+            if feature_class is CrossSection:
+                line = feature.header.import_geo(line, geo_file)
+                skip_node(line, geo_file)
+                feature.defer_import((source_file, start, geo_file.offset, geo_file.encoding))
+            else:
+                feature.import_geo(line, geo_file)
+            feature.mark_clean((source_file, start, geo_file.offset, geo_file.encoding))
+        elif lines is not None:
+            start = len(lines) - length_hint(geo_file) - 1
+            feature.import_geo(line, geo_file)
+            end = len(lines) - length_hint(geo_file)
+            if offsets is None:
+                feature.mark_clean(''.join(lines[start:end]))
+            else:
+                feature.mark_clean((source_file, offsets[start], offsets[end], encoding))
+        elif isinstance(geo_file, LineRecorder):
+            geo_file.start(line)
+            feature.import_geo(line, geo_file)
+            feature.mark_clean(geo_file.text())
+        else:
+            feature.import_geo(line, geo_file)
+        if feature_class is RiverReach:
+            river, reach = feature.header.river_name, feature.header.reach_name
+        yield feature
+
+
+def transform(in_geo_filename, out_geo_filename, fn, debug=False):
+    """
+    Streams in_geo_filename to out_geo_filename one feature at a time, passing every feature and unknown line
+    through fn before it is written. Only the current feature is held in memory and writing starts before the input
+    has been fully read. Features that fn doesn't change are written exactly as they were read, the same as
+    ParseRASGeo.write().
+
+    :param in_geo_filename: name of geometry file to read
+    :param out_geo_filename: name of geometry file to write, must be different than in_geo_filename
+    :param fn: callable that accepts a feature or unknown line (string) and returns the item to write, or None to
+               write the item it was passed, e.g. after changing it in place
+    :param debug: prints debugging information if True
+    """
+    if os.path.exists(out_geo_filename) and os.path.samefile(in_geo_filename, out_geo_filename):
+        raise AttributeError('transform() can not write over the file it is reading: ' + str(in_geo_filename))
+
+    with open(in_geo_filename, 'rt') as infile, open(out_geo_filename, 'wt', newline='\r\n') as outfile:
+        # Features keep their text until they are written, see Tracked
+        geo_file = LineRecorder(infile)
+        for item in _import_features(geo_file, None, None, debug, False, False):
+            result = fn(item)
+            if result is None:
+                result = item
+            outfile.write(str(result))
+
+
 class ParseRASGeo(object):
-    def __init__(self, geo_filename, chatty=False, debug=False):
+    def __init__(self, geo_filename, chatty=False, debug=False, lazy=False, compact=False, cache=None):
+        """
+        :param geo_filename: name of geometry file to import
+        :param chatty: prints the number of features imported if True, see instrument for timings of every feature
+        :param debug: prints debugging information if True
+        :param lazy: only headers of cross sections are imported if True, the rest of a cross section is imported
+                     the first time it is accessed. Cross sections that are never accessed are copied to the output
+                     unchanged. write() raises ValueError if the geometry file has changed since it was imported,
+                     except by writing to it.
+        :param compact: stores cross section station/elevation points in two arrays with binary search for station
+                        lookups if True, see StationElevationArray. Uses less memory for large models.
+        :param cache: GeometryCache, or name of a cache directory. If the geometry file has not changed since it was
+                      last imported with the same options, the features are loaded from the cache instead of parsed.
+        """
         # add  test for file existence
         self.geo_list = []
-        num_xs = 0
-        num_river = 0
-        num_bridge = 0
-        num_culvert = 0
-        num_lat_weir = 0
-        num_inline_weir = 0
-        num_junc = 0
+        counts = dict.fromkeys(list(NODE_TYPES.values()) + list(NAME_PREFIXES.values()), 0)
         num_unknown = 0
-        river = None
-        reach = None
 
         if debug:
             print('Debugging is turned on')
@@ -49,63 +250,166 @@ class ParseRASGeo(object):
         if not os.path.isfile(geo_filename):
             raise AttributeError('File ' + str(geo_filename) + ' does not appear to exist.')
 
-        # TODO - add 'debug' to all objects
-        with open(geo_filename, 'rt') as geo_file:
-            for line in geo_file:
-                if RiverReach.test(line):
-                    rr = RiverReach(debug)
-                    rr.import_geo(line, geo_file)
-                    river, reach = rr.header.river_name, rr.header.reach_name
-                    num_river += 1
-                    self.geo_list.append(rr)
-                elif CrossSection.test(line):
-                    xs = CrossSection(river, reach, debug)
-                    xs.import_geo(line, geo_file)
-                    num_xs += 1
-                    self.geo_list.append(xs)
-                elif Culvert.test(line):
-                    culvert = Culvert(river, reach, debug)
-                    culvert.import_geo(line, geo_file)
-                    num_culvert += 1
-                    self.geo_list.append(culvert)
-                elif Bridge.test(line):
-                    bridge = Bridge(river, reach)
-                    bridge.import_geo(line, geo_file)
-                    num_bridge += 1
-                    self.geo_list.append(bridge)
-                elif LateralWeir.test(line):
-                    lat_weir = LateralWeir(river, reach)
-                    lat_weir.import_geo(line, geo_file)
-                    num_lat_weir += 1
-                    self.geo_list.append(lat_weir)
-                elif InlineWeir.test(line):
-                    lat_weir = InlineWeir(river, reach)
-                    lat_weir.import_geo(line, geo_file)
-                    num_inline_weir += 1
-                    self.geo_list.append(lat_weir)
-                elif Junction.test(line):
-                    junc = Junction()
-                    junc.import_geo(line, geo_file)
-                    num_junc += 1
-                    self.geo_list.append(junc)
+        if cache is not None and not isinstance(cache, GeometryCache):
+            cache = GeometryCache(cache)
+        # Every feature is marked clean after it is imported, so attributes are set without tracking changes
+        with untracked():
+            items = None
+            if cache is not None:
+                options = {'lazy': lazy, 'compact': compact}
+                header = cache.file_header(geo_filename, options)
+                items = cache.load(geo_filename, options, header)
+            if items is None:
+                if cache is not None:
+                    items = list(iter_features(geo_filename, debug, lazy, compact, track=True))
                 else:
-                    # Unknown line encountered. Store it as text.
-                    self.geo_list.append(line)
+                    items = iter_features(geo_filename, debug, lazy, compact, track=True)
+                if cache is not None:
+                    cache.store(geo_filename, options, items, header)
+
+            for item in items:
+                if isinstance(item, str):
                     num_unknown += 1
+                else:
+                    counts[type(item)] += 1
+                self.geo_list.append(item)
+        # Cross sections and culverts are looked up by river, reach and station with an index that is rebuilt when
+        # geo_list changes
+        self._index = GeoIndex()
+        self.geo_list = TrackedList(self.geo_list, self._index)
         if chatty:
-            print(str(num_river)+' rivers/reaches imported')
-            print(str(num_junc)+' junctions imported')
-            print(str(num_xs)+' cross sections imported')
-            print(str(num_bridge)+' bridge imported')
-            print(str(num_culvert)+' culverts imported')
-            print(str(num_lat_weir)+' lateral structures imported')
-            print(str(num_inline_weir)+' lateral structures imported')
+            print(str(counts[RiverReach])+' rivers/reaches imported')
+            print(str(counts[Junction])+' junctions imported')
+            print(str(counts[CrossSection])+' cross sections imported')
+            print(str(counts[Bridge])+' bridge imported')
+            print(str(counts[Culvert])+' culverts imported')
+            print(str(counts[LateralWeir])+' lateral structures imported')
+            print(str(counts[InlineWeir])+' lateral structures imported')
             print(str(num_unknown) + ' unknown lines imported')
 
+    def clone(self):
+        """
+        Returns an independent copy of the geometry, for making many variations of one geometry without importing it
+        again. Unknown lines and the text of unchanged features are shared, and the parts of cross sections are shared
+        until they are first accessed on either copy, see CrossSection.clone(), so cloning is fast and copies that
+        only change a few parts use little memory. Changing one copy never changes the other.
+
+        :return: ParseRASGeo
+        """
+        clone = object.__new__(type(self))
+        clone._index = GeoIndex()
+        clone.geo_list = TrackedList([item if isinstance(item, str) else item.clone() for item in self.geo_list],
+                                     clone._index)
+        return clone
+
+    def snapshot(self):
+        """
+        Saves the numbers of every cross section: reach lengths, station/elevation points, ineffective flow areas,
+        obstructions, Manning's n values, bank stations and skew, along with which cross sections are unchanged.
+        Text and other features are not saved. Values that are not changed in place, e.g. tuples of points, are shared
+        with the cross sections, so a snapshot is small and fast to take.
+
+        :return: token for restore()
+        """
+        return [(item, item.get_state()) for item in self.geo_list if isinstance(item, CrossSection)]
+
+    def restore(self, token):
+        """
+        Resets the cross sections saved by snapshot() to the saved numbers. Cross sections that were unchanged when the
+        snapshot was taken are written as they were imported again. A token may be restored any number of times.
+
+        :param token: result of snapshot()
+        """
+        for xs, state in token:
+            xs.set_state(state)
+
+    def scale_mannings_n(self, regions, overlap='error'):
+        """
+        Multiplies the Manning's n values of the left overbank, channel and right overbank of the cross sections in
+        every region, see CrossSection.scale_mannings_n(). n values are added at the bank stations first if they are
+        missing. The multipliers of every cross section are resolved first, then every cross section is checked before
+        any is changed, so either all of them are scaled or none are. Cross sections without n values are skipped.
+
+            geo.scale_mannings_n({('Boulder Creek', 'Upper'): (1.2, 1.1, 1.2), (1000, 2000): (1.0, 0.9, 1.0)},
+                                 overlap='last')
+
+        :param regions: dict of {region: (left, channel, right)}. A region is (river, reach), a (low, high) range of
+                        stations on every reach, or (river, reach, low, high). left multiplies n values left of the
+                        left bank station, channel those from the left bank station up to the right bank station, and
+                        right those from the right bank station on.
+        :param overlap: how cross sections in more than one region are scaled: 'error' raises ValueError, 'first' and
+                        'last' use the multipliers of the first or last of those regions in the order of regions, and
+                        'multiply' multiplies their multipliers
+        :return: list of the scaled CrossSection instances
+        Raises ChannelNError, without changing any cross section, if a cross section has no bank stations or a bank
+        station is left of its first n value
+        """
+        if overlap not in ('error', 'first', 'last', 'multiply'):
+            raise ValueError("overlap must be 'error', 'first', 'last' or 'multiply', not " + repr(overlap))
+        # {id(xs): [xs, (left, channel, right), region]}, in the order cross sections are first found
+        selected = {}
+        for region, multipliers in regions.items():
+            left, channel, right = multipliers
+            for xs in self._region_cross_sections(region):
+                if not xs.mannings_n.values:
+                    continue
+                entry = selected.get(id(xs))
+                if entry is None:
+                    selected[id(xs)] = [xs, (left, channel, right), region]
+                elif overlap == 'error':
+                    raise ValueError('Cross section {} {} {} is in regions {} and {}'.format(
+                        xs.river, xs.reach, xs.header.station.id, entry[2], region))
+                elif overlap == 'last':
+                    entry[1] = (left, channel, right)
+                elif overlap == 'multiply':
+                    entry[1] = (entry[1][0] * left, entry[1][1] * channel, entry[1][2] * right)
+
+        new_values = []
+        errors = []
+        for xs, multipliers, region in selected.values():
+            try:
+                new_values.append((xs, xs.scaled_mannings_n(*multipliers)))
+            except ChannelNError as error:
+                errors.append(str(error))
+        if errors:
+            raise ChannelNError('No cross sections were scaled: ' + '; '.join(errors))
+        for xs, values in new_values:
+            xs.mannings_n.values = values
+        return [xs for xs, values in new_values]
+
+    def _region_cross_sections(self, region):
+        """
+        Returns list of the cross sections in region of scale_mannings_n()
+        """
+        region = tuple(region)
+        if len(region) == 2 and isinstance(region[0], str):
+            return self.get_cross_sections(river=region[0], reach=region[1])
+        if len(region) == 2:
+            return self.get_cross_sections(station_value=region)
+        if len(region) == 4:
+            return self.get_cross_sections(station_value=region[2:], river=region[0], reach=region[1])
+        raise ValueError('Region must be (river, reach), (low, high) or (river, reach, low, high), not ' + str(region))
+
+    def to_columnar(self, station_value=None, river=None, reach=None):
+        """
+        Returns arrays of the geometry of the matching cross sections, see CrossSectionColumns. Edits to the arrays
+        are written to the cross sections by calling write_back() on the result. Requires NumPy.
+
+        :param station_value: Optional float or 2-tuple range of stations, see get_cross_sections()
+        :param river: Optional string of the name of river
+        :param reach: Optional string of the name of reach
+        :return: CrossSectionColumns
+        """
+        return CrossSectionColumns(self.get_cross_sections(station_value=station_value, river=river, reach=reach))
+
     def write(self, out_geo_filename):
-        with open(out_geo_filename, 'wt', newline='\r\n') as outfile:
-            for line in self.geo_list:
-                outfile.write(str(line))
+        with cached_sources():
+            # Unchanged features are copied from the file they were imported from, read it before out_geo_filename
+            # is opened in case it is the same file
+            load_sources(self.geo_list, out_geo_filename)
+            with open(out_geo_filename, 'wt', newline='\r\n') as outfile:
+                for line in self.geo_list:
+                    outfile.write(str(line))
 
     def get_cross_sections(
             self,
@@ -123,42 +427,40 @@ class ParseRASGeo(object):
         :param interpolated: Optional bool to select based on if the CrossSection was interpolated
         :return: List of matching CrossSection instances
         """
-        # Linear Search is the most efficient strategy at the moment
-        cross_sections = (item for item in self.geo_list if isinstance(item, CrossSection))
-        if station_id is not None:
-            cross_sections = (
-                xs for xs in cross_sections if xs.header.station.id == station_id
-            )
+        low = high = None
+        by_station = False
         if station_value is not None:
             if isinstance(station_value, tuple):
                 assert len(station_value) == 2
-                if station_value[0] is not None:
-                    cross_sections = (
-                        xs for xs in cross_sections
-                        if xs.header.station.value >= station_value[0]
-                    )
-                if station_value[1] is not None:
-                    cross_sections = (
-                        xs for xs in cross_sections
-                        if xs.header.station.value <= station_value[1]
-                    )
+                low, high = station_value
+                by_station = low is not None or high is not None
             else:
-                cross_sections = (
-                    xs for xs in cross_sections
-                    if xs.header.station.value == station_value
-                )
-        if river is not None:
-            cross_sections = (xs for xs in cross_sections if xs.river == river)
-        if reach is not None:
-            cross_sections = (xs for xs in cross_sections if xs.reach == reach)
+                low = high = station_value
+                by_station = True
+        cross_sections = self._geo_index().find(CrossSection, river, reach, low, high, by_station)
+        # Headers are only read, so those of cloned cross sections are not copied
+        if station_id is not None:
+            cross_sections = (
+                xs for xs in cross_sections if xs._peek('header').station.id == station_id
+            )
         if interpolated is not None:
             cross_sections = (
                 xs for xs in cross_sections
-                if xs.header.station.is_interpolated == bool(interpolated)
+                if xs._peek('header').station.is_interpolated == bool(interpolated)
             )
 
         return list(cross_sections)
 
+    def _geo_index(self):
+        """
+        Returns the index of cross sections and culverts, updated for the current geo_list
+        """
+        if type(self.geo_list) is not TrackedList or self.geo_list.owner is not self._index:
+            # geo_list was replaced with a list that doesn't report changes
+            self._index.mark_dirty()
+        self._index.update(self.geo_list)
+        return self._index
+
     def return_xs_by_id(self, xs_id, rnd=False, digits=0):
         """
         Returns XS with ID xs_id. Rounds XS ids to digits decimal places if (rnd==True)
@@ -171,7 +473,14 @@ class ParseRASGeo(object):
             "return_xs_by_id is deprecated, use get_cross_sections instead",
             FutureWarning,
         )
-        for item in self.geo_list:
+        if rnd:
+            # Every station that rounds to xs_id is inside this window
+            window = 10.0 ** -digits
+            candidates = self._geo_index().find(CrossSection, low=round(xs_id, digits) - window,
+                                                high=round(xs_id, digits) + window, by_station=True)
+        else:
+            candidates = self._geo_index().find(CrossSection, low=xs_id, high=xs_id, by_station=True)
+        for item in candidates:
             if isinstance(item, CrossSection):
                 if rnd:
                     if round(item.header.station.value, digits) == round(xs_id, digits):
@@ -222,15 +531,7 @@ class ParseRASGeo(object):
         :param reach: Optional string of the name of reach
         :return: List of matching Culvert instances
         """
-        culverts = (item for item in self.geo_list if isinstance(item, Culvert))
-        if station is not None:
-            culverts = (c for c in culverts if c.header.station == station)
-        if river is not None:
-            culverts = (c for c in culverts if c.river == river)
-        if reach is not None:
-            culverts = (c for c in culverts if c.reach == reach)
-
-        return list(culverts)
+        return self._geo_index().find(Culvert, river, reach, station, station, station is not None)
 
     def extract_all_xs(self):
         """
@@ -337,7 +638,21 @@ class ParseRASGeo(object):
         if rnd:
             wanted_node_id = round(node_id, digits)
 
-        for item in self.geo_list:
+        # Only nodes on the wanted river/reach and near the wanted station are checked
+        if strip:
+            candidate_river = candidate_reach = None
+            def match(test_river, test_reach):
+                return (isinstance(test_river, str) and isinstance(test_reach, str) and
+                        test_river.strip() == wanted_river and test_reach.strip() == wanted_reach)
+        else:
+            candidate_river, candidate_reach = river, reach
+            match = None
+        low = high = wanted_node_id
+        if rnd:
+            low, high = wanted_node_id - 10.0 ** -digits, wanted_node_id + 10.0 ** -digits
+        candidates = self._geo_index().find(node_type, candidate_river, candidate_reach, low, high, True, match)
+
+        for item in candidates:
             if isinstance(item, node_type):
                 test_river = item.river
                 test_reach = item.reach
@@ -0,0 +1,181 @@
+"""
+Writes many variants of one geometry that differ only in Manning's n values, see GeometryTemplate
+
+    template = GeometryTemplate(ParseRASGeo('model.g01'))
+    rows = [[1.0 + 0.1 * i] * len(template) for i in range(500)]
+    template.write_many(['variant%03d.g01' % i for i in range(500)], rows, workers=4)
+"""
+import locale
+from concurrent.futures import ProcessPoolExecutor
+from numbers import Number
+
+from .features import CrossSection
+from .features.cross_section import mannings_n_header
+from .features.tools import print_list_by_group
+from .features.tracked import cached_sources
+
+# Template used by worker processes of write_many()
+_worker_template = None
+
+
+def find_mannings_n(text):
+    """
+    Returns (start, end) character offsets of the '#Mann=' block in the text of a cross section, or None
+    """
+    start = text.find('\n#Mann=')
+    if start == -1:
+        return None
+    start += 1
+    end = text.index('\n', start) + 1
+    # Values follow on lines that start the same way as when they are imported, see Mannings_n
+    while text[end:end + 1] in (' ', '-', '.') or text[end:end + 1].isdigit():
+        end = text.index('\n', end) + 1
+    return start, end
+
+
+class MannSlot(object):
+    """
+    Manning's n block of one cross section in a GeometryTemplate
+    """
+    __slots__ = ('river', 'reach', 'station', 'n_values')
+
+    def __init__(self, river, reach, station, n_values):
+        self.river = river
+        self.reach = reach
+        self.station = station
+        self.n_values = n_values  # n values of the template geometry
+
+    def new_values(self, value):
+        """
+        Returns list of n values for value in a row, see GeometryTemplate.render()
+        """
+        if value is None:
+            return list(self.n_values)
+        if isinstance(value, Number):
+            return [n * value for n in self.n_values]
+        value = list(value)
+        if len(value) != len(self.n_values):
+            raise ValueError('{} n values given for cross section {} on {}/{}, which has {}'.format(
+                len(value), self.station, self.river, self.reach, len(self.n_values)))
+        return value
+
+
+def format_fields(values):
+    """
+    Returns list of values formatted the same way print_list_by_group() formats them, all at once
+    """
+    if not values:
+        return []
+    return print_list_by_group(values, 8, 1).split('\n')[:-1]
+
+
+def mannings_n_template(values, horizontal):
+    """
+    Returns text of a '#Mann=' block, the same as Mannings_n writes it, with %s in place of the n values
+    """
+    fields = []
+    for sta, other in zip(format_fields([value[0] for value in values]), format_fields([value[2] for value in values])):
+        fields += [sta, '%s', other]
+    lines = [mannings_n_header(len(values), horizontal)]
+    for start in range(0, len(fields), 9):
+        lines.append(''.join(fields[start:start + 9]) + '\n')
+    return ''.join(lines)
+
+
+class GeometryTemplate(object):
+    def __init__(self, geo, select=None, encoding=None):
+        """
+        Splits the text of geometry geo into static text and a slot for the n values in the Manning's n block of every
+        cross section. Writing a variant only formats the n values and fills them in, the number of n values and their
+        stations stay the same. geo is not changed, and later changes to it do not change the template.
+
+        :param geo: ParseRASGeo
+        :param select: optional callable that is passed a CrossSection and returns True if its Manning's n values are
+                       a slot. Defaults to all cross sections.
+        :param encoding: encoding of the written files, defaults to the same encoding ParseRASGeo.write() uses
+        """
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.slots = []
+        text = []
+        with cached_sources():
+            for item in geo.geo_list:
+                if not isinstance(item, CrossSection) or (select is not None and not select(item)):
+                    text.append(str(item).replace('%', '%%'))
+                    continue
+                xs_text = str(item)
+                span = find_mannings_n(xs_text)
+                if span is None:
+                    text.append(xs_text.replace('%', '%%'))
+                    continue
+                mannings_n = item.mannings_n
+                text.append(xs_text[:span[0]].replace('%', '%%'))
+                text.append(mannings_n_template(mannings_n.values, mannings_n.horizontal))
+                text.append(xs_text[span[1]:].replace('%', '%%'))
+                self.slots.append(MannSlot(item.river, item.reach, item.header.station.id,
+                                           tuple(value[1] for value in mannings_n.values)))
+        # Text of the whole file with %s for every n value, ready to be filled in by render()
+        self.template = ''.join(text).replace('\n', '\r\n')
+
+    def __len__(self):
+        return len(self.slots)
+
+    def slot_names(self):
+        """
+        Returns [(river, reach, station), ...] of the cross sections of the slots, in the order row values are given
+        """
+        return [(slot.river, slot.reach, slot.station) for slot in self.slots]
+
+    def render(self, row):
+        """
+        Returns bytes of a geometry file with the n values in row
+
+        :param row: one value for each slot: None for the n values of the template geometry, a number that every n
+                    value of the cross section is multiplied by, or a sequence of new n values, one for each station
+        :return: bytes
+        """
+        row = list(row)
+        if len(row) != len(self.slots):
+            raise ValueError('{} values given for {} slots'.format(len(row), len(self.slots)))
+        n_values = []
+        for slot, value in zip(self.slots, row):
+            n_values += slot.new_values(value)
+        return (self.template % tuple(format_fields(n_values))).encode(self.encoding)
+
+    def write(self, out_geo_filename, row):
+        """
+        Writes a geometry file with the n values in row, see render()
+        """
+        with open(out_geo_filename, 'wb') as outfile:
+            outfile.write(self.render(row))
+
+    def write_many(self, out_geo_filenames, rows, workers=None):
+        """
+        Writes one geometry file for each row. Files are written with a pool of worker processes if workers is greater
+        than 1, the template is sent to each worker once. Scripts that use workers must guard their entry point with
+        if __name__ == '__main__': on Windows.
+
+        :param out_geo_filenames: names of the files to write
+        :param rows: one row of values for each file, see render()
+        :param workers: number of worker processes, files are written in this process if None or 1
+        """
+        out_geo_filenames = list(out_geo_filenames)
+        rows = list(rows)
+        if len(out_geo_filenames) != len(rows):
+            raise ValueError('{} file names given for {} rows'.format(len(out_geo_filenames), len(rows)))
+        if workers is None or workers <= 1:
+            for out_geo_filename, row in zip(out_geo_filenames, rows):
+                self.write(out_geo_filename, row)
+            return
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as executor:
+            chunksize = max(1, len(rows) // (workers * 4))
+            # Raises the first exception from a worker
+            list(executor.map(_write_variant, out_geo_filenames, rows, chunksize=chunksize))
+
+
+def _init_worker(template):
+    global _worker_template
+    _worker_template = template
+
+
+def _write_variant(out_geo_filename, row):
+    _worker_template.write(out_geo_filename, row)
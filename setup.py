@@ -3,4 +3,5 @@ from setuptools import setup
 setup(name='parserasgeo', version='0.16',
       description='Read and write HEC-RAS geometry files',
       author='Mike Bannister, Chunyao Yang', author_email='mikebannis@gmail.com, cyyang411@gmail.com',
-      packages=['parserasgeo', 'parserasgeo.features'])
+      packages=['parserasgeo', 'parserasgeo.features'],
+      extras_require={'numpy': ['numpy']})
@@ -0,0 +1,29 @@
+"""
+Sample geometry, steady flow and unsteady flow files for the tests are generated with benchmarks.generate, the same
+files the benchmarks use
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generate import generate
+
+# geo_test.py is a Python 2 script that round trips the models in ../geos, it is run directly, not by pytest
+collect_ignore = ['geo_test.py']
+
+
+@pytest.fixture(scope='session')
+def sample_files(tmp_path_factory):
+    """
+    dict of sample file names keyed by 'geometry', 'steady' and 'unsteady'
+    """
+    return generate(str(tmp_path_factory.mktemp('samples')), reaches=3, cross_sections=40, points=40,
+                    culvert_every=11, profiles=4, hydrograph_length=120)
+
+
+def read_bytes(filename):
+    with open(filename, 'rb') as infile:
+        return infile.read()
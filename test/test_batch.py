@@ -0,0 +1,55 @@
+"""
+load_many() imports every file it is given, with the same results as ParseRASGeo, and reports files that can't be
+imported instead of stopping
+"""
+import shutil
+
+import pytest
+
+from parserasgeo import ParseRASGeo, load_many
+
+
+@pytest.fixture
+def geometry_files(sample_files, tmp_path):
+    """
+    Three copies of the sample geometry, each with a different first cross section channel length
+    """
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / 'model{}.g01'.format(i))
+        shutil.copy(sample_files['geometry'], path)
+        geo = ParseRASGeo(path)
+        geo.get_cross_sections()[0].header.channel_length = 100.0 + i
+        geo.write(path)
+        paths.append(path)
+    return paths
+
+
+def channel_length(geo):
+    return geo.get_cross_sections()[0].header.channel_length
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_load_many_loads_every_file(geometry_files, tmp_path, workers):
+    missing = str(tmp_path / 'missing.g01')
+    paths = geometry_files[:2] + [missing] + geometry_files[2:]
+    progress = []
+    results = list(load_many(paths, workers=workers, progress=lambda *args: progress.append(args)))
+
+    if workers == 1:
+        assert [path for path, _ in results] == paths
+    assert sorted(path for path, _ in results) == sorted(paths)
+    assert [done for done, _, _ in progress] == [1, 2, 3, 4]
+    assert all(total == 4 for _, total, _ in progress)
+    for path, result in results:
+        if path == missing:
+            assert isinstance(result, AttributeError)
+        else:
+            assert isinstance(result, ParseRASGeo)
+            assert channel_length(result) == 100.0 + geometry_files.index(path)
+
+
+def test_load_many_passes_options(geometry_files):
+    for path, geo in load_many(geometry_files, workers=1, compact=True):
+        assert geo.get_cross_sections()[0].compact
+        assert channel_length(geo) == 100.0 + geometry_files.index(path)
@@ -0,0 +1,76 @@
+"""
+Edits to the arrays of to_columnar() are written back to the cross sections they belong to, and to no others
+"""
+import pytest
+
+from parserasgeo import ParseRASGeo
+
+from conftest import read_bytes
+
+np = pytest.importorskip('numpy')
+
+
+def write(geo, tmp_path, name):
+    out = str(tmp_path / name)
+    geo.write(out)
+    return read_bytes(out)
+
+
+def cross_section_text(filename):
+    return [str(xs) for xs in ParseRASGeo(filename).get_cross_sections()]
+
+
+@pytest.mark.parametrize('options', [{}, {'lazy': True}, {'compact': True}])
+def test_unchanged_columns_write_nothing(sample_files, tmp_path, options):
+    geo = ParseRASGeo(sample_files['geometry'], **options)
+    columns = geo.to_columnar()
+    assert len(columns) == 120
+    assert columns.changed() == []
+    assert columns.write_back() == []
+    assert write(geo, tmp_path, 'out.g01') == read_bytes(sample_files['geometry'])
+
+
+@pytest.mark.parametrize('options', [{}, {'lazy': True}, {'compact': True}])
+def test_ragged_edits_change_only_their_cross_sections(sample_files, tmp_path, options):
+    geo = ParseRASGeo(sample_files['geometry'], **options)
+    cross_sections = geo.get_cross_sections()
+    columns = geo.to_columnar()
+    mann_offsets, sta_elev_offsets = columns.mann_offsets, columns.sta_elev_offsets
+    columns.mann_n[mann_offsets[3]:mann_offsets[4]] *= 1.5
+    columns.elevations[sta_elev_offsets[7]:sta_elev_offsets[8]] -= 0.5
+    columns.channel_length[11] = 1234.5
+    assert columns.changed() == [3, 7, 11]
+    assert columns.write_back() == [cross_sections[3], cross_sections[7], cross_sections[11]]
+    assert columns.changed() == []
+
+    # The same edits made to the cross sections
+    expected = ParseRASGeo(sample_files['geometry'], **options)
+    expected_cross_sections = expected.get_cross_sections()
+    xs = expected_cross_sections[3]
+    xs.mannings_n.values = [(sta, n * 1.5, other) for sta, n, other in xs.mannings_n.values]
+    xs = expected_cross_sections[7]
+    xs.sta_elev.points = [(sta, elev - 0.5) for sta, elev in xs.sta_elev.points]
+    expected_cross_sections[11].header.channel_length = 1234.5
+    assert write(geo, tmp_path, 'out.g01') == write(expected, tmp_path, 'expected.g01')
+
+    original = cross_section_text(sample_files['geometry'])
+    written = cross_section_text(str(tmp_path / 'out.g01'))
+    assert [i for i, (old, new) in enumerate(zip(original, written)) if old != new] == [3, 7, 11]
+
+
+def test_new_number_of_values_changes_only_its_cross_section(sample_files, tmp_path):
+    geo = ParseRASGeo(sample_files['geometry'])
+    columns = geo.to_columnar()
+    offsets = columns.mann_offsets
+    start, end = offsets[5], offsets[6]
+    # Drop the last n value of cross section 5
+    columns.mann_stations = np.delete(columns.mann_stations, end - 1)
+    columns.mann_n = np.delete(columns.mann_n, end - 1)
+    columns.mann_offsets = np.concatenate([offsets[:6], offsets[6:] - 1])
+    assert columns.write_back() == [geo.get_cross_sections()[5]]
+    assert len(geo.get_cross_sections()[5].mannings_n.values) == end - start - 1
+
+    write(geo, tmp_path, 'out.g01')
+    original = cross_section_text(sample_files['geometry'])
+    written = cross_section_text(str(tmp_path / 'out.g01'))
+    assert [i for i, (old, new) in enumerate(zip(original, written)) if old != new] == [5]
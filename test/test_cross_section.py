@@ -0,0 +1,63 @@
+"""
+Station/elevation lookups give the same results for list and compact array storage
+"""
+import pytest
+
+from parserasgeo import ParseRASGeo
+from parserasgeo.features.cross_section import StationElevation, StationElevationArray, interpolate
+
+POINTS = [(0, 110.0), (10, 100.0), (20, 104.0), (35, 112.5)]
+
+
+@pytest.fixture(params=[StationElevation, StationElevationArray])
+def sta_elev(request):
+    sta_elev = request.param()
+    sta_elev.points = POINTS
+    return sta_elev
+
+
+def test_elevation_at_between_points(sta_elev):
+    assert sta_elev.elevation_at(5) == pytest.approx(105.0)
+    assert sta_elev.elevation_at(12.5) == pytest.approx(101.0)
+    assert sta_elev.elevation_at(30) == pytest.approx(109.666666667)
+
+
+def test_elevation_at_exact_station(sta_elev):
+    for station, elevation in POINTS:
+        assert sta_elev.elevation_at(station) == elevation
+        assert sta_elev.elevation(station) == elevation
+
+
+def test_elevation_at_out_of_range(sta_elev):
+    # Stations outside of the cross section get the elevation of the nearest end point
+    assert sta_elev.elevation_at(-5) == 110.0
+    assert sta_elev.elevation_at(50) == 112.5
+    with pytest.raises(AttributeError):
+        sta_elev.elevation(50)
+
+
+def test_elevation_at_many_stations(sta_elev):
+    stations = [-5, 0, 5, 12.5, 35, 50]
+    expected = [110.0, 110.0, 105.0, 101.0, 112.5, 112.5]
+    assert sta_elev.elevation_at(stations) == pytest.approx(expected)
+    np = pytest.importorskip('numpy')
+    result = sta_elev.elevation_at(np.array(stations, dtype=float))
+    assert isinstance(result, np.ndarray)
+    assert result.tolist() == pytest.approx(expected)
+
+
+def test_interpolate_matches_single_stations():
+    stations, elevations = zip(*POINTS)
+    many = [x * 0.75 - 3 for x in range(60)]
+    assert interpolate(stations, elevations, many) == pytest.approx(
+        [interpolate(stations, elevations, x) for x in many])
+    with pytest.raises(AttributeError):
+        interpolate([], [], 1.0)
+
+
+def test_compact_cross_sections_match(sample_files):
+    stations = [x * 7.5 for x in range(-2, 60)]
+    regular = ParseRASGeo(sample_files['geometry']).get_cross_sections()
+    compact = ParseRASGeo(sample_files['geometry'], compact=True).get_cross_sections()
+    for xs, compact_xs in zip(regular, compact):
+        assert compact_xs.sta_elev.elevation_at(stations) == pytest.approx(xs.sta_elev.elevation_at(stations))
@@ -0,0 +1,196 @@
+"""
+Steady flow profiles, flow locations and internal change lines
+"""
+import random
+
+import pytest
+
+from parserasgeo import SteadyFlow
+from parserasgeo.features.station import Station
+
+from conftest import read_bytes
+
+
+def test_edit_profile_sets_the_last_location(sample_files, tmp_path):
+    flow = SteadyFlow(sample_files['steady'])
+    before = flow.flow_table.get_flows()
+    flow.edit_profile(1, 500, name='Q10')
+    flow.edit_profile(3, 1234.5)
+    flow.edit_profile(0, 99, location=(flow.river_name, 'Reach', 20000))
+    assert (flow.river_name, flow.reach_name) == ('River 2', 'Reach')
+    out = str(tmp_path / 'out.f01')
+    flow.export(out)
+    with open(out, 'rt') as infile:
+        lines = infile.readlines()
+    assert lines[3] == 'Profile Names=PF 1,Q10,PF 3,PF 4\n'
+    assert lines[9] == '      99     500   308.4  1234.5\n'
+    written = SteadyFlow(out).flow_table
+    assert written.get_flows()[:-1] == before[:-1]
+    assert written.get_flows(location=-1) == [99, 500, before[-1][2], 1234.5]
+    assert type(written.get_flows(profile=1, location=-1)) is int
+
+
+def test_edit_profile_keeps_unchanged_flow_text(tmp_path):
+    filename = str(tmp_path / 'in.f01')
+    with open(filename, 'wt') as outfile:
+        outfile.write('Number of Profiles= 3 \nProfile Names=PF 1,PF 2,PF 3\n'
+                      'River Rch & RM=River,Reach,100\n  101.50  200.00      .5\n')
+    flow = SteadyFlow(filename)
+    flow.edit_profile(1, 250)
+    assert str(flow).endswith('  101.50     250      .5\n')
+    with pytest.raises(IndexError):
+        flow.edit_profile(3, 250)
+
+
+def test_profile_names_can_be_set(sample_files, tmp_path):
+    flow = SteadyFlow(sample_files['steady'])
+    flow.profile_names = ['Q2', 'Q10', 'Q50', 'Q100']
+    flow.num_of_prof = 4
+    with pytest.raises(ValueError):
+        flow.profile_names = ['Q2']
+    with pytest.raises(ValueError):
+        flow.num_of_prof = 5
+    out = str(tmp_path / 'out.f01')
+    flow.export(out)
+    assert SteadyFlow(out).profile_names == ['Q2', 'Q10', 'Q50', 'Q100']
+
+
+def test_flow_location_keys_are_written(sample_files, tmp_path):
+    flow = SteadyFlow(sample_files['steady'])
+    location = flow.flow_table.locations[1]
+    flows = flow.flow_table.get_flows(location=1)
+    location.reach = 'Upper'
+    location.station = Station('12345')
+    out = str(tmp_path / 'out.f01')
+    flow.export(out)
+    written = SteadyFlow(out).flow_table
+    assert written.get_flows(location=(location.river, 'Upper', '12345')) == flows
+    assert [loc.reach for loc in written.locations] == [loc.reach for loc in flow.flow_table.locations]
+
+
+def test_flow_table_edits_are_written(sample_files, tmp_path):
+    flow = SteadyFlow(sample_files['steady'])
+    flow.flow_table.set_flows(500, profile='PF 2')
+    flow.add_profile(750, 'PF 5')
+    out = str(tmp_path / 'out.f01')
+    flow.export(out)
+    written = SteadyFlow(out)
+    assert written.num_of_prof == 5
+    assert written.flow_table.get_flows(profile='PF 2') == [500] * len(written.flow_table)
+    assert written.flow_table.get_flows(profile='PF 5') == [750] * len(written.flow_table)
+
+
+def reference_insert(lines, line):
+    """
+    Inserts 'Set Internal Change=' line into lines the way add_internal_change_line() did before batch insertion
+    """
+    new_station = float(line.split(',')[2])
+    for i, existing in enumerate(lines):
+        try:
+            station = float(existing.strip().split(',')[2])
+        except ValueError:
+            station = -1
+        if new_station > station:
+            lines.insert(i, line)
+            return
+    lines.append(line)
+
+
+def sample_changes(count, seed):
+    rnd = random.Random(seed)
+    return [(rnd.choice([rnd.randint(100, 20000), round(rnd.uniform(100, 20000), 1)]), round(rnd.uniform(-2, 2), 2))
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize('first, batches', [
+    ([], [sample_changes(50, 1)]),
+    (sorted(sample_changes(20, 2), reverse=True), [sample_changes(50, 3), sample_changes(5, 4)]),
+    (sample_changes(20, 5), [sample_changes(50, 6)]),
+])
+def test_batch_internal_changes_match_single_inserts(sample_files, tmp_path, first, batches):
+    single = SteadyFlow(sample_files['steady'])
+    batch = SteadyFlow(sample_files['steady'])
+    reference = []
+    for river_station, ws_change in first:
+        single.add_internal_change_line(river_station, ws_change)
+        batch.add_internal_change_line(river_station, ws_change)
+        reference_insert(reference, single._format_internal_change(single.river_name, single.reach_name,
+                                                                   river_station, ws_change))
+    for changes in batches:
+        for river_station, ws_change in changes:
+            single.add_internal_change_line(river_station, ws_change)
+            reference_insert(reference, single._format_internal_change(single.river_name, single.reach_name,
+                                                                       river_station, ws_change))
+        batch.add_internal_change_lines(changes)
+
+    assert batch.internal_changes.lines == reference
+    assert single.internal_changes.lines == reference
+    single.export(str(tmp_path / 'single.f01'))
+    batch.export(str(tmp_path / 'batch.f01'))
+    assert read_bytes(str(tmp_path / 'batch.f01')) == read_bytes(str(tmp_path / 'single.f01'))
+
+
+def reference_insert_in_file(lines, line):
+    """
+    Inserts 'Set Internal Change=' line into the lines of a whole file the way add_internal_change_line() did before
+    batch insertion
+    """
+    ic_indices = [(i, float(existing.split(',')[2])) for i, existing in enumerate(lines)
+                  if existing.startswith('Set Internal Change=')]
+    if not ic_indices:
+        boundary = next(i for i, existing in enumerate(lines) if existing.startswith('Boundary for River Rch & Prof#'))
+        lines.insert(boundary + 5, line)
+        return
+    new_station = float(line.split(',')[2])
+    for i, station in ic_indices:
+        if new_station > station:
+            lines.insert(i, line)
+            return
+    lines.insert(ic_indices[-1][0] + 1, line)
+
+
+@pytest.mark.parametrize('last_run', [(8000, 500), (12000, 500)])
+def test_internal_changes_stay_in_place(sample_files, tmp_path, last_run):
+    with open(sample_files['steady'], 'rt') as infile:
+        lines = infile.readlines()
+    flow = SteadyFlow(sample_files['steady'])
+    format_line = flow._format_internal_change
+    # Two runs of lines, one before the boundary blocks and one at the end of the file
+    lines[4:4] = [format_line('River 0', 'Reach', station, 0.5) for station in (15000, 9000)]
+    lines += [format_line('River 2', 'Reach', station, 0.5) for station in last_run]
+    filename = str(tmp_path / 'in.f01')
+    with open(filename, 'wt', newline='\r\n') as outfile:
+        outfile.writelines(lines)
+
+    flow = SteadyFlow(filename)
+    out = str(tmp_path / 'out.f01')
+    flow.export(out)
+    assert read_bytes(out) == read_bytes(filename)
+    changes = [(20000, 1.0), (12000, 1.5), (10000, 2.0), (100, 2.5)]
+    flow.add_internal_change_lines(changes)
+    for river_station, ws_change in changes:
+        reference_insert_in_file(lines, format_line(flow.river_name, flow.reach_name, river_station, ws_change))
+    assert str(flow) == ''.join(lines)
+
+
+def test_first_internal_change_is_added_after_the_boundary_block(sample_files):
+    with open(sample_files['steady'], 'rt') as infile:
+        lines = infile.readlines()
+    flow = SteadyFlow(sample_files['steady'])
+    flow.add_internal_change_line(1000, 0.5)
+    reference_insert_in_file(lines, flow._format_internal_change(flow.river_name, flow.reach_name, 1000, 0.5))
+    assert str(flow) == ''.join(lines)
+
+
+def test_first_internal_change_is_added_after_a_flow_location(tmp_path):
+    filename = str(tmp_path / 'in.f01')
+    with open(filename, 'wt') as outfile:
+        outfile.write('Flow Title=Test\nProgram Version=5.07\nNumber of Profiles= 3 \nProfile Names=PF 1,PF 2,PF 3\n')
+        for station in (300, 200, 100):
+            outfile.write('River Rch & RM=River,Reach,{}\n     100     200     300\n'.format(station))
+        outfile.write('Dn Type= 3 \nDn Slope=0.001\n')
+    flow = SteadyFlow(filename)
+    flow.add_internal_change_line(150, 0.5)
+    lines = str(flow).splitlines(True)
+    # Line 9 is a line of flows, the change is added after it rather than inside the flow location
+    assert lines[9:11] == ['     100     200     300\n', flow._format_internal_change('River', 'Reach', 150, 0.5)]
@@ -0,0 +1,176 @@
+"""
+Indexed lookups return the same nodes, in the same order, as a linear scan of geo_list or uflow_list, including
+after the keys of nodes are changed and after the list is changed
+"""
+import itertools
+import random
+
+import pytest
+
+from parserasgeo import ParseRASGeo, UnsteadyFlow
+from parserasgeo.features import CrossSection, Culvert
+from parserasgeo.features.boundary import Boundary
+from parserasgeo.features.station import Station
+
+
+def scan_cross_sections(geo, station_value=None, river=None, reach=None):
+    """
+    get_cross_sections() as a linear scan, as it was before the index
+    """
+    found = []
+    for xs in geo.geo_list:
+        if not isinstance(xs, CrossSection):
+            continue
+        value = xs.header.station.value
+        if isinstance(station_value, tuple):
+            low, high = station_value
+            if (low is not None and value < low) or (high is not None and value > high):
+                continue
+        elif station_value is not None and value != station_value:
+            continue
+        if (river is None or xs.river == river) and (reach is None or xs.reach == reach):
+            found.append(xs)
+    return found
+
+
+def scan_culverts(geo, station=None, river=None, reach=None):
+    return [culvert for culvert in geo.geo_list if isinstance(culvert, Culvert) and
+            (station is None or culvert.header.station == station) and
+            (river is None or culvert.river == river) and (reach is None or culvert.reach == reach)]
+
+
+def geometry_queries(geo):
+    cross_sections = scan_cross_sections(geo)
+    rivers = sorted(set(xs.river for xs in cross_sections)) + ['No River', None]
+    reaches = sorted(set(xs.reach for xs in cross_sections)) + [None]
+    stations = [xs.header.station.value for xs in cross_sections[::7]]
+    ranges = [None, (None, None), (stations[2], None), (None, stations[2]), (stations[4], stations[1]),
+              (stations[1], stations[4]), 1e9] + stations
+    return itertools.product(ranges, rivers, reaches)
+
+
+def assert_geometry_matches_scan(geo):
+    for station_value, river, reach in geometry_queries(geo):
+        assert geo.get_cross_sections(station_value=station_value, river=river, reach=reach) == \
+            scan_cross_sections(geo, station_value, river, reach), (station_value, river, reach)
+    for culvert in scan_culverts(geo) + [None]:
+        station = None if culvert is None else culvert.header.station
+        for river in [None, 'River 1', 'No River']:
+            assert geo.get_culverts(station=station, river=river) == scan_culverts(geo, station, river)
+
+
+@pytest.mark.parametrize('options', [{}, {'lazy': True}, {'compact': True}])
+def test_cross_sections_match_scan(sample_files, options):
+    geo = ParseRASGeo(sample_files['geometry'], **options)
+    assert len(geo.get_cross_sections()) == 120
+    assert_geometry_matches_scan(geo)
+
+
+def test_cross_sections_match_scan_after_keys_change(sample_files):
+    geo = ParseRASGeo(sample_files['geometry'])
+    assert_geometry_matches_scan(geo)
+    cross_sections = geo.get_cross_sections()
+    cross_sections[3].river = 'Renamed River'
+    cross_sections[50].reach = 'Renamed Reach'
+    cross_sections[60].header.station = Station('12.5')
+    cross_sections[61].header = cross_sections[62].header.clone()
+    assert geo.get_cross_sections(river='Renamed River') == [cross_sections[3]]
+    assert geo.get_cross_sections(station_value=12.5) == [cross_sections[60]]
+    assert_geometry_matches_scan(geo)
+
+    culvert = geo.get_culverts()[0]
+    culvert.header.station = 12.25
+    assert geo.get_culverts(station=12.25) == [culvert]
+
+
+def test_cross_sections_match_scan_after_list_changes(sample_files):
+    geo = ParseRASGeo(sample_files['geometry'])
+    cross_sections = geo.get_cross_sections()
+    geo.geo_list.remove(cross_sections[10])
+    geo.geo_list.insert(0, cross_sections[10])
+    del geo.geo_list[-5:]
+    assert_geometry_matches_scan(geo)
+    geo.geo_list = list(reversed(geo.geo_list))
+    assert_geometry_matches_scan(geo)
+
+
+def test_changing_another_model_keeps_index(sample_files):
+    geo = ParseRASGeo(sample_files['geometry'])
+    other = ParseRASGeo(sample_files['geometry'])
+    geo.get_cross_sections()
+    other.get_cross_sections()[0].river = 'Renamed River'
+    assert not geo._index._stale
+    assert other._index._stale
+
+
+def test_clone_index_matches_scan_after_keys_change(sample_files):
+    geo = ParseRASGeo(sample_files['geometry'])
+    geo.get_cross_sections()
+    clone = geo.clone()
+    clone.get_cross_sections()[5].header.station = Station('7.5')
+    geo.get_cross_sections()[6].header.station = Station('8.5')
+    assert_geometry_matches_scan(geo)
+    assert_geometry_matches_scan(clone)
+    assert geo.get_cross_sections(station_value=7.5) == []
+    assert clone.get_cross_sections(station_value=8.5) == []
+
+
+def test_clone_queries_do_not_copy_headers(sample_files):
+    clone = ParseRASGeo(sample_files['geometry']).clone()
+    cross_sections = clone.get_cross_sections()
+    assert clone.get_cross_sections(station_id=cross_sections[3]._peek('header').station.id)
+    assert clone.get_cross_sections(station_value=(None, 1e9), interpolated=False) == cross_sections
+    # Headers are still shared with the original
+    assert all('header' in xs.__dict__['_shared'] for xs in cross_sections)
+
+
+def scan_boundaries(flow, river=None, reach=None, station_value=None, hydrograph_type=None):
+    found = []
+    for boundary in flow.uflow_list:
+        if not isinstance(boundary, Boundary):
+            continue
+        value = boundary.header.station.value
+        if isinstance(station_value, tuple):
+            low, high = station_value
+            if value is None or (low is not None and value < low) or (high is not None and value > high):
+                continue
+        elif station_value is not None and value != station_value:
+            continue
+        if ((river is None or boundary.header.river_name == river) and
+                (reach is None or boundary.header.reach_name == reach) and
+                (hydrograph_type is None or boundary.hydrograph.type == hydrograph_type)):
+            found.append(boundary)
+    return found
+
+
+def assert_boundaries_match_scan(flow, seed):
+    boundaries = scan_boundaries(flow)
+    rivers = sorted(set(boundary.header.river_name for boundary in boundaries)) + ['No River', None]
+    types = sorted(set(boundary.hydrograph.type for boundary in boundaries)) + ['Lateral Inflow', None]
+    stations = [None, 100.0, boundaries[0].header.station.value, 5.0, (50, None), (None, 150), (None, None),
+                (0, 1e9), (200, 100)]
+    rnd = random.Random(seed)
+    for _ in range(300):
+        query = dict(river=rnd.choice(rivers), reach=rnd.choice(['Reach', None]), station_value=rnd.choice(stations),
+                     hydrograph_type=rnd.choice(types))
+        assert flow.get_boundaries(**query) == scan_boundaries(flow, **query), query
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_boundaries_match_scan_after_keys_change(sample_files, lazy):
+    flow = UnsteadyFlow(sample_files['unsteady'], lazy=lazy)
+    assert_boundaries_match_scan(flow, 0)
+    boundaries = flow.get_boundaries()
+    boundaries[0].header.river_name = 'Renamed River'
+    boundaries[1].hydrograph.type = 'Lateral Inflow'
+    boundaries[2].header.station = Station('42')
+    assert flow.get_boundaries(river='Renamed River') == [boundaries[0]]
+    assert flow.get_boundaries(hydrograph_type='Lateral Inflow') == [boundaries[1]]
+    assert flow.get_boundaries(station_value=42.0) == [boundaries[2]]
+    assert_boundaries_match_scan(flow, 1)
+
+    flow.uflow_list.remove(boundaries[1])
+    assert flow.get_boundaries(hydrograph_type='Lateral Inflow') == []
+    flow.uflow_list = list(flow.uflow_list) + [boundaries[1]]
+    assert flow.get_boundaries(hydrograph_type='Lateral Inflow') == [boundaries[1]]
+    assert_boundaries_match_scan(flow, 2)
@@ -0,0 +1,50 @@
+"""
+Instrumentation records the time of every feature imported and written while it is enabled, and nothing otherwise
+"""
+from parserasgeo import ParseRASGeo, instrument
+from parserasgeo.features import CrossSection
+
+
+def test_instrumentation_is_off_by_default():
+    assert not instrument.enabled()
+    import_geo, write = vars(CrossSection)['import_geo'], vars(ParseRASGeo)['write']
+    with instrument.instrumented():
+        assert instrument.enabled()
+        assert vars(CrossSection)['import_geo'] is not import_geo
+        assert vars(ParseRASGeo)['write'] is not write
+    assert not instrument.enabled()
+    assert vars(CrossSection)['import_geo'] is import_geo
+    assert vars(ParseRASGeo)['write'] is write
+
+
+def test_report_records_import_and_write(sample_files, tmp_path):
+    with instrument.instrumented() as stats:
+        geo = ParseRASGeo(sample_files['geometry'])
+        xs = geo.get_cross_sections()[0]
+        xs.mannings_n.values = [(station, n * 2, other) for station, n, other in xs.mannings_n.values]
+        geo.write(str(tmp_path / 'out.g01'))
+    totals = stats.as_dict()
+
+    assert set(totals) == {'import_geo', '__str__'}
+    assert totals['import_geo']['CrossSection']['count'] == 120
+    assert totals['import_geo']['Mannings_n']['count'] == 120
+    assert totals['import_geo'][instrument.UNKNOWN]['count'] > 0
+    # Clean features are written from their text, only the changed cross section formats its parts
+    assert totals['__str__']['CrossSection']['count'] == 120
+    assert totals['__str__']['Mannings_n']['count'] == 1
+    assert totals['__str__'][instrument.UNKNOWN]['count'] == 1
+    assert all(total['seconds'] >= 0 for phase in totals.values() for total in phase.values())
+    report = stats.report()
+    assert 'CrossSection' in report and 'Mannings_n' in report
+
+    # Nothing is recorded once the with block ends
+    ParseRASGeo(sample_files['geometry'])
+    assert stats.as_dict() == totals
+
+
+def test_sinks_receive_every_call(sample_files):
+    calls = []
+    with instrument.instrumented(lambda *args: calls.append(args)):
+        ParseRASGeo(sample_files['geometry'])
+    assert sum(1 for name, phase, _, _ in calls if (name, phase) == ('CrossSection', 'import_geo')) == 120
+    assert all(size >= 0 for _, _, _, size in calls)
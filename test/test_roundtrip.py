@@ -0,0 +1,164 @@
+"""
+Files that are imported and written without changes are written byte for byte as they were read
+"""
+import os
+import shutil
+
+import pytest
+
+from parserasgeo import GeometryCache, ParseRASGeo, SteadyFlow, UnsteadyFlow
+
+from conftest import read_bytes
+
+GEOMETRY_OPTIONS = [{}, {'compact': True}, {'lazy': True}, {'lazy': True, 'compact': True}]
+
+
+@pytest.mark.parametrize('options', GEOMETRY_OPTIONS)
+def test_geometry_round_trip(sample_files, tmp_path, options):
+    out = str(tmp_path / 'out.g01')
+    ParseRASGeo(sample_files['geometry'], **options).write(out)
+    assert read_bytes(out) == read_bytes(sample_files['geometry'])
+
+
+@pytest.mark.parametrize('options', GEOMETRY_OPTIONS)
+def test_geometry_round_trip_from_cache(sample_files, tmp_path, options):
+    cache = GeometryCache(str(tmp_path / 'cache'))
+    ParseRASGeo(sample_files['geometry'], cache=cache, **options)
+    out = str(tmp_path / 'out.g01')
+    ParseRASGeo(sample_files['geometry'], cache=cache, **options).write(out)
+    assert read_bytes(out) == read_bytes(sample_files['geometry'])
+
+
+@pytest.mark.parametrize('options', [{}, {'lazy': True}])
+def test_geometry_sources_survive_chdir(sample_files, tmp_path, monkeypatch, options):
+    directory, filename = os.path.split(sample_files['geometry'])
+    monkeypatch.chdir(directory)
+    geo = ParseRASGeo(filename, **options)
+    monkeypatch.chdir(str(tmp_path))
+    geo.write('out.g01')
+    assert read_bytes('out.g01') == read_bytes(sample_files['geometry'])
+
+
+def test_geometry_changed_feature_is_rewritten(sample_files, tmp_path):
+    geo = ParseRASGeo(sample_files['geometry'])
+    xs = geo.get_cross_sections()[0]
+    xs.header.channel_length = 1234.5
+    out = str(tmp_path / 'out.g01')
+    geo.write(out)
+    written = ParseRASGeo(out).get_cross_sections()
+    assert written[0].header.channel_length == 1234.5
+    assert [str(xs) for xs in written[1:]] == [str(xs) for xs in geo.get_cross_sections()[1:]]
+
+
+@pytest.mark.parametrize('options', GEOMETRY_OPTIONS)
+def test_geometry_written_over_its_source(sample_files, tmp_path, options):
+    geo_filename = str(tmp_path / 'model.g01')
+    shutil.copy(sample_files['geometry'], geo_filename)
+    geo = ParseRASGeo(geo_filename, **options)
+    geo.write(geo_filename)
+    assert read_bytes(geo_filename) == read_bytes(sample_files['geometry'])
+    # Features are written from copies of their text after the source has been overwritten
+    geo.get_cross_sections()[0].header.channel_length = 1234.5
+    geo.write(geo_filename)
+    geo.write(str(tmp_path / 'out.g01'))
+    assert read_bytes(str(tmp_path / 'out.g01')) == read_bytes(geo_filename)
+    assert ParseRASGeo(geo_filename).get_cross_sections()[0].header.channel_length == 1234.5
+
+
+@pytest.mark.parametrize('options', GEOMETRY_OPTIONS)
+def test_geometry_changed_source_is_not_read(sample_files, tmp_path, options):
+    geo_filename = str(tmp_path / 'model.g01')
+    shutil.copy(sample_files['geometry'], geo_filename)
+    geo = ParseRASGeo(geo_filename, **options)
+    with open(geo_filename, 'ab') as outfile:
+        outfile.write(b'\r\n')
+    out = tmp_path / 'out.g01'
+    with pytest.raises(ValueError):
+        geo.write(str(out))
+    assert not out.exists()
+
+
+def test_steady_flow_round_trip(sample_files, tmp_path):
+    out = str(tmp_path / 'out.f01')
+    SteadyFlow(sample_files['steady']).export(out)
+    assert read_bytes(out) == read_bytes(sample_files['steady'])
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_unsteady_flow_round_trip(sample_files, tmp_path, monkeypatch, lazy):
+    directory, filename = os.path.split(sample_files['unsteady'])
+    monkeypatch.chdir(directory)
+    flow = UnsteadyFlow(filename, lazy=lazy)
+    monkeypatch.chdir(str(tmp_path))
+    flow.export('out.u01')
+    assert read_bytes('out.u01') == read_bytes(sample_files['unsteady'])
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_unsteady_flow_exported_over_its_source(sample_files, tmp_path, lazy):
+    flow_filename = str(tmp_path / 'model.u01')
+    shutil.copy(sample_files['unsteady'], flow_filename)
+    flow = UnsteadyFlow(flow_filename, lazy=lazy)
+    flow.export(flow_filename)
+    assert read_bytes(flow_filename) == read_bytes(sample_files['unsteady'])
+    flow.export(str(tmp_path / 'out.u01'))
+    assert read_bytes(str(tmp_path / 'out.u01')) == read_bytes(sample_files['unsteady'])
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_unsteady_flow_hydrograph_values(sample_files, lazy):
+    boundaries = UnsteadyFlow(sample_files['unsteady']).get_boundaries()
+    expected = [list(boundary.hydrograph.values) for boundary in boundaries]
+    flow = UnsteadyFlow(sample_files['unsteady'], lazy=lazy)
+    assert [list(boundary.hydrograph.values) for boundary in flow.get_boundaries()] == expected
+    assert len(expected[0]) == 120
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_unsteady_flow_scaled_hydrograph_is_written(sample_files, tmp_path, lazy):
+    flow = UnsteadyFlow(sample_files['unsteady'], lazy=lazy)
+    values = list(flow.get_boundaries()[0].hydrograph.values)
+    flow.scale_hydrographs(2.0, hydrograph_type='Flow')
+    out = str(tmp_path / 'out.u01')
+    flow.export(out)
+    written = UnsteadyFlow(out).get_boundaries()
+    assert list(written[0].hydrograph.values) == pytest.approx([value * 2.0 for value in values])
+    # Stage hydrographs are not selected and are written unchanged
+    unchanged = UnsteadyFlow(sample_files['unsteady']).get_boundaries(hydrograph_type='Stage')
+    assert ([list(bnd.hydrograph.values) for bnd in written if bnd.hydrograph.type == 'Stage'] ==
+            [list(bnd.hydrograph.values) for bnd in unchanged])
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+@pytest.mark.parametrize('steps', [3, -3, 0, 500, -500])
+def test_unsteady_flow_shifted_hydrograph_is_written(sample_files, tmp_path, lazy, steps):
+    flow = UnsteadyFlow(sample_files['unsteady'], lazy=lazy)
+    values = list(flow.get_boundaries()[0].hydrograph.values)
+    flow.shift_hydrographs(steps, river='River 0', station_value=20000)
+    out = str(tmp_path / 'out.u01')
+    flow.export(out)
+    written = list(UnsteadyFlow(out).get_boundaries()[0].hydrograph.values)
+    n = len(values)
+    if steps >= 0:
+        steps = min(steps, n)
+        expected = [values[0]] * steps + values[:n - steps]
+    else:
+        steps = min(-steps, n)
+        expected = values[steps:] + [values[-1]] * steps
+    assert len(written) == n
+    assert written == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_unsteady_flow_replaced_hydrograph_length_is_written(sample_files, tmp_path, lazy):
+    flow = UnsteadyFlow(sample_files['unsteady'], lazy=lazy)
+    new_values = [float(i) for i in range(17)] + [2.5]
+    changed = flow.replace_hydrographs(new_values, river='River 1', hydrograph_type='Flow')
+    assert len(changed) == 1
+    out = str(tmp_path / 'out.u01')
+    flow.export(out)
+    text = read_bytes(out).decode()
+    assert text.count('Flow Hydrograph= 18 \r\n') == 1
+    assert text.count('Flow Hydrograph= 120 \r\n') == 2
+    written = UnsteadyFlow(out, lazy=lazy).get_boundaries(river='River 1', hydrograph_type='Flow')
+    assert list(written[0].hydrograph.values) == new_values
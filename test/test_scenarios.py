@@ -0,0 +1,128 @@
+"""
+Variations of one geometry give the same files as importing the geometry again and making the same changes
+"""
+import pytest
+
+from parserasgeo import GeometryTemplate, ParseRASGeo
+from parserasgeo.features.cross_section import ChannelNError
+from parserasgeo.features.station import Station
+
+from conftest import read_bytes
+
+OPTIONS = [{}, {'lazy': True}, {'compact': True}]
+
+
+def change(geo):
+    """
+    Changes numbers of a few cross sections of geo in several ways
+    """
+    cross_sections = geo.get_cross_sections()
+    xs = cross_sections[2]
+    xs.mannings_n.values = [(sta, n * 1.5, other) for sta, n, other in xs.mannings_n.values]
+    xs = cross_sections[7]
+    xs.sta_elev.points = [(sta, elev + 1) for sta, elev in xs.sta_elev.points]
+    xs = cross_sections[11]
+    xs.header.station = Station('99999')
+    xs.bank_sta.left = xs.sta_elev.points[2][0]
+
+
+def write(geo, tmp_path, name):
+    out = str(tmp_path / name)
+    geo.write(out)
+    return read_bytes(out)
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_clone_is_independent(sample_files, tmp_path, options):
+    geo = ParseRASGeo(sample_files['geometry'], **options)
+    clone = geo.clone()
+    change(clone)
+    assert write(geo, tmp_path, 'geo.g01') == read_bytes(sample_files['geometry'])
+
+    expected = ParseRASGeo(sample_files['geometry'], **options)
+    change(expected)
+    assert write(clone, tmp_path, 'clone.g01') == write(expected, tmp_path, 'expected.g01')
+
+    # Changing the original after cloning doesn't change the clone either
+    change(geo)
+    clone_again = ParseRASGeo(sample_files['geometry'], **options).clone()
+    assert write(clone_again, tmp_path, 'clone_again.g01') == read_bytes(sample_files['geometry'])
+    assert write(clone, tmp_path, 'clone2.g01') == write(expected, tmp_path, 'expected.g01')
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_restore_snapshot(sample_files, tmp_path, options):
+    geo = ParseRASGeo(sample_files['geometry'], **options)
+    token = geo.snapshot()
+    for _ in range(2):
+        change(geo)
+        assert write(geo, tmp_path, 'changed.g01') != read_bytes(sample_files['geometry'])
+        geo.restore(token)
+        assert write(geo, tmp_path, 'restored.g01') == read_bytes(sample_files['geometry'])
+
+
+def test_restore_changed_snapshot(sample_files, tmp_path):
+    geo = ParseRASGeo(sample_files['geometry'])
+    change(geo)
+    token = geo.snapshot()
+    changed = write(geo, tmp_path, 'changed.g01')
+    geo.get_cross_sections()[2].mannings_n.values = []
+    geo.restore(token)
+    assert write(geo, tmp_path, 'restored.g01') == changed
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_template_matches_write(sample_files, tmp_path, options):
+    geo = ParseRASGeo(sample_files['geometry'], **options)
+    template = GeometryTemplate(geo)
+    assert len(template) == len(geo.get_cross_sections())
+    assert template.render([None] * len(template)) == read_bytes(sample_files['geometry'])
+
+    row = [1.0 + 0.01 * i for i in range(len(template))]
+    for xs, factor in zip(geo.get_cross_sections(), row):
+        xs.mannings_n.values = [(sta, n * factor, other) for sta, n, other in xs.mannings_n.values]
+    assert template.render(row) == write(geo, tmp_path, 'expected.g01')
+
+
+def scale_one_at_a_time(geo, river, left, channel, right):
+    """
+    Scales n values with the per cross section methods that scale_mannings_n() replaces
+    """
+    for xs in geo.get_cross_sections(river=river):
+        xs.define_channel_n()
+        xs.alter_channel_n(channel)
+        xs.alter_overbank_n(left)
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_scale_mannings_n_matches_per_cross_section(sample_files, tmp_path, options):
+    geo = ParseRASGeo(sample_files['geometry'], **options)
+    scaled = geo.scale_mannings_n({('River 1', 'Reach'): (0.9, 1.2, 0.9)})
+    assert scaled == geo.get_cross_sections(river='River 1')
+    expected = ParseRASGeo(sample_files['geometry'], **options)
+    scale_one_at_a_time(expected, 'River 1', 0.9, 1.2, 0.9)
+    assert write(geo, tmp_path, 'scaled.g01') == write(expected, tmp_path, 'expected.g01')
+
+
+def test_scale_mannings_n_overlap(sample_files):
+    geo = ParseRASGeo(sample_files['geometry'])
+    xs = geo.get_cross_sections(river='River 1')[0]
+    low = high = xs.header.station.value
+    regions = {('River 1', 'Reach'): (1.0, 2.0, 1.0), ('River 1', 'Reach', low, high): (1.0, 3.0, 1.0)}
+    with pytest.raises(ValueError):
+        geo.scale_mannings_n(regions)
+
+    for overlap, channel in (('first', 2.0), ('last', 3.0), ('multiply', 6.0)):
+        copy = geo.clone()
+        copy.scale_mannings_n(regions, overlap=overlap)
+        copy_xs = copy.get_cross_sections(river='River 1')[0]
+        assert copy_xs.mannings_n.values == xs.scaled_mannings_n(1.0, channel, 1.0)
+
+
+def test_scale_mannings_n_changes_nothing_on_error(sample_files, tmp_path):
+    geo = ParseRASGeo(sample_files['geometry'])
+    geo.get_cross_sections()[-1].bank_sta.left = None
+    with pytest.raises(ChannelNError):
+        geo.scale_mannings_n({(None, None): (1.1, 1.2, 1.3)})
+    geo.get_cross_sections()[-1].mark_clean()
+    assert write(geo, tmp_path, 'out.g01') == read_bytes(sample_files['geometry'])
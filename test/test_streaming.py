@@ -0,0 +1,49 @@
+"""
+iter_features() and transform() stream a geometry file one feature at a time with the same results as ParseRASGeo
+"""
+import pytest
+
+from parserasgeo import ParseRASGeo, iter_features, transform
+from parserasgeo.features import CrossSection
+
+from conftest import read_bytes
+
+
+@pytest.mark.parametrize('track', [False, True])
+def test_iter_features_matches_geo_list(sample_files, track):
+    geo_list = ParseRASGeo(sample_files['geometry']).geo_list
+    items = list(iter_features(sample_files['geometry'], track=track))
+    assert [type(item) for item in items] == [type(item) for item in geo_list]
+    if not track:
+        # Untracked features are written from their values
+        for item in geo_list:
+            if not isinstance(item, str):
+                item.mark_dirty()
+    assert [str(item) for item in items] == [str(item) for item in geo_list]
+
+
+def scale_mannings_n(xs):
+    xs.mannings_n.values = [(station, n * 1.25, other) for station, n, other in xs.mannings_n.values]
+
+
+def test_transform_matches_write(sample_files, tmp_path):
+    geo = ParseRASGeo(sample_files['geometry'])
+    xs = geo.get_cross_sections()[5]
+    scale_mannings_n(xs)
+    expected = str(tmp_path / 'expected.g01')
+    geo.write(expected)
+
+    def fn(item):
+        if isinstance(item, CrossSection) and (item.river, item.reach, item.header.station.value) == \
+                (xs.river, xs.reach, xs.header.station.value):
+            scale_mannings_n(item)
+
+    out = str(tmp_path / 'out.g01')
+    transform(sample_files['geometry'], out, fn)
+    assert read_bytes(out) == read_bytes(expected)
+    assert read_bytes(out) != read_bytes(sample_files['geometry'])
+
+
+def test_transform_refuses_to_write_over_its_input(sample_files):
+    with pytest.raises(AttributeError):
+        transform(sample_files['geometry'], sample_files['geometry'], lambda item: None)
@@ -0,0 +1,79 @@
+"""
+Vectorized fixed width formatting and decoding give the same results as formatting and decoding one value at a time
+"""
+import random
+
+import pytest
+
+from parserasgeo.features import tools
+from parserasgeo.features.tools import decode_block, fl_int_list, print_list_by_group, split_block, split_by_n
+
+np = pytest.importorskip('numpy')
+
+
+def reference_print_list_by_group(values, width, num_columns):
+    """
+    print_list_by_group() as it was before it was vectorized
+    """
+    s = ''
+    for row in range(0, len(values), num_columns):
+        s += ''.join(tools.format_by_width(value, width) for value in values[row:row + num_columns]) + '\n'
+    return s
+
+
+def sample_values(count, seed):
+    """
+    Returns count values like those in geometry files, with the edge cases of the formatter mixed in
+    """
+    rnd = random.Random(seed)
+    special = [0, 0.0, -0.0, 0.5, -0.5, 1e-05, 0.30000000000000004, 1234567.8, -1234567, 123456789, 0.035, 99999999,
+               -9999999, 12345.678, 1e+20, 5e-324, 1.0, -1.0, 100.0, 10]
+    values = []
+    for i in range(count):
+        kind = rnd.random()
+        if kind < 0.1:
+            values.append(rnd.choice(special))
+        elif kind < 0.4:
+            values.append(rnd.randint(-99999, 999999))
+        else:
+            values.append(round(rnd.uniform(-5000, 5000), rnd.randint(0, 6)))
+    return values
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('width, num_columns', [(8, 10), (8, 9), (16, 4)])
+def test_print_list_by_group_matches_reference(seed, width, num_columns):
+    values = sample_values(1000, seed)
+    assert len(values) >= tools.MIN_VECTOR_VALUES
+    assert print_list_by_group(values, width, num_columns) == reference_print_list_by_group(values, width,
+                                                                                             num_columns)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_print_list_by_group_numpy_array_matches_fl_int_list(seed):
+    values = np.array([float(value) for value in sample_values(500, seed)])
+    assert print_list_by_group(values, 8, 10) == reference_print_list_by_group(fl_int_list(values), 8, 10)
+
+
+def test_print_list_by_group_short_and_empty():
+    values = sample_values(30, 7)
+    assert print_list_by_group(values, 8, 10) == reference_print_list_by_group(values, 8, 10)
+    assert print_list_by_group([], 8, 10) == ''
+
+
+def sample_block(count, width, num_columns, seed):
+    """
+    Returns lines of a block of count values, without values that fill the column and can't be split apart
+    """
+    values = [value for value in sample_values(count, seed)
+              if len(tools.format_by_width(value, width).strip()) < width]
+    return print_list_by_group(values, width, num_columns).splitlines(True)
+
+
+@pytest.mark.parametrize('count', [1, 9, 10, 11, 200, 1001])
+def test_decode_block_matches_split_by_n(count):
+    lines = sample_block(count, 8, 10, count)
+    expected = [value for line in lines for value in split_by_n(line, 8)]
+    assert fl_int_list(decode_block(lines, 8)) == expected
+    assert split_block(lines, 8) == expected
+    assert [type(value) for value in split_block(lines, 8)] == [type(value) for value in expected]
@@ -0,0 +1,65 @@
+"""
+Clean features are written exactly as they were imported, changed features are written from their values
+"""
+import pytest
+
+from parserasgeo import ParseRASGeo
+
+from conftest import read_bytes
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_sta_elev_changed_in_place_is_written(sample_files, tmp_path, compact):
+    geo = ParseRASGeo(sample_files['geometry'], compact=compact)
+    xs = geo.get_cross_sections()[3]
+    station, elevation = xs.sta_elev.points[0]
+    if compact:
+        xs.sta_elev.elevations[0] += 1.5
+    else:
+        xs.sta_elev.points[0] = (station, elevation + 1.5)
+    out = str(tmp_path / 'out.g01')
+    geo.write(out)
+
+    assert read_bytes(out) != read_bytes(sample_files['geometry'])
+    written = ParseRASGeo(out).get_cross_sections()[3]
+    assert written.sta_elev.points[0] == (station, pytest.approx(elevation + 1.5))
+
+
+def test_compact_points_are_read_only(sample_files):
+    xs = ParseRASGeo(sample_files['geometry'], compact=True).get_cross_sections()[3]
+    with pytest.raises(TypeError):
+        xs.sta_elev.points[0] = (0, 0)
+
+
+def test_compact_sta_elev_changed_back_is_clean(sample_files, tmp_path):
+    geo = ParseRASGeo(sample_files['geometry'], compact=True)
+    xs = geo.get_cross_sections()[3]
+    xs.sta_elev.elevations[0] += 1.5
+    assert xs.is_dirty()
+    xs.sta_elev.elevations[0] -= 1.5
+    assert not xs.is_dirty()
+    out = str(tmp_path / 'out.g01')
+    geo.write(out)
+    assert read_bytes(out) == read_bytes(sample_files['geometry'])
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_changes_after_import_are_tracked(sample_files, lazy):
+    geo = ParseRASGeo(sample_files['geometry'], lazy=lazy)
+    xs = geo.get_cross_sections()[3]
+    assert not xs.is_dirty()
+    # Accessing a deferred part imports it without changing the flags, changes made after that are tracked
+    values = [(station, n * 2, other) for station, n, other in xs.mannings_n.values]
+    assert not xs.is_dirty()
+    xs.mannings_n.values = values
+    assert xs.is_dirty()
+    station = geo.get_cross_sections()[4].header.station
+    xs.header.station = station
+    assert xs in geo.get_cross_sections(station_value=station.value)
+
+
+def test_parts_that_are_not_imported_are_dirty(sample_files):
+    xs = ParseRASGeo(sample_files['geometry']).get_cross_sections()[3]
+    parts = [part for part in (xs.skew, xs.levee, xs.iefa, xs.obstruct) if part not in xs.geo_list]
+    assert parts and all(part.is_dirty() for part in parts)
+    assert not xs.is_dirty()
@@ -1,3 +1,5 @@
+import sys
+
 import parserasgeo as prg
 
 def main():
@@ -7,18 +9,23 @@ def main():
     infile = r"Z:\UDFCD PLANNING\FHAD Review\Niver Round 3\Orig\20161012 FHAD Submittal\HEC-RAS\NiverCreek_FHAD_Sept.g03"
     #infile = r"Z:\UDFCD PLANNING\FHAD Review\SPR - 6th to 58th\Orig\20160907 Merrick_SPR 6th-58th_08-26-2016\SPR 6th-58th_Existing_HECRAS\SPR_Downstream.g04"
     infile = r"Z:\UDFCD PLANNING\Second Creek\12 FHAD\01_RAS\HEC-RAS\Submittal 2 - working\SCFHAD.g02"
+    if len(sys.argv) > 1:
+        infile = sys.argv[1]
 
     tolerance = 1
 
-    geo = prg.ParseRASGeo(infile)
-    cross_sections = geo.extract_xs()
+    geo = prg.ParseRASGeo(infile, compact=True)
+    cross_sections = geo.get_cross_sections()
 
     for xs in cross_sections:
-        left_elv = xs.sta_elev.elevation(xs.bank_sta.left)
-        right_elv = xs.sta_elev.elevation(xs.bank_sta.right)
+        if xs.bank_sta.left is None or xs.bank_sta.right is None:
+            continue
+        # Bank stations are usually points, elevation_at() also interpolates between points
+        left_elv = xs.sta_elev.elevation_at(xs.bank_sta.left)
+        right_elv = xs.sta_elev.elevation_at(xs.bank_sta.right)
         diff = left_elv - right_elv
         if abs(diff) >= tolerance:
-            print xs.river+','+xs.reach+','+str(xs.header.xs_id)+','+str(diff)
+            print(xs.river+','+xs.reach+','+str(xs.header.station.id)+','+str(diff))
 
 if __name__ == '__main__':
     main()